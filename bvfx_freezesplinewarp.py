@@ -4,12 +4,39 @@ import nuke.rotopaint as rp
 import nuke.splinewarp as sw
 import _curveknob as ck
 import os
-import sys
+import re
+import math
+import json
+import time
+import hashlib
+import array
+import bisect
+import mmap
+import struct
 import logging
+import multiprocessing
+import multiprocessing.pool
+
+try:
+    import numpy
+except ImportError:  # the batch transform engine falls back to pure python
+    numpy = None
 
 
 log = logging.getLogger(__name__)
-log.info("Loading %s " % os.path.abspath(__file__))
+log.debug("Loading %s " % os.path.abspath(__file__))
+
+# bake pool, BVFX_WORKERS=0 uses all the cores, 1 bakes on the main thread; BVFX_POOL=process forks workers
+BVFX_WORKERS = int(os.environ.get("BVFX_WORKERS", "0") or 0)
+BVFX_POOL = os.environ.get("BVFX_POOL", "thread")
+# baked samples storage, BVFX_FLOAT32=1 halves it (the transforms already round to single precision)
+BVFX_SAMPLE_TYPECODE = 'f' if os.environ.get("BVFX_FLOAT32", "") not in ("", "0") else 'd'
+# sample cache directory size limit in MB, see SampleCache
+BVFX_CACHE_LIMIT = float(os.environ.get("BVFX_CACHE_LIMIT", "1024") or 0)
+# frames per chunk of a streamed conversion, 0 converts the whole range at once, see bvfx_stream_conversions()
+BVFX_CHUNK = int(os.environ.get("BVFX_CHUNK", "0") or 0)
+# predicted seconds over which a conversion or freeze is flagged as heavy, see bvfx_estimate()
+BVFX_HEAVY_SECONDS = float(os.environ.get("BVFX_HEAVY_SECONDS", "300") or 0)
 
 BVFX_DEFAULT_SHORTCUT = "F8"
 BVFX_DEFAULT_MENULABEL = "Freeze Splinewarp"
@@ -21,6 +48,253 @@ __date__ = "Mar 16 2025"
 __web__ = "www.boundaryvfx.com"
 
 
+# ===============================================================================
+# instrumentation
+# ===============================================================================
+class _NoPhase(object):
+    """ Context returned by a disabled Profiler, does nothing """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+class _Phase(object):
+    __slots__ = ('profiler', 'record', 'start', 'calls', 'nested')
+
+    def __init__(self, profiler, record):
+        self.profiler = profiler
+        self.record = record
+
+    def __enter__(self):
+        self.calls = dict(self.profiler.calls)
+        self.nested = 0.0
+        self.profiler._open.append(self)
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.time() - self.start
+        self.profiler._open.pop()
+        if self.profiler._open:
+            self.profiler._open[-1].nested += seconds
+        self.record["seconds"] = seconds
+        self.record["self"] = seconds - self.nested  # without the phases nested in this one
+        calls = self.profiler.calls
+        self.record["calls"] = dict((k, v - self.calls.get(k, 0)) for k, v in calls.items()
+                                    if v != self.calls.get(k, 0))
+        self.profiler._add(self.record)
+        return False
+
+
+class Profiler(object):
+    """ Records the wall time of every conversion/freeze phase, per node and per shape,
+        and counts the calls made into the heavy Nuke APIs (evaluate, addPositionKey,
+        getValueAt, nuke.tcl...)
+
+        Disabled it only costs an attribute check per phase, the call counts are added
+        in bulk by the loops (ie: once per point, not once per frame). Phases nest (ie: "sample"
+        inside "chunk"), the totals count each one without the phases inside it so they add up
+        to the wall time, the records keep both.
+
+        bvfx_profiler.start("/tmp/freezewarp.jsonl")  # the json lines file is optional
+        convert_into_splinewarp(nodes, "1-100")
+        report = bvfx_profiler.stop()  # also logged
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.jsonPath = None
+        self.reset()
+
+    def reset(self):
+        self.records = []
+        self.calls = {}
+        self._open = []  # phases being timed, innermost last
+        self.started = time.time()
+
+    def start(self, jsonPath=None):
+        """ Enables the profiler with empty records
+
+        Args:
+            jsonPath (str, optional): appends every phase record to this file as a json line
+        """
+        self.reset()
+        self.jsonPath = jsonPath
+        self.enabled = True
+        return self
+
+    def stop(self):
+        """ Disables the profiler and logs its report
+
+        Returns:
+            dict: see report()
+        """
+        self.enabled = False
+        report = self.report()
+        for line in self.format(report):
+            log.info(line)
+        return report
+
+    def phase(self, name, node=None, shape=None):
+        """ Context that times a phase
+
+        Args:
+            name (str): phase, ie: "sample", "keys", "insert"
+            node (str, optional): node name
+            shape (str, optional): shape or track name
+        """
+        if not self.enabled:
+            return _NO_PHASE
+        return _Phase(self, {"phase": name, "node": node, "shape": shape})
+
+    def count(self, api, calls=1):
+        """ Adds calls to a Nuke API counter """
+        if self.enabled and calls:
+            self.calls[api] = self.calls.get(api, 0) + calls
+
+    def _add(self, record):
+        self.records.append(record)
+        if self.jsonPath:
+            with open(self.jsonPath, "a") as handle:
+                handle.write(json.dumps(record) + "\n")
+
+    def report(self):
+        """ Returns:
+            dict: "seconds" since start, "phases" and "nodes" totals in seconds of each phase
+                without its nested ones, "inclusive" phases totals with them, "calls" per api
+                and "records", the list of every timed phase
+        """
+        phases = {}
+        inclusive = {}
+        nodes = {}
+        for record in self.records:
+            phases[record["phase"]] = phases.get(record["phase"], 0.0) + record["self"]
+            inclusive[record["phase"]] = inclusive.get(record["phase"], 0.0) + record["seconds"]
+            node = nodes.setdefault(record["node"] or "", {})
+            node[record["phase"]] = node.get(record["phase"], 0.0) + record["self"]
+        return {"seconds": time.time() - self.started, "phases": phases, "inclusive": inclusive,
+                "nodes": nodes, "calls": dict(self.calls), "records": list(self.records)}
+
+    @staticmethod
+    def format(report):
+        """ Returns: list: readable lines of a report, slowest phases first """
+        lines = ["FreezeSplinewarp profile: %.3fs" % report["seconds"]]
+        inclusive = report.get("inclusive", {})
+        for name, seconds in sorted(report["phases"].items(), key=lambda i: -i[1]):
+            total = inclusive.get(name, seconds)
+            lines.append("  %-16s %8.3fs%s" % (name, seconds,
+                                                 " (%.3fs with nested)" % total if total > seconds else ""))
+        for api, calls in sorted(report["calls"].items()):
+            lines.append("  %-16s %8d calls" % (api, calls))
+        return lines
+
+
+bvfx_profiler = Profiler()
+
+
+# ===============================================================================
+# progress
+# ===============================================================================
+class BvfxProgress(object):
+    """ Progress and cancellation shared by all the conversion loops
+
+        Loops report finished work units, the Nuke ProgressTask is only updated and polled
+        for cancellation every `interval` seconds. Nested progresses (per node, per shape)
+        are plain objects mapped into their parent units, there is a single ProgressTask
+        for the whole run and none at all without UI (batch runs).
+
+        progress = BvfxProgress("Converting", len(shapes))
+        for shape in shapes:
+            sub = progress.child(shape.name, len(shape))
+            for point in shape:
+                if sub.advance(1, "pt %s" % ...):
+                    break  # cancelled
+            progress.advance(1)
+        progress.finish()
+
+    Args:
+        title (str): task title, or name of the nested step
+        total (int, optional): work units of this step
+        parent (BvfxProgress, optional): progress this one is nested into
+        weight (int, optional): parent units this step accounts for
+    """
+    interval = 0.1  # seconds between UI updates
+
+    def __init__(self, title, total=1, parent=None, weight=1):
+        self.title = title
+        self.total = max(total, 1)
+        self.done = 0
+        self.parent = parent
+        self.weight = weight
+        if parent is None:
+            self.root = self
+            self._start = 0
+            self._cancelled = False
+            self._next = 0.0
+            self._task = nuke.ProgressTask(title) if nuke.GUI else None
+        else:
+            self.root = parent.root
+            self._start = parent.done
+
+    @property
+    def cancelled(self):
+        return self.root._cancelled
+
+    def child(self, title, total=1, weight=1):
+        """ Returns: BvfxProgress: a nested step taking `weight` units of this one """
+        return BvfxProgress(title, total, self, weight)
+
+    def fraction(self):
+        """ Returns: float: 0-1 progress of the whole run """
+        fraction = min(float(self.done) / self.total, 1.0)
+        step = self
+        while step.parent is not None:
+            fraction = min((step._start + fraction * step.weight) / float(step.parent.total), 1.0)
+            step = step.parent
+        return fraction
+
+    def advance(self, units=1, message=None):
+        """ Adds finished work units, updating the UI if the interval is over
+
+        Args:
+            units (int, optional): finished units
+            message (str, optional): shown after the step title
+
+        Returns:
+            bool: True when the user cancelled
+        """
+        self.done += units
+        root = self.root
+        if root._task is None or root._cancelled:
+            return root._cancelled
+        now = time.time()
+        if now >= root._next:
+            root._next = now + self.interval
+            root._task.setMessage(self.title + (": " + message if message else ""))
+            root._task.setProgress(int(self.fraction() * 100))
+            root._cancelled = root._task.isCancelled()
+        return root._cancelled
+
+    def isCancelled(self):
+        """ Returns: bool: True when the user cancelled, polled at most once per interval """
+        return self.advance(0)
+
+    def cancel(self):
+        self.root._cancelled = True
+
+    def finish(self):
+        """ Closes the ProgressTask, only the root progress owns one """
+        if self.parent is None:
+            self._task = None
+
+
 def addTabtoNode(node, tab):
     """ Adds a custom tab to the node, skipping if a tab with the name already exists
 
@@ -52,31 +326,144 @@ def bvfx_signature(node, text):
     node.addKnob(k)
 
 
-def bvfx_roto_walker(rotoNode, rotoList=[]):
+class CurvesIndex(object):
+    """ Index of a Roto, RotoPaint or SplineWarp3 curves hierarchy, built in a single pass
+
+        Parents, children, depth and name lookups are dictionary hits, walk() streams the
+        elements (depth first, in the hierarchy order) filtered by kind and A/B side.
+        Elements are keyed by name, which Nuke keeps unique inside a curves knob, use
+        rename() so the index follows. Build a new index after fromScript() or clone().
+
+    Args:
+        root (TYPE): a Roto, RotoPaint or SplineWarp3 node, or the layer to index from
+    """
+    SHAPE = 'shape'
+    STROKE = 'stroke'
+    LAYER = 'layer'
+
+    def __init__(self, root):
+        if hasattr(root, 'Class'):  # its the Node
+            root = root['curves'].rootLayer
+        self.root = root
+        self.elements = []  # depth first, the hierarchy order
+        self._byName = {root.name: root}
+        self._parent = {}
+        self._children = {root.name: []}
+        self._depth = {root.name: 0}
+        self._kind = {root.name: self.LAYER}
+
+        stack = [(root, iter(root), 1)]
+        while stack:
+            layer, items, depth = stack[-1]
+            for element in items:
+                kind = self.kind_of(element)
+                name = element.name
+                self.elements.append(element)
+                self._byName[name] = element
+                self._parent[name] = layer
+                self._children[layer.name].append(element)
+                self._depth[name] = depth
+                self._kind[name] = kind
+                if kind == self.LAYER:
+                    self._children[name] = []
+                    stack.append((element, iter(element), depth + 1))
+                    break
+            else:
+                stack.pop()
+
+    @classmethod
+    def kind_of(cls, element):
+        """ Returns: str: SHAPE, STROKE or LAYER """
+        if isinstance(element, (ck.Stroke, rp.Stroke)):
+            return cls.STROKE
+        if isinstance(element, (rp.Shape, sw.Shape)):
+            return cls.SHAPE
+        return cls.LAYER
+
+    def __len__(self):
+        return len(self.elements)
+
+    @staticmethod
+    def _name(element):
+        return element if isinstance(element, str) else element.name
+
+    def element(self, name):
+        return self._byName.get(name)
+
+    def kind(self, element):
+        return self._kind.get(self._name(element))
+
+    def parent(self, element):
+        """ Returns: TYPE: the layer holding the element, None for the root """
+        return self._parent.get(self._name(element))
+
+    def children(self, layer=None):
+        """ Returns: list: elements directly under the layer, the root when None """
+        return self._children.get(self._name(layer) if layer is not None else self.root.name, [])
+
+    def depth(self, element):
+        """ Returns: int: 0 for the root, 1 for its children... """
+        return self._depth.get(self._name(element))
+
+    def chain(self, element):
+        """ Generator over the parent layers of an element, up to the root """
+        parent = self.parent(element)
+        while parent is not None:
+            yield parent
+            parent = self.parent(parent)
+
+    def rename(self, element, name):
+        """ Renames an element keeping the index in sync """
+        old = element.name
+        element.name = name
+        for table in (self._byName, self._parent, self._children, self._depth, self._kind):
+            if old in table:
+                table[name] = table.pop(old)
+
+    def walk(self, kinds=None, side=None):
+        """ Generator over the elements, in the hierarchy order
+
+        Args:
+            kinds (tuple, optional): SHAPE, STROKE and/or LAYER, everything when None
+            side (float, optional): only the shapes/strokes with this "ab" attribute, 1.0 is the A side
+        """
+        for element in self.elements:
+            kind = self._kind[element.name]
+            if kinds is not None and kind not in kinds:
+                continue
+            if side is not None and (kind == self.LAYER or
+                                     element.getAttributes().getValue(0, "ab") != side):
+                continue
+            yield element
+
+    def pairs(self, kinds=None):
+        """ Generator over (element, parent layer), see walk() """
+        for element in self.walk(kinds):
+            yield element, self._parent[element.name]
+
+    def shapes(self, side=None):
+        return self.walk((self.SHAPE,), side)
+
+    def strokes(self, side=None):
+        return self.walk((self.STROKE,), side)
+
+    def layers(self):
+        return self.walk((self.LAYER,))
+
+
+def bvfx_roto_walker(rotoNode, rotoList=None):
     """ This will traverse the rotonode hierarchy tree and generate a list with the [element, parent]
         Attention: it ignores Strokes
 
     Args:
-        rotoNode (TYPE): a Roto or Rotopaint Node
-        rotoList (list, optional): the list to return
+        rotoNode (TYPE): a Roto or Rotopaint Node, or a Layer
+        rotoList (list, optional): a list to extend
 
     Returns:
         TYPE: List with [element, parent]
     """
-    try:
-        if rotoNode.Class() in ('Roto', 'RotoPaint'):  # its the Node
-            rotoRoot = rotoNode['curves'].rootLayer
-            rotoList = []  # need to restart the list otherwise it can re-use from previous runs
-
-    except:  # its a Layer
-        rotoRoot = rotoNode  # usually a layer
-
-    for _ in rotoRoot:
-        if isinstance(_, nuke.rotopaint.Shape):
-            rotoList.append((_, rotoRoot))
-        if isinstance(_, nuke.rotopaint.Layer):
-            rotoList.append((_, rotoRoot))
-            bvfx_roto_walker(_, rotoList)
+    rotoList = [] if rotoList is None else rotoList
+    rotoList.extend(CurvesIndex(rotoNode).pairs((CurvesIndex.SHAPE, CurvesIndex.LAYER)))
     return rotoList
 
 
@@ -108,722 +495,3429 @@ def bvfx_TTM(point, transf, frame):
     return vector
 
 
-def bvfx_TL(point, Layer, frame, shapeList):
+def bvfx_TL(point, Layer, frame, index):
     """ Recursively apply Layers matrix/transformations on a point until reaching the roto.root
 
     Args:
         point (TYPE): a tuple with the original x,y coordinate
         Layer (TYPE): the layer to applyt the transform from
         frame (TYPE): frame to evaluate
-        shapeList (TYPE): a bvfx_roto_walker() list
+        index (CurvesIndex): index of the roto node
 
     Returns:
         TYPE: Description
     """
     newPoint = bvfx_TTM(point, Layer.getTransform(), frame)
 
-    # its a Layer (shapeList[0][1] has always roto.root on it)
-    if not Layer == shapeList[0][1]:
-        newPoint = bvfx_TTM(point, Layer.getTransform(), frame)
-        for _ in shapeList:
-            if _[0] == Layer:
-                newPoint = bvfx_TL(
-                    newPoint, _[1], frame, shapeList)
+    parent = index.parent(Layer)
+    if parent is not None:  # its a Layer, the roto.root has no parent
+        newPoint = bvfx_TL(newPoint, parent, frame, index)
     return newPoint
 
 
-def set_inputs(node, *inputs):
-    """
-    Sets inputs of the passed node in the order of the passed input nodes.
-    The first node will become input 0 and so on
-    This code was borrowed from Julik Tarkhanov projectionist, thank you :)
+def bvfx_frame_matrices(transf, frames):
+    """ Evaluates a transform once per frame and pulls its matrix out of Nuke
+
+    Args:
+        transf (TYPE): a transform that has a matrix() method like _curvelib.AnimCTransform
+        frames (list): the frames to evaluate
+
+    Returns:
+        TYPE: (F,4,4) numpy array, or a list of 16 floats tuples per frame without numpy
     """
-    for idx, one_input in enumerate(inputs):
-        node.setInput(idx, one_input)
+    matrices = []
+    for f in frames:
+        m = transf.evaluate(f).getMatrix()
+        matrices.append(tuple(m[i] for i in range(16)))
+    bvfx_profiler.count("transform.evaluate", len(frames))
+    if numpy is not None:
+        return numpy.array(matrices, dtype=numpy.float64).reshape(-1, 4, 4)
+    return matrices
 
 
-def warp_walker(nodeRoot, shapelist=[]):
-    """ walks recursevely on the splinewarp tree and return a list of shapes and strokes
+def bvfx_TTM_batch(xs, ys, matrices):
+    """ Batched bvfx_TTM, projects all the points of a shape over all the frames at once
+        nuke.math.Vector4 holds single precision floats, the values are rounded at the
+        same steps so the results are identical to bvfx_TTM
 
     Args:
-        obj (TYPE): the root layer of a splinewarp
-        list (TYPE): a list
+        xs (TYPE): x coordinates per point per frame, (P,F)
+        ys (TYPE): y coordinates per point per frame, (P,F)
+        matrices (TYPE): bvfx_frame_matrices() result for the same F frames
 
     Returns:
-        TYPE: Description
+        TYPE: tuple with the projected (xs, ys), same layout as the input
     """
-    for i in nodeRoot:
-        if isinstance(i, sw.Shape) or isinstance(i, ck.Stroke):
-            shapelist.append(i)
-        else:
-            warp_walker(i, shapelist)
-    return shapelist
+    if numpy is not None:
+        m = numpy.asarray(matrices, dtype=numpy.float64).reshape(-1, 16)
+        px = numpy.asarray(xs, dtype=numpy.float32).astype(numpy.float64)
+        py = numpy.asarray(ys, dtype=numpy.float32).astype(numpy.float64)
+        x = (px * m[:, 0]) + (py * m[:, 1]) + m[:, 2] + m[:, 3]
+        y = (px * m[:, 4]) + (py * m[:, 5]) + m[:, 6] + m[:, 7]
+        w = ((px * m[:, 12]) + (py * m[:, 13]) + m[:, 14] + m[:, 15]).astype(numpy.float32)
+        return ((x.astype(numpy.float32) / w).astype(numpy.float64),
+                (y.astype(numpy.float32) / w).astype(numpy.float64))
+
+    outx = []
+    outy = []
+    for pxs, pys in zip(xs, ys):
+        px = array.array('f', pxs)
+        py = array.array('f', pys)
+        rx = array.array('f', px)
+        ry = array.array('f', py)
+        for i, m in enumerate(matrices):
+            x = (px[i] * m[0]) + (py[i] * m[1]) + m[2] + m[3]
+            y = (px[i] * m[4]) + (py[i] * m[5]) + m[6] + m[7]
+            v = array.array('f', (x, y, (px[i] * m[12]) + (py[i] * m[13]) + m[14] + m[15]))
+            rx[i] = v[0] / v[2]
+            ry[i] = v[1] / v[2]
+        outx.append(rx)
+        outy.append(ry)
+    return outx, outy
+
+
+def bvfx_compose_matrices(outer, inner):
+    """ Composes two bvfx_frame_matrices() results frame by frame, inner is applied first
+        bvfx_TTM works on (x, y, 1, 1) and drops z, so only the planar (3x3) part of the
+        matrices takes part in it, the result is folded back into a (F,4,4) layout
 
+    Args:
+        outer (TYPE): matrices applied last (ie: the parent layer)
+        inner (TYPE): matrices applied first (ie: the shape transform)
 
-def splinewarp_expressionLock(warpNode):
-    """ Adds an expression on the rotoshape animation, to freeze it in place on
-        the desired frame "fframe" 
-
-        It will tag rotoshapes with the [F] in the name, so in future runs 
-        it wont try to add the expression again
+    Returns:
+        TYPE: composed matrices, same layout as bvfx_frame_matrices()
+    """
+    if numpy is not None:
+        a = numpy.asarray(outer, dtype=numpy.float64).reshape(-1, 16)
+        b = numpy.asarray(inner, dtype=numpy.float64).reshape(-1, 16)
+        pa = numpy.stack([a[:, 0], a[:, 1], a[:, 2] + a[:, 3],
+                          a[:, 4], a[:, 5], a[:, 6] + a[:, 7],
+                          a[:, 12], a[:, 13], a[:, 14] + a[:, 15]], axis=1).reshape(-1, 3, 3)
+        pb = numpy.stack([b[:, 0], b[:, 1], b[:, 2] + b[:, 3],
+                          b[:, 4], b[:, 5], b[:, 6] + b[:, 7],
+                          b[:, 12], b[:, 13], b[:, 14] + b[:, 15]], axis=1).reshape(-1, 3, 3)
+        p = numpy.matmul(pa, pb).reshape(-1, 9)
+        m = numpy.zeros((len(p), 16))
+        m[:, [0, 1, 2, 4, 5, 6, 12, 13, 14]] = p
+        m[:, 10] = 1.0
+        return m.reshape(-1, 4, 4)
+
+    matrices = []
+    for a, b in zip(outer, inner):
+        pa = (a[0], a[1], a[2] + a[3], a[4], a[5], a[6] + a[7], a[12], a[13], a[14] + a[15])
+        pb = (b[0], b[1], b[2] + b[3], b[4], b[5], b[6] + b[7], b[12], b[13], b[14] + b[15])
+        p = [sum(pa[r * 3 + k] * pb[k * 3 + c] for k in range(3)) for r in range(3) for c in range(3)]
+        matrices.append((p[0], p[1], p[2], 0.0, p[3], p[4], p[5], 0.0,
+                         0.0, 0.0, 1.0, 0.0, p[6], p[7], p[8], 0.0))
+    return matrices
+
+
+class TransformCache(object):
+    """ Per frame matrices of the Layers of a roto node, composed all the way up to the roto.root
+
+        Each Layer transform is evaluated once per frame and its chain is composed once,
+        shapes under the same Layer share the result.
 
     Args:
-        warpNode (node): splinewarp3 node
+        index (CurvesIndex): index of the roto node
+        frames (list): the frames to evaluate
     """
-    curves = warpNode['curves']
-    nodeRoot = curves.rootLayer
-    shapelist = warp_walker(nodeRoot, [])
-
-    for shape in shapelist:
-        shapeattr = shape.getAttributes()
-        # task.setMessage('Setting expressions on' + shape.name)
-        if shapeattr.getValue(0, "ab") == 1.0:
-            if shape.name.count("[F]") <= 0:
-                shape.name = shape.name + "_[F]"
-            if isinstance(shape, ck.Stroke):
-                for point in shape:
-                    newcurve = point.getPositionAnimCurve(0)
-                    newcurve.useExpression = True
-                    newcurve.expressionString = "curve([value fframe])"
-                    newcurve = point.getPositionAnimCurve(1)
-                    newcurve.useExpression = True
-                    newcurve.expressionString = "curve([value fframe])"
-            if isinstance(shape, sw.Shape):
-                for point in shape:
-                    newcurve = point.center.getPositionAnimCurve(0)
-                    newcurve.useExpression = True
-                    newcurve.expressionString = "curve([value fframe])"
-                    newcurve = point.center.getPositionAnimCurve(1)
-                    newcurve.useExpression = True
-                    newcurve.expressionString = "curve([value fframe])"
-
-    curves.changed()
-
-
-def splinewarp_checkAB(warpNode):
-    """ Given a splinewarp node check if there are shapes on both splinewarp sides (A/B)
-        If shapes are only on one side: duplicate and join shapes
-
-    Args:
-        splinewarpNode (node): Description
-
-    """
-    a = 0
-    b = 0
-
-    curves = warpNode['curves']
-    nodeRoot = curves.rootLayer
-    shapelist = warp_walker(nodeRoot, [])
-
-    # checks if shapes are only in one side A or B
-
-    for shape in shapelist:
-        shapeattr = shape.getAttributes()
-        abvalue = shapeattr.getValue(0, "ab")
-
-        if abvalue == 1.0:
-            a += 1
-        elif abvalue == 2.0:
-            b += 1
-        if a > 0 and b > 0:
-            break
-
-    if not (a > 0 and b > 0):  # one side is not present
-        pairs = []
-        for shape in shapelist:
-            new = shape.clone()
-            new.name = shape.name + "_clone"
-            shapeattr = new.getAttributes()
-            abvalue = shapeattr.set("ab", 2.0)
-            pairs.append([shape.name, new.name])
 
-        currentnode = warpNode['curves'].toScript()
-        linksplinescode = " {cp x41980000 x41980000 0 0 1 {{{{1 1}} {{1 1}}} {{{1 x40b80000}} {{1 x40b80000}}} {{{1 x41280001}} {{1 x41280001}}} {{{1 x41740001}} {{1 x41740001}}}}} {a}}"
-        edges = ""
-        for pair in pairs:
-            edges += "{edge " + pair[0] + " " + pair[1] + linksplinescode
+    def __init__(self, index, frames):
+        self.frames = list(frames)
+        self.index = index
+        self._layers = {}
+
+    def layer_matrices(self, layer, frames=None):
+        """ Matrices that take a point from the layer space to the roto.root space
+
+        Args:
+            layer (TYPE): a Layer of the roto node
+            frames (list, optional): a subset of the frames to evaluate (ie: a smart bake), all when None
+
+        Returns:
+            TYPE: same layout as bvfx_frame_matrices()
+        """
+        key = (layer.name, None if frames is None else tuple(frames))
+        matrices = self._layers.get(key)
+        if matrices is None:
+            matrices = bvfx_frame_matrices(layer.getTransform(), self.frames if frames is None else frames)
+            parent = self.index.parent(layer)
+            if parent is not None:
+                matrices = bvfx_compose_matrices(self.layer_matrices(parent, frames), matrices)
+            self._layers[key] = matrices
+        return matrices
+
+    def shape_matrices(self, shape, layer, frames=None):
+        """ Matrices that take the shape points to the roto.root space, shape transform included
+
+        Args:
+            shape (TYPE): a roto Shape
+            layer (TYPE): the Layer holding the shape
+            frames (list, optional): see layer_matrices()
+
+        Returns:
+            TYPE: same layout as bvfx_frame_matrices()
+        """
+        return bvfx_compose_matrices(self.layer_matrices(layer, frames),
+                                     bvfx_frame_matrices(shape.getTransform(), self.frames if frames is None else frames))
+
+
+# interpolation of the reduced keys, None where the curve API doesn't expose it (see bvfx_linear_keys())
+BVFX_LINEAR_INTERPOLATION = getattr(ck, 'kLinearInterpolation', None)
+# default interpolation of the curves and knobs keys, the only one a smart bake reproduces (see bvfx_smart_frames())
+BVFX_SMOOTH_INTERPOLATION = getattr(ck, 'kSmoothInterpolation', None)
+BVFX_SMOOTH_KNOB_INTERPOLATION = getattr(nuke, 'SMOOTH', None)
+
+
+def bvfx_reduce_keys(frames, xs, ys, tolerance=0.0):
+    """ Picks the baked keyframes worth keeping, in a single pass over the samples
+        tolerance 0 only drops keyframes that repeat both neighbours,
+        above 0 its a Ramer-Douglas-Peucker simplification of x/y over time that keeps
+        the linear interpolation between kept keys within tolerance pixels of every sample
 
-        newscript = currentnode[:-1]+edges+"}}"
-        warpNode['curves'].fromScript(newscript)
+    Args:
+        frames (list): sampled frames
+        xs (TYPE): x coordinate per frame
+        ys (TYPE): y coordinate per frame
+        tolerance (float, optional): allowed pixel distance
 
+    Returns:
+        list: indexes of the keyframes to keep, first and last are always kept
+    """
+    n = len(frames)
+    if n <= 2:
+        return list(range(n))
+
+    if tolerance <= 0:
+        keep = [0]
+        for i in range(1, n - 1):
+            if not (xs[i - 1] == xs[i] == xs[i + 1] and ys[i - 1] == ys[i] == ys[i + 1]):
+                keep.append(i)
+        keep.append(n - 1)
+        return keep
+
+    tolerance2 = tolerance * tolerance
+    kept = [False] * n
+    kept[0] = kept[n - 1] = True
+    if numpy is not None:
+        t = numpy.asarray(frames, dtype=numpy.float64)
+        x = numpy.asarray(xs, dtype=numpy.float64)
+        y = numpy.asarray(ys, dtype=numpy.float64)
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        if numpy is not None:
+            u = (t[first + 1:last] - t[first]) / (t[last] - t[first])
+            dx = x[first + 1:last] - (x[first] + (x[last] - x[first]) * u)
+            dy = y[first + 1:last] - (y[first] + (y[last] - y[first]) * u)
+            errors = dx * dx + dy * dy
+            index = int(numpy.argmax(errors))
+            error = errors[index]
+            index += first + 1
+        else:
+            error = -1.0
+            span = float(frames[last] - frames[first])
+            for i in range(first + 1, last):
+                u = (frames[i] - frames[first]) / span
+                dx = xs[i] - (xs[first] + (xs[last] - xs[first]) * u)
+                dy = ys[i] - (ys[first] + (ys[last] - ys[first]) * u)
+                if dx * dx + dy * dy > error:
+                    error = dx * dx + dy * dy
+                    index = i
+        if error > tolerance2:
+            kept[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [i for i in range(n) if kept[i]]
+
+
+def bvfx_commit_keys(controlPoint, frames, xs, ys, keep=None, span=False, tolerance=0.0):
+    """ Replaces the position keyframes of a control point with the surviving baked keyframes
+        in a single write pass, keys outside the baked frames are dropped.
+        When keyframes were dropped with a tolerance the kept ones are set to linear interpolation,
+        the one bvfx_reduce_keys() measures it against, and when the curves can't be set to it they
+        are checked against the samples instead, see bvfx_check_keys(). A tolerance of 0 keeps the
+        curves interpolation, the held frames it overshoots are keyed back by that check.
 
-def freezewarp(nodeList):
-    """ Will take a SplineWarpNode and appply the freeze expressions on it
-        Shapes should be preferably baked and without Layer transforsms
+    Args:
+        controlPoint (TYPE): an AnimControlPoint (ie: ShapeControlPoint.center)
+        frames (list): sampled frames
+        xs (TYPE): x coordinate per frame
+        ys (TYPE): y coordinate per frame
+        keep (list, optional): bvfx_reduce_keys() result, all frames when None
+        span (bool, optional): only replace the keys between the first and last baked frames,
+            ie: the next chunk of a streamed conversion
+        tolerance (float, optional): the tolerance keep was reduced with
+    """
+    for axis in (0, 1):
+        curve = controlPoint.getPositionAnimCurve(axis)
+        if not span:
+            curve.removeAllKeys()
+            continue
+        times = [curve.getKey(i).time for i in range(curve.getNumberOfKeys())]
+        for t in times:
+            if frames[0] <= t <= frames[-1]:
+                curve.removeKey(t)
+    reduced = keep is not None and len(keep) < len(frames)
+    keep = range(len(frames)) if keep is None else keep
+    for i in keep:
+        controlPoint.addPositionKey(frames[i], (xs[i], ys[i]))
+    bvfx_profiler.count("addPositionKey", len(keep))
+    if reduced and (tolerance <= 0 or not bvfx_linear_keys(controlPoint, frames[0], frames[-1])):
+        bvfx_check_keys(controlPoint, frames, xs, ys, tolerance)
+
+
+def bvfx_linear_keys(controlPoint, first, last):
+    """ Sets the position keys of a control point between two frames to linear interpolation
 
     Args:
-        nodeList (list): list of nodes
+        controlPoint (TYPE): an AnimControlPoint
+        first (int): first frame
+        last (int): last frame
 
+    Returns:
+        bool: True when every key reads back as linear
     """
-    for _ in nodeList:
-        if _.Class() not in ('SplineWarp3'):
-            raise TypeError('Unsupported node type. Node must be SplineWarp')
+    if BVFX_LINEAR_INTERPOLATION is None:
+        return False
+    linear = True
+    for axis in (0, 1):
+        curve = controlPoint.getPositionAnimCurve(axis)
+        for i in range(curve.getNumberOfKeys()):
+            key = curve.getKey(i)
+            if first <= key.time <= last:
+                try:
+                    key.interpolationType = BVFX_LINEAR_INTERPOLATION
+                except (AttributeError, TypeError):
+                    return False
+                linear = linear and curve.getKey(i).interpolationType == BVFX_LINEAR_INTERPOLATION
+    return linear
+
+
+def bvfx_check_keys(controlPoint, frames, xs, ys, tolerance=0.0):
+    """ Evaluates the committed position curves on every sampled frame and keys back the
+        frames further than tolerance from their samples, until none is
 
-    # ===========================================================================
-    # panel setup
-    # ===========================================================================
-    p = nukescripts.panels.PythonPanel("Freeze SplineWarp")
-    k = nuke.Int_Knob("freezeframe", "Freezeframe")
-    k.setFlag(nuke.STARTLINE)
-    k.setTooltip("Set the frame to freeze the shapes positions")
-    p.addKnob(k)
-    k.setValue(nuke.frame())
-    k = nuke.Boolean_Knob("fh", "Create FrameHold")
-    k.setFlag(nuke.STARTLINE)
-    k.setTooltip(
-        "This will create a Framehold Node and set it to the Freezeframe value, if you use expressions mode it will be linked")
-    p.addKnob(k)
-    k.setValue(True)
-    k = nuke.Boolean_Knob("stb", "Stabilize Setup")
-    k.setFlag(nuke.STARTLINE)
-    k.setTooltip("This will create a handy warp stabilization setup")
-    p.addKnob(k)
-    k = nuke.Boolean_Knob("ptns", "Paint Setup")
-    k.setFlag(nuke.STARTLINE)
-    k.setTooltip("This will create a handy paint setup")
-    p.addKnob(k)
+    Args:
+        controlPoint (TYPE): an AnimControlPoint
+        frames (list): sampled frames
+        xs (TYPE): x coordinate per frame
+        ys (TYPE): y coordinate per frame
+        tolerance (float, optional): allowed pixel distance
 
-    if sys.platform.startswith('win'):
-        k.setVisible(False)
-        k.setEnabled(False) #windows have a clipboard bug that wont allow copy the node
-    k.setValue(False)
-    # ===========================================================================
+    Returns:
+        int: the number of keyframes added
+    """
+    curvex = controlPoint.getPositionAnimCurve(0)
+    curvey = controlPoint.getPositionAnimCurve(1)
+    tolerance2 = tolerance * tolerance + 1e-6
+    added = 0
+    while True:
+        keyed = set(curvex.getKey(i).time for i in range(curvex.getNumberOfKeys()))
+        worst = {}  # the worst frame between each pair of keys
+        segment = 0
+        for i, f in enumerate(frames):
+            if f in keyed:
+                segment = f
+                continue
+            dx = curvex.evaluate(f) - xs[i]
+            dy = curvey.evaluate(f) - ys[i]
+            error = dx * dx + dy * dy
+            if error > tolerance2 and error > worst.get(segment, (0, -1.0))[1]:
+                worst[segment] = (i, error)
+        bvfx_profiler.count("evaluate", 2 * (len(frames) - len(keyed)))
+        if not worst:
+            return added
+        for i, error in worst.values():
+            controlPoint.addPositionKey(frames[i], (xs[i], ys[i]))
+        bvfx_profiler.count("addPositionKey", len(worst))
+        added += len(worst)
+
+
+# ===============================================================================
+# smart bake: sample only where the sources change
+# ===============================================================================
+def bvfx_transform_curves(transf):
+    """ Returns: list: all the AnimCurves of an AnimCTransform, extra matrix included """
+    curves = [transf.getTranslationAnimCurve(0), transf.getTranslationAnimCurve(1),
+              transf.getRotationAnimCurve(2), transf.getScaleAnimCurve(0), transf.getScaleAnimCurve(1),
+              transf.getPivotPointAnimCurve(0), transf.getPivotPointAnimCurve(1),
+              transf.getSkewXAnimCurve(), transf.getSkewYAnimCurve()]
+    return curves + [transf.getExtraMatrixAnimCurve(r, c) for r in range(4) for c in range(4)]
+
+
+def bvfx_curve_keytimes(curve):
+    """ Returns: list: the key times of an AnimCurve, None when it runs an expression """
+    if curve.useExpression:
+        return None
+    return [curve.getKey(i).time for i in range(curve.getNumberOfKeys())]
+
+
+def bvfx_curve_smooth(curve):
+    """ Returns: bool: True when every key of an AnimCurve has the default smooth interpolation
+        and automatic slopes, the way the baked keys interpolate """
+    for i in range(curve.getNumberOfKeys()):
+        if getattr(curve.getKey(i), 'interpolationType', BVFX_SMOOTH_INTERPOLATION) != BVFX_SMOOTH_INTERPOLATION:
+            return False
+    return True
+
+
+def bvfx_knob_keys_smooth(keys):
+    """ Returns: bool: True when every nuke.AnimationKey has the default smooth interpolation, see bvfx_curve_smooth() """
+    return all(getattr(k, 'interpolation', BVFX_SMOOTH_KNOB_INTERPOLATION) == BVFX_SMOOTH_KNOB_INTERPOLATION
+               for k in keys)
+
+
+def bvfx_keys_straddle(times, first, last):
+    """ Returns: bool: True when a range endpoint falls inside the span of the key times (sorted),
+        the source then interpolates there with keys outside the range and their slopes, which
+        the keys baked inside the range can't reproduce """
+    return bool(times) and (times[0] < first < times[-1] or times[0] < last < times[-1])
+
+
+def bvfx_smart_frames(frames, curves, animated=()):
+    """ Picks the frames a smart bake samples: the key times of the curves and the range endpoints.
+        Keys baked on the source key times are interpolated by the SplineWarp the way the source
+        interpolates them, as long as nothing animated sits on top, so the frames in between the
+        keys of the `animated` curves (ie: the shape and layer transforms) are all sampled.
+        Any curve driven by an expression, or with keys other than smooth ones (constant, linear,
+        user slopes...) samples every frame: the baked keys only interpolate the default way.
+        So does a curve keyed across a range endpoint (see bvfx_keys_straddle()): the slopes of
+        its keys depend on their neighbours, the ones outside the range are not baked.
 
-    result = p.showModalDialog()
+    Args:
+        frames (list): the frames of the conversion range
+        curves (list): AnimCurves reproduced by the baked keys (ie: point positions)
+        animated (list): AnimCurves applied on top of them (ie: transforms)
 
-    if result == 0:  # Cancelled
-        return
+    Returns:
+        list: the frames to sample, a sorted subset of frames
+    """
+    frameset = set(frames)
+    times = set((frames[0], frames[-1]))
+    for curve, isAnimated in [(c, False) for c in curves] + [(c, True) for c in animated]:
+        keys = bvfx_curve_keytimes(curve)
+        if keys is None or not (isAnimated or bvfx_curve_smooth(curve)):
+            return list(frames)
+        if not isAnimated and bvfx_keys_straddle(keys, frames[0], frames[-1]):
+            return list(frames)
+        for t in keys:
+            times.update((int(math.floor(t)), int(math.ceil(t))))  # keys between frames
+        if isAnimated and len(keys) > 1:
+            times.update(range(int(math.floor(keys[0])), int(math.ceil(keys[-1])) + 1))
+    return sorted(times & frameset)
+
+
+def bvfx_smart_fallback(frames, smartFrames, matrices):
+    """ Frames a smart bake misses where a static transform mixes x and y (rotation, skew or
+        perspective), the x/y curves interpolation can't be reproduced after that kind of transform
 
-    freezeFrame = p.knobs()["freezeframe"].value()
-    # dont put strings in there, nuke will crash
-    freezeFrame = freezeFrame if isinstance(freezeFrame, int) else nuke.frame()
+    Args:
+        frames (list): the frames of the conversion range
+        smartFrames (list): bvfx_smart_frames() result
+        matrices (TYPE): the transforms at smartFrames, see bvfx_frame_matrices()
 
-    fh = p.knobs()["fh"].value()
-    stb = p.knobs()["stb"].value()
-    ptns = p.knobs()["ptns"].value()
+    Returns:
+        list: the frames to add, empty when the smart frames are enough
+    """
+    if numpy is not None:
+        matrices = numpy.asarray(matrices).reshape(-1, 16).tolist()
+    position = dict((f, i) for i, f in enumerate(frames))
+    extra = []
+    for i in range(len(smartFrames) - 1):
+        m = matrices[i]
+        first, last = position[smartFrames[i]], position[smartFrames[i + 1]]
+        if last - first > 1 and (m[1] or m[4] or m[12] or m[13]):
+            extra.extend(frames[first + 1:last])
+    return extra
 
-    # holds all nodes for selection at end of script
-    nodeSelection = nodeList[:]
-    # =======================================================================
-    # add freeze tab / expressions to freeze
-    # =======================================================================
-    for warpNode in nodeList:
-        splinewarp_checkAB(warpNode)
-        addTabtoNode(warpNode, 'FreezeFrame')
-        knob_names = [knob.name() for knob in warpNode.allKnobs()]
-        if 'fframe' not in knob_names:
-            ff = nuke.Int_Knob('fframe', "Freeze Frame")
-            warpNode.addKnob(ff)
 
-            pbutton = nuke.PyScript_Knob(
-                'pybutton', 'This Frame', 'nuke.thisNode()["fframe"].setValue(nuke.frame())')
-            warpNode.addKnob(pbutton)
+def set_inputs(node, *inputs):
+    """
+    Sets inputs of the passed node in the order of the passed input nodes.
+    The first node will become input 0 and so on
+    This code was borrowed from Julik Tarkhanov projectionist, thank you :)
+    """
+    for idx, one_input in enumerate(inputs):
+        node.setInput(idx, one_input)
 
-            pb2code = '''origmix = nuke.thisNode()["mix"].getValue()\nnuke.thisNode()["mix"].setValue(nuke.thisNode()["root_warp"].getValue())\nnuke.thisNode()["root_warp"].setValue(origmix)\na_input = nuke.thisNode().input(0)\nb_input = nuke.thisNode().input(1)\nnuke.thisNode().setInput(1,a_input)\nnuke.thisNode().setInput(0,b_input)'''
-            pbutton2 = nuke.PyScript_Knob(
-                'pybutton2', 'Swap mix/rootwarp', pb2code)
-            warpNode.addKnob(pbutton2)
 
-            bvfx_signature(
-                warpNode, "FreezeSplinewarp v%s created %s - updated %s" % (__version__, __creation__, __date__))
-            warpNode['fframe'].setValue(freezeFrame)
+_KNOB_SCRIPT_QUOTES = re.compile(r'\\.|["{}]', re.S)
 
-        splinewarp_expressionLock(warpNode)
 
-        label = '''FreezeF: [value fframe]\n[if {[value mix]==0 && [value root_warp]==1} {return "matchmove"} {return "stabilization"}]'''
-        warpNode.knob('label').setValue(label)
-        warpNode.knob('filter').setValue(
-            'Mitchell')  # less smoother than cubic
+def bvfx_script_without(text, knobs):
+    """ Removes the statements of some knobs from a knobs script (see Node.writeKnobs()), only
+        the top level ones: a line of a {} or "" quoted value spanning several lines (curves,
+        scripts, labels) is left alone. The quoting is only scanned up to the last line starting
+        with one of the knob names, usually the first lines of the script.
 
-        # ===========================================================================
-        # framehold creation
-        # ===========================================================================
+    Args:
+        text (str): knobs script
+        knobs (tuple): knob names with a single line value, ie: name, selected
 
-        if fh or stb or ptns:
-            framehold = nuke.nodes.FrameHold()
+    Returns:
+        str: the script without them
+    """
+    depth, quoted, scanned, kept = 0, False, 0, 0
+    pieces = []
+    for match in re.finditer(r'^(?:%s) ' % "|".join(re.escape(k) for k in knobs), text, re.M):
+        for token in _KNOB_SCRIPT_QUOTES.finditer(text, scanned, match.start()):
+            c = token.group()
+            if c == '"':
+                if not depth:
+                    quoted = not quoted
+            elif quoted or len(c) > 1:
+                continue
+            elif c == "{":
+                depth += 1
+            else:
+                depth = max(depth - 1, 0)
+        scanned = match.start()
+        if depth or quoted:
+            continue
+        end = text.find("\n", match.start())
+        end = len(text) if end < 0 else end + 1
+        pieces.append(text[kept:match.start()])
+        kept = scanned = end
+    pieces.append(text[kept:])
+    return "".join(pieces)
+
+
+class NodeCopier(object):
+    """ Duplicates a node in memory, without nukescripts.node_copypaste() and the clipboard:
+        the node knobs (curves included) are serialized once and every copy reads them back
 
-            framehold["first_frame"].setExpression(warpNode.name() + ".fframe")
-            # =======================================================================
-            # some layout beautyfication
-            # =======================================================================
-            framehold["xpos"].setValue(warpNode["xpos"].getValue() - 100)
-            framehold["ypos"].setValue(warpNode["ypos"].getValue() - 80)
-            dot = nuke.nodes.Dot()
+    Args:
+        node (node): the node to duplicate, copies get its knobs, position and inputs
+    """
+    _SKIP = ("name", "selected")  # the copies keep their own
+
+    def __init__(self, node):
+        self.node = node
+        self._script = None
+
+    @property
+    def script(self):
+        """ str: the node knobs script, written on first use """
+        if self._script is None:
+            script = self.node.writeKnobs(nuke.WRITE_USER_KNOB_DEFS | nuke.WRITE_NON_DEFAULT_ONLY | nuke.TO_SCRIPT)
+            bvfx_profiler.count("writeKnobs")
+            self._script = bvfx_script_without(script, self._SKIP)
+        return self._script
+
+    def copy(self):
+        """ Returns: node: a new, unselected node with the same knobs and inputs """
+        node = getattr(nuke.nodes, self.node.Class())()
+        node.readKnobs(self.script)
+        bvfx_profiler.count("readKnobs")
+        for i in range(self.node.inputs()):
+            node.setInput(i, self.node.input(i))
+        node.knob('selected').setValue(False)
+        return node
+
+
+def warp_walker(nodeRoot, shapelist=None):
+    """ walks the splinewarp tree and return a list of shapes and strokes
 
-            dot["xpos"].setValue(warpNode["xpos"].getValue()+34)
-            dot["ypos"].setValue(framehold["ypos"].getValue()+7)
-            dot2 = nuke.nodes.Dot()
-            dot2["xpos"].setValue(warpNode["xpos"].getValue() - 150)
-            dot2["ypos"].setValue(warpNode["ypos"].getValue()+84)
-            sc = nuke.nodes.ShuffleCopy()
-
-            sc["xpos"].setValue(warpNode["xpos"].getValue())
-            sc["ypos"].setValue(warpNode["ypos"].getValue()+80)
-            premult = nuke.nodes.Premult()
-            premult["ypos"].setValue(sc["ypos"].getValue()+80)
-            set_inputs(warpNode, dot)
-            set_inputs(dot, framehold)
-            set_inputs(sc, warpNode, dot2)
-            set_inputs(premult, sc)
+    Args:
+        nodeRoot (TYPE): the root layer of a splinewarp
+        shapelist (list, optional): a list to extend
+
+    Returns:
+        TYPE: Description
+    """
+    shapelist = [] if shapelist is None else shapelist
+    shapelist.extend(CurvesIndex(nodeRoot).walk((CurvesIndex.SHAPE, CurvesIndex.STROKE)))
+    return shapelist
 
-            dot_main = framehold
-            # set_inputs(dot, framehold)
-            nodeSelection += [dot, dot2, sc, framehold, premult]
-            # nodeSelection.append(dot)
 
-        # =======================================================================
-        # stabilization setup
-        # =======================================================================
-        for _ in nuke.selectedNodes():
-            _.knob('selected').setValue(False)
-        warpNode.knob('selected').setValue(True)
+FREEZE_EXPRESSION = "curve([value fframe])"
+VARIANT_SPACING = 400  # node graph distance between freeze frame variants
+HELD_FRAME_EXPRESSION = "[value input.first_frame]"  # fframe of cloned variants: the frame of the FrameHold feeding each clone
+HELD_FRAME_BUTTON = 'nuke.thisNode().input(0)["first_frame"].setValue(nuke.frame())'
+FREEZE_MODES = ('expression', 'static')
+FREEZE_CALLBACK = """if nuke.thisKnob().name() in ('fframe', 'fmode'):
+    import bvfx_freezesplinewarp
+    bvfx_freezesplinewarp.splinewarp_freezeRefresh(nuke.thisNode())"""
 
-        if stb:
-            try:
-                nukescripts.node_copypaste()
-                b_input = nuke.selectedNode()
-                if nuke.env['indie'] or nuke.env['nc']:
-                    nuke.show(b_input) #workaround copypaste nc bug
-                nukescripts.node_copypaste()
-                a_input = nuke.selectedNode()
-
-                if nuke.env['indie'] or nuke.env['nc']:
-                    nuke.show(b_input) #workaround copypaste nc bug
-                nuke.show(a_input)
-
-                b_input["mix"].setValue(1)
-                dot = nuke.nodes.Dot()
-                set_inputs(a_input, b_input)
-                set_inputs(b_input, dot)
-                nukescripts.swapAB(b_input)
-                dot["xpos"].setValue(warpNode["xpos"].getValue()+169)
-                dot["ypos"].setValue(warpNode["ypos"].getValue()+11)
-                b_input["xpos"].setValue(warpNode["xpos"].getValue()+135)
-                b_input["ypos"].setValue(dot["ypos"].getValue()+80)
-                a_input["xpos"].setValue(warpNode["xpos"].getValue()+135)
-                a_input["ypos"].setValue(dot["ypos"].getValue()+160)
-                # =======================================================================
-                # workaround.... if node is not show on properties tab the "root warp" attribute will not change!
-                # =======================================================================
-                b_input.knob('selected').setValue(True)
-                nuke.show(nuke.selectedNode())
-                nuke.selectedNode()["root_warp"].setValue(0)
-                a_input["fframe"].setExpression(b_input.name() + ".fframe")
-                
-                nodeSelection += [dot, b_input, a_input]
-            except Exception:
-                raise Exception(
-                    "Stabilization Setup Failed, very likely a Windows/Clipboard bug\nRun the script without Stabilize")
-
-        if ptns:
-            try:
-                nukescripts.node_copypaste()
-                b_input = nuke.selectedNode()
-                b_input["mix"].setValue(1)
-                dot = nuke.nodes.Dot()
-                rpstb = nuke.createNode('RotoPaint')
-                set_inputs(b_input,dot)
-                set_inputs(rpstb, dot)
-                set_inputs(dot_main, rpstb)
-                rpstb.setInput(2, b_input)
-                nukescripts.swapAB(b_input)
-                dot["xpos"].setValue(dot_main["xpos"].getValue()+35)
-                dot["ypos"].setValue(dot_main["ypos"].getValue()+11-150)
-                rpstb["xpos"].setValue(dot_main["xpos"].getValue())
-                rpstb["ypos"].setValue(dot_main["ypos"].getValue()+80-150)
-                b_input["xpos"].setValue(dot_main["xpos"].getValue()+125)
-                b_input["ypos"].setValue(dot_main["ypos"].getValue()+55-150)
-                # =======================================================================
-                # workaround.... if node is not show on properties tab the "root warp" attribute will not change!
-                # =======================================================================
-                b_input.knob('selected').setValue(True)
-                nuke.show(nuke.selectedNode())
-                nuke.selectedNode()["root_warp"].setValue(0)
-                b_input["fframe"].setExpression(warpNode.name() + ".fframe")
-                nodeSelection += [dot, b_input, rpstb]
-
-            except Exception:
-                raise Exception(
-                    "Stabilization Setup Failed, very likely a Windows/Clipboard bug\nRun the script without Stabilize")
 
+FREEZE_STATE = "bvfx_freeze"  # shape attribute: 0 not frozen, else FREEZE_MODES index + 1
+FREEZE_FRAME = "bvfx_fframe"  # shape attribute: frame baked by the static freeze
+STATIC_KNOB = "bvfx_static"  # hidden knob: the animation under the static freeze, see splinewarp_lock()
 
 
-    for _ in nodeSelection:
-        _.knob('selected').setValue(True)
+def _bvfx_attribute(shape, name):
+    try:
+        return shape.getAttributes().getValue(0, name)
+    except Exception:  # not set on this shape
+        return 0.0
 
 
-def convert_trackernodes(trackNode, warpNode, fRange, fullbake=False):
-    """ Convert Trackers into Pins (single point roto points) into a a Splinewarp node
-        works with both Tracker3 or Track4 classes
-    Args:
-        rotoNode (TYPE): origin Tracker node
-        warpNode (TYPE): destination SplineWarp node
-        fRange (TYPE): framerange to convert
-    """
-    warpCurve = warpNode['curves']
-    warpRoot = warpNode['curves'].rootLayer
-    # NEED to create on a roto node, otherwise the AB attribute thing wont work
-    tempRotoNode = nuke.createNode('Roto')
-    rotoCurve = tempRotoNode['curves']
+def _bvfx_set_attribute(shape, name, value):
+    attributes = shape.getAttributes()
+    try:
+        attributes.set(name, value)
+    except Exception:  # not set on this shape yet
+        attributes.add(name, value)
 
-    if trackNode.Class() == "Tracker3":
 
-        # ---------------------------------------------------------- #
-        task = nuke.ProgressTask(
-            'Converting %s to Splinewarp' % trackNode.name())
-        taskcount = 1
-        # ---------------------------------------------------------- #
+def _bvfx_shape_curves(shape, index):
+    """ Generator over the position animcurves of a shape or stroke points """
+    if index.kind(shape) == CurvesIndex.STROKE:
+        for point in shape:
+            yield point.getPositionAnimCurve(0)
+            yield point.getPositionAnimCurve(1)
+    else:
+        for point in shape:
+            yield point.center.getPositionAnimCurve(0)
+            yield point.center.getPositionAnimCurve(1)
+
+
+# the AnimCtrlPoint members a static freeze keeps to restore the keys, interpolationType first,
+# setting it can reset the slopes
+BVFX_KEY_MEMBERS = ('interpolationType', 'leftSlope', 'rightSlope', 'extrapolationType')
+# keys with slopes set by hand, the other interpolations work their slopes out from the keys around
+BVFX_USER_SLOPES = tuple(t for t in (getattr(ck, 'kUserInterpolation', None), getattr(ck, 'kBreakInterpolation', None))
+                         if t is not None)
+
+
+def _bvfx_curve_keys(curve):
+    """ Returns: list: the expression (None without one) and the keys of an animcurve as
+        [time, value, interpolation, left slope, right slope, extrapolation] """
+    keys = []
+    for i in range(curve.getNumberOfKeys()):
+        key = curve.getKey(i)
+        keys.append([key.time, key.value] + [getattr(key, member, None) for member in BVFX_KEY_MEMBERS])
+    expression = curve.expressionString if curve.useExpression else None
+    return [None if expression == FREEZE_EXPRESSION else expression, keys]
+
+
+def _bvfx_set_curve_keys(curve, state):
+    """ Puts back on an animcurve the _bvfx_curve_keys() state, states stored without the
+        slopes (time, value and interpolation only) keep the automatic ones """
+    expression, keys = state
+    curve.useExpression = False
+    curve.removeAllKeys()
+    for key in keys:
+        curve.addKey(key[0], key[1])
+    for i, key in enumerate(keys):
+        point = curve.getKey(i)
+        for member, value in zip(BVFX_KEY_MEMBERS, key[2:]):
+            if value is None or (member.endswith('Slope') and key[2] not in BVFX_USER_SLOPES):
+                continue
+            setattr(point, member, value)
+    if expression is not None:
+        curve.expressionString = expression
+        curve.useExpression = True
+
+
+def bvfx_read_static(warpNode):
+    """ Returns: dict: shape name -> _bvfx_curve_keys() per curve of the static frozen shapes """
+    knob = warpNode.knob(STATIC_KNOB)
+    if knob is None or not knob.value():
+        return {}
+    try:
+        return json.loads(knob.value())
+    except ValueError:
+        log.warning("%s: unreadable %s knob, the static freeze can't be undone" % (warpNode.name(), STATIC_KNOB))
+        return {}
 
-        for _ in range(1, 5):
-            if trackNode["enable"+str(_)].getValue():
-                # ---------------------------------------------------------- #
-                task.setMessage('Converting tracker ' + str(_))
-                if task.isCancelled():
-                    break
-                # ---------------------------------------------------------- #
 
-                newPointShape = rp.Shape(rotoCurve, type="bspline")
-                newPoint = rp.ShapeControlPoint(0, 0)
-                newPointShape.name = trackNode.name() + "_track" + str(_)
-                for f in fRange:
-                    newPoint.center.addPositionKey(
-                        f, trackNode["track"+str(_)].getValueAt(f))
+def bvfx_write_static(warpNode, stored):
+    """ Stores the animation under the static freeze on a hidden knob of the warp node """
+    knob = warpNode.knob(STATIC_KNOB)
+    if knob is None:
+        if not stored:
+            return
+        knob = nuke.String_Knob(STATIC_KNOB, '')
+        knob.setFlag(nuke.INVISIBLE)
+        warpNode.addKnob(knob)
+    knob.setValue(json.dumps(stored, sort_keys=True) if stored else '')
 
-                # ===============================================================
-                # cleanup repeated keyframes
-                # ===============================================================
-                if not fullbake:
-                    for f in fRange:
-                        if f not in (fRange.first(), fRange.last()):
-                            lastf_point = (newPoint.center.getPositionAnimCurve(0).evaluate(
-                                f-1), newPoint.center.getPositionAnimCurve(1).evaluate(f-1))
-                            point = (newPoint.center.getPositionAnimCurve(0).evaluate(
-                                f), newPoint.center.getPositionAnimCurve(1).evaluate(f))
-                            nextf_point = (newPoint.center.getPositionAnimCurve(0).evaluate(
-                                f+1), newPoint.center.getPositionAnimCurve(1).evaluate(f+1))
-                            if point == lastf_point == nextf_point:
-                                newPoint.center.removePositionKey(f)
 
+def _bvfx_restore_static(shape, curves, stored):
+    """ Puts back the animation of a static frozen shape, see splinewarp_lock()
 
-                shapeattr = newPointShape.getAttributes()
-                shapeattr.add("ab", 1.0)
-                newPointShape.append(newPoint)
-                warpRoot.insert(0, newPointShape)
+    Returns:
+        bool: False when its animation wasn't stored, there was nothing to put back
+    """
+    states = stored.pop(shape.name, None)
+    if states is None or len(states) != len(curves):
+        # baked before the animation was stored, the keys are still under a constant expression
+        for curve in curves:
+            curve.useExpression = False
+        return False
+    for curve, state in zip(curves, states):
+        _bvfx_set_curve_keys(curve, state)
+    return True
 
-        del(task)
 
-    if trackNode.Class() == "Tracker4":
-        # ===============================================================
-        # find the amount of trackers inside this Tracker4 mess
-        numTracks = 0
-        for _ in range(1, 1000):
-            check = nuke.tcl(
-                "value {0}.tracks.{1}.track_x".format(trackNode.name(), _))
-            if check == '1':
-                numTracks = _ - 1
-                break
-        # ===============================================================
-        # ---------------------------------------------------------- #
-        task = nuke.ProgressTask(
-            'Converting %s to Splinewarp' % trackNode.name())
-        subtask = nuke.ProgressTask('Track %s' % _)
-        taskcount = 1
-        # ---------------------------------------------------------- #
-        for _ in range(numTracks):
+def splinewarp_freezeShapes(warpNode, index=None, layers=None):
+    """ Generator over the A side shapes and strokes (the ones being frozen)
 
-            # ---------------------------------------------------------- #
-            task.setMessage('Converting tracker ' + str(_))
-            task.setProgress(int(float(taskcount)/numTracks*100.0))
-            if task.isCancelled() or subtask.isCancelled():
-                break
-            # ---------------------------------------------------------- #
+        It will tag rotoshapes with the [F] in the name, the freeze state itself is
+        recorded on the shapes attributes (see splinewarp_lock()) so it survives renames
 
-            newPointShape = rp.Shape(rotoCurve, type="bspline")
-            newPoint = rp.ShapeControlPoint(0, 0)
-            newPointShape.name = trackNode.name() + "_track" + str(_ + 1)
+    Args:
+        warpNode (node): splinewarp3 node
+        index (CurvesIndex, optional): index of the node, built when None
+        layers (list, optional): layer names, only the shapes under them when given
+    """
+    index = index or CurvesIndex(warpNode)
+    layers = set(layers) if layers else None
 
-            # ---------------------------------------------------------- #
-            subtask.setMessage('Track %s' % _)
-            # ---------------------------------------------------------- #
+    for shape in index.walk((CurvesIndex.SHAPE, CurvesIndex.STROKE), side=1.0):
+        if layers is not None and not any(layer.name in layers for layer in index.chain(shape)):
+            continue
+        if shape.name.count("[F]") <= 0:
+            index.rename(shape, shape.name + "_[F]")
+        yield shape
 
-            for f in fRange:
 
-                # ---------------------------------------------------------- #
-                tprogress = int((f - fRange.first()+1.0) /
-                                (fRange.last() - fRange.first()+1.0) * 100.0)
+def splinewarp_freezeLayers(warpNode):
+    """ Returns: list: the layer names the freeze of the node is limited to ("flayers"), None for all of them """
+    knob = warpNode.knob('flayers')
+    names = [_ for _ in re.split(r'[\s,]+', knob.value()) if _] if knob is not None else []
+    return names or None
 
-                if tprogress % 5 == 0:   # reduce task update to every n% so its doesnt slow down calculations
-                    subtask.setProgress(int(tprogress))
-                if task.isCancelled() or subtask.isCancelled():
-                    break
-                # ---------------------------------------------------------- #
-                x = trackNode['tracks'].getValueAt(f, 31 * _ + 2)
-                y = trackNode['tracks'].getValueAt(f, 31 * _ + 3)
-                newPoint.center.addPositionKey(f, (x, y))
 
-            # ===============================================================
-            # cleanup repeated keyframes
-            # ===============================================================
-            if not fullbake:
-                for f in fRange:
-                    if f not in (fRange.first(), fRange.last()):
-                        lastf_point = (newPoint.center.getPositionAnimCurve(0).evaluate(
-                            f-1), newPoint.center.getPositionAnimCurve(1).evaluate(f-1))
-                        point = (newPoint.center.getPositionAnimCurve(0).evaluate(
-                            f), newPoint.center.getPositionAnimCurve(1).evaluate(f))
-                        nextf_point = (newPoint.center.getPositionAnimCurve(0).evaluate(
-                                f+1), newPoint.center.getPositionAnimCurve(1).evaluate(f+1))
-                        if point == lastf_point == nextf_point:
-                                newPoint.center.removePositionKey(f)
-
-            shapeattr = newPointShape.getAttributes()
-            shapeattr.add("ab", 1.0)
-            newPointShape.append(newPoint)
-
-            warpRoot.insert(0, newPointShape)
-            taskcount += 1
-        del(task)
-        del(subtask)
-
-    nuke.delete(tempRotoNode)
-
-
-def convert_rotonodes(rotoNode, warpNode, fRange, breakintopin=False, fullbake=False):
-    """Convert a Roto or Rotopaint node into a Splinewarp node
-        It will: bake all the transforms on the rotoshapes
-        It will: ignore feather and bezier handles
+def splinewarp_freezeCurves(warpNode, index=None, layers=None):
+    """ Generator over the position animcurves of the A side shapes, see splinewarp_freezeShapes()
 
     Args:
-        rotoNode (TYPE): origin Roto node
-        warpNode (TYPE): destination SplineWarp node
-        fRange (TYPE): framerange to convert
-        breakintopin (bool, optional): Will convert the shape into individual points
+        warpNode (node): splinewarp3 node
+        index (CurvesIndex, optional): index of the node, built when None
+        layers (list, optional): layer names, only the shapes under them when given
     """
+    index = index or CurvesIndex(warpNode)
+    for shape in splinewarp_freezeShapes(warpNode, index, layers):
+        for curve in _bvfx_shape_curves(shape, index):
+            yield curve
 
-    rotoNode.knob("selected").setValue(True)
-    # since were are manipulating shapes in place, create a node copy
-    nukescripts.node_copypaste()  # this is essential to the execution
 
-    tempRotoNode = nuke.selectedNode()
-    warpRoot = warpNode['curves'].rootLayer
-    rotoRoot = tempRotoNode['curves'].rootLayer
-    rptsw_shapeList = bvfx_roto_walker(tempRotoNode)
+def splinewarp_lock(warpNode, mode='expression', freezeFrame=None, index=None, layers=None, force=False):
+    """ Freezes the A side shapes, only the ones not frozen yet in this mode (or on this
+        frame for the static mode), with a single curves change notification at the end.
+        Shapes frozen before their state was recorded are checked point by point.
 
-    # ---------------------------------------------------------- #
-    task = nuke.ProgressTask('Converting %s to Splinewarp' % rotoNode.name())
-    taskcount = 0
-    # ---------------------------------------------------------- #
-    for shape in rptsw_shapeList:
-        if task.isCancelled():
-            break
-        if isinstance(shape[0], nuke.rotopaint.Shape):
+    Args:
+        warpNode (node): splinewarp3 node
+        mode (str, optional): one of FREEZE_MODES
+        freezeFrame (int, optional): frame baked by the static mode, the node "fframe" when None
+        index (CurvesIndex, optional): index of the node, built when None
+        layers (list, optional): layer names, only the shapes under them when given
+        force (bool, optional): freeze every shape again
 
-            task.setMessage('Converting ' + shape[0].name)
-            task.setProgress(int(float(taskcount)/len(rptsw_shapeList)*100.0))
+    Returns:
+        dict: "locked" and "skipped" shapes
+    """
+    static = mode == 'static'
+    if static and freezeFrame is None:
+        freezeFrame = warpNode['fframe'].value()
+    state = float(FREEZE_MODES.index(mode) + 1)
+    staticState = float(FREEZE_MODES.index('static') + 1)
+    index = index or CurvesIndex(warpNode)
+    stats = {"locked": 0, "skipped": 0}
+    stored = bvfx_read_static(warpNode)
+    restored = False
+    evaluated = 0
+
+    for shape in splinewarp_freezeShapes(warpNode, index, layers):
+        recorded = _bvfx_attribute(shape, FREEZE_STATE)
+        if not force and recorded == state and (not static or _bvfx_attribute(shape, FREEZE_FRAME) == freezeFrame):
+            stats["skipped"] += 1
+            continue
+        curves = list(_bvfx_shape_curves(shape, index))
+        if recorded == staticState:
+            # back to the animation, to bake another frame or to set the expressions
+            restored = _bvfx_restore_static(shape, curves, stored) or restored
+        if static:
+            stored[shape.name] = [_bvfx_curve_keys(curve) for curve in curves]
+            for curve in curves:
+                if curve.expressionString == FREEZE_EXPRESSION:
+                    curve.useExpression = False
+                value = curve.evaluate(freezeFrame)
+                curve.useExpression = False
+                curve.removeAllKeys()
+                curve.addKey(freezeFrame, value)
+            evaluated += len(curves)
+        else:
+            for curve in curves:
+                if force or recorded or not (curve.useExpression and curve.expressionString == FREEZE_EXPRESSION):
+                    curve.useExpression = True
+                    curve.expressionString = FREEZE_EXPRESSION
+        _bvfx_set_attribute(shape, FREEZE_STATE, state)
+        if static:
+            _bvfx_set_attribute(shape, FREEZE_FRAME, freezeFrame)
+        stats["locked"] += 1
+    bvfx_profiler.count("evaluate", evaluated)
+
+    if static and stats["locked"] or restored:
+        bvfx_write_static(warpNode, stored)
+    if stats["locked"]:
+        warpNode['curves'].changed()
+    return stats
+
+
+def splinewarp_expressionLock(warpNode, index=None, layers=None, force=False):
+    """ Adds an expression on the rotoshape animation, to freeze it in place on
+        the desired frame "fframe"
 
-            warpCurve = warpNode['curves']
-            warpRoot = warpCurve.rootLayer
-            shapeattr = shape[0].getAttributes()
-            shapeattr.add("ab", 1.0)
-            transf = shape[0].getTransform()
-            pt = 1  # counter
+        Shapes already frozen with the expression are skipped, see splinewarp_lock()
 
-            # ---------------------------------------------------------- #
-            subtask = nuke.ProgressTask('Converting %s' % shape[0].name)
-            # ---------------------------------------------------------- #
+    Args:
+        warpNode (node): splinewarp3 node
+        index (CurvesIndex, optional): index of the node, built when None
+        layers (list, optional): layer names, only the shapes under them when given
+        force (bool, optional): set the expression on every shape again
 
-            for points in shape[0]:
-                if task.isCancelled() or subtask.isCancelled():
-                    break
-                newPointShape = rp.Shape(
-                    tempRotoNode['curves'], type="bspline")
-                newPoint = rp.ShapeControlPoint(
-                    0, 0) if breakintopin else points
+    Returns:
+        dict: see splinewarp_lock()
+    """
+    with bvfx_profiler.phase("expression_lock", warpNode.name()):
+        return splinewarp_lock(warpNode, 'expression', index=index, layers=layers, force=force)
 
-                # ===============================================================
-                # bake all the keyframes before starting processing points
-                # ===============================================================
-                for f in fRange:
-                    # ---------------------------------------------------------- #
-                    if task.isCancelled() or subtask.isCancelled():
-                        break
-
-                    tprogress = int((f - fRange.first()+1.0) /
-                                    (fRange.last() - fRange.first()+1.0) * 100.0)
-
-                    if tprogress % 10 == 0:   # reduce task update to every n% so its doesnt slow down calculations
-                        subtask.setMessage(
-                            'Converting pt %s of  %s' % (pt, len(shape[0])))
-                        subtask.setProgress(int(tprogress))
-                    # ---------------------------------------------------------- #
-
-                    transf.addTransformKey(f)
-                    point = (points.center.getPositionAnimCurve(0).evaluate(
-                        f), points.center.getPositionAnimCurve(1).evaluate(f))
-                    newPoint.center.addPositionKey(f, (point[0], point[1]))
-                # ===============================================================
-                # end of baking process
-                # ===============================================================
-                lastf_point_offset = -1
-
-                for f in fRange:
-                    if task.isCancelled():
-                        break
-
-                    transf.addTransformKey(f)
-                    point = (points.center.getPositionAnimCurve(0).evaluate(
-                        f), points.center.getPositionAnimCurve(1).evaluate(f))
-                    newPoint.center.addPositionKey(f, (point[0], point[1]))
-                    transf = shape[0].getTransform()
-                    center_xy = bvfx_TTM(point, transf, f)
-                    center_xy = bvfx_TL(
-                        center_xy, shape[1], f, rptsw_shapeList)
-                    newPoint.center.addPositionKey(
-                        f, (center_xy[0], center_xy[1]))
 
-                # ===============================================================
-                # cleanup repeated keyframes
-                # ===============================================================
-                if not fullbake:
-                    for f in fRange:
-                        # do not add repeated keyframes
-                        if f not in (fRange.first(), fRange.last()):
-                            lastf_point = (newPoint.center.getPositionAnimCurve(0).evaluate(
-                                f-1), newPoint.center.getPositionAnimCurve(1).evaluate(f-1))
-                            point = (newPoint.center.getPositionAnimCurve(0).evaluate(
-                                f), newPoint.center.getPositionAnimCurve(1).evaluate(f))
-                            nextf_point = (newPoint.center.getPositionAnimCurve(0).evaluate(
-                                f+1), newPoint.center.getPositionAnimCurve(1).evaluate(f+1))
-                            if point == lastf_point == nextf_point:
-                                newPoint.center.removePositionKey(f)
+def splinewarp_staticLock(warpNode, freezeFrame=None, index=None, layers=None, force=False):
+    """ Freezes the rotoshape animation with its value on the freeze frame as a single key,
+        there is no tcl to evaluate so it renders as fast as a shape without animation
 
+        The keys it replaces are kept on a hidden knob of the node (see bvfx_read_static()),
+        so it can be rebaked on another frame or turned back into the expression mode at any
+        time. Shapes already baked on that frame are skipped, see splinewarp_lock()
 
-                # ===============================================================
-                # cleanup keyframes outside range
-                # ===============================================================
-                for f in newPoint.center.getControlPointKeyTimes():
-                    if not fRange.isInRange(int(f)):
-                        newPoint.center.removePositionKey(f)
-
-                if breakintopin:
-                    newPointShape.name = "%s_PIN[%s]" % (
-                        shape[0].name, str(pt))
-                    newPointShape.append(newPoint)
-                    shapeattr = newPointShape.getAttributes()
-                    shapeattr.add("ab", 1.0)
-                    warpRoot.insert(0, newPointShape)
-
-                pt += 1
-
-            if not breakintopin:
-                transf = shape[0].getTransform()
-                for f in fRange:
-                    transf.removeTransformKey(f)
-                transf.reset()
-                # ===========================================================================
-                # fix the curve Extramatrix for the range of the conversion
-                # ===========================================================================
-                identmatrix = [(0, 0, 1), (0, 1, 0), (0, 2, 0), (0, 3, 0), (1, 0, 0), (1, 1, 1), (1, 2, 0), (
-                    1, 3, 0), (2, 0, 0), (2, 1, 0), (2, 2, 1), (2, 3, 0), (3, 0, 0), (3, 1, 0), (3, 2, 0), (3, 3, 1)]
-                extramatrix = transf.evaluate(fRange.first()).getMatrix()
-                for m in identmatrix:
-                    curve = transf.getExtraMatrixAnimCurve(m[0], m[1])
-                    curve.removeAllKeys()
-                    curve.addKey(fRange.first(), m[2])
-                    curve.removeAllKeys()
-                # ===========================================================================
-                # move shapes to new home
-                # ===========================================================================
-                warpRoot.insert(0, shape[0])
-
-        taskcount += 1
-
-    rotoNode.knob("selected").setValue(False)
-    nuke.delete(tempRotoNode)
-    del(rptsw_shapeList)
-    del(task)  # always delete task
-    del(subtask)
-
-
-def convert_into_splinewarp(nodeList):
-    # ===========================================================================
-    # panel setup
-    # ===========================================================================
-    p = nukescripts.panels.PythonPanel("Convert to Splinewarp")
-    k = nuke.String_Knob("framerange", "FrameRange")
-    k.setFlag(nuke.STARTLINE)
-    k.setTooltip(
-        "Set the framerange to convert, by default its the project start-end. Example: 10-20")
-    p.addKnob(k)
-    k.setValue("%s-%s" % (nuke.root().firstFrame(), nuke.root().lastFrame()))
-    k = nuke.Boolean_Knob("pin", "Break into Pin Points")
-    k.setFlag(nuke.STARTLINE)
-    k.setTooltip("This will break all the shapes into single points")
-    p.addKnob(k)
-    k = nuke.Boolean_Knob("fullbake", "Full bake")
-    k.setFlag(nuke.STARTLINE)
-    k.setTooltip("Adds keyframes on all frames inside the range")
-    p.addKnob(k)
-    result = p.showModalDialog()
-    # ===========================================================================
+    Args:
+        warpNode (node): splinewarp3 node
+        freezeFrame (int, optional): frame to bake, the node "fframe" when None
+        index (CurvesIndex, optional): index of the node, built when None
+        layers (list, optional): layer names, only the shapes under them when given
+        force (bool, optional): bake every shape again
 
-    if result == 0:
-        return  # Canceled
-    try:
-        fRange = nuke.FrameRange(p.knobs()["framerange"].getText())
-    except:
-        raise ValueError(
-            'Framerange format is not correct, use startframe-endframe i.e.: 0-200')
+    Returns:
+        dict: see splinewarp_lock()
+    """
+    with bvfx_profiler.phase("static_lock", warpNode.name()):
+        return splinewarp_lock(warpNode, 'static', freezeFrame, index, layers, force)
 
-    breakintopin = p.knobs()["pin"].value()
-    fullbake = p.knobs()["fullbake"].value()
 
-    # main warpnode creation
-    warpNode = nuke.createNode('SplineWarp3')
-    warpNode.knob("selected").setValue(False)
-    for _ in nodeList:
-        if _.Class() in ('Roto', 'RotoPaint'):
-            convert_rotonodes(_, warpNode, fRange, breakintopin, fullbake)
+def splinewarp_unlock(warpNode, index=None, layers=None):
+    """ Removes the freeze (expression or static) from the rotoshapes, back to their animation,
+        clearing their freeze state and the [F] tag
 
-        if _.Class() in ('Tracker3', 'Tracker4'):
-            convert_trackernodes(_, warpNode, fRange, fullbake)
+    Args:
+        warpNode (node): splinewarp3 node
+        index (CurvesIndex, optional): index of the node, built when None
+        layers (list, optional): layer names, only the shapes under them when given
 
-    ####
-    # TODO keyframe cleanup ? way too many repeated baked keyframes
-    ####
+    Returns:
+        int: the shapes unlocked
+    """
+    index = index or CurvesIndex(warpNode)
+    staticState = float(FREEZE_MODES.index('static') + 1)
+    stored = bvfx_read_static(warpNode)
+    restored = False
+    shapes = [shape for shape in splinewarp_freezeShapes(warpNode, index, layers)]
+    for shape in shapes:
+        curves = list(_bvfx_shape_curves(shape, index))
+        if _bvfx_attribute(shape, FREEZE_STATE) == staticState:
+            restored = _bvfx_restore_static(shape, curves, stored) or restored
+        for curve in curves:
+            curve.useExpression = False
+        _bvfx_set_attribute(shape, FREEZE_STATE, 0.0)
+        if shape.name.endswith("_[F]"):
+            index.rename(shape, shape.name[:-len("_[F]")])
+
+    if restored:
+        bvfx_write_static(warpNode, stored)
+    if shapes:
+        warpNode['curves'].changed()
+    return len(shapes)
+
+
+def splinewarp_freezeRefresh(warpNode):
+    """ Applies the freeze mode picked on the FreezeFrame tab, rebaking the static one
+        Runs from the node knobChanged when "fframe" or "fmode" change, then on the
+        splinewarps linked to this "fframe" (stabilize/paint setups)
 
-    ####
-    # TODO ckeck for keyframes on shapes outside the frange?
-    ####
+    Args:
+        warpNode (node): splinewarp3 node
+    """
+    nodes = [warpNode] + [n for n in warpNode.dependent(nuke.EXPRESSIONS, False)
+                          if n.Class() == 'SplineWarp3' and n.knob('fframe') is not None]
+    for node in nodes:
+        index = CurvesIndex(node)
+        mode = node.knob('fmode')
+        if mode is not None and mode.value() == 'static' and node.clones():
+            # the freeze frame variants share their curves, a bake would freeze them all on one frame
+            log.warning("%s: cloned freeze variants can't be static, keeping the expressions" % node.name())
+            mode.setValue(FREEZE_MODES[0])
+        layers = splinewarp_freezeLayers(node)
+        if mode is not None and mode.value() == 'static':
+            splinewarp_staticLock(node, index=index, layers=layers)
+        else:
+            splinewarp_expressionLock(node, index, layers)
 
-    ####
-    # TODO task message
-    ####
 
-    warpNode['curves'].changed()
-    warpNode.knob('toolbar_output_ab').setValue(1)
-    warpNode.knob('boundary_bbox').setValue(0)
+def bvfx_script_value(value):
+    """ Formats a float the way curves scripts store it: integers as they are,
+        anything else as the hex of its single precision bits, ie: 1.5 -> x3fc00000
 
-    # =======================================================================
-    # theres a bug on Nuke 8 where the splinewarpnode UI do not update correctly with python created curves
-    # this is a workaround
-    # =======================================================================
-    warpNode.knob("selected").setValue(True)
-    nukescripts.node_copypaste()
-    nuke.show(nuke.selectedNode())
-    # nuke.selectedNode().knob('selected').setValue(False)
-    # =======================================================================
-    # end of workaround -
-    # =======================================================================
-    # rptsw_shapeList = []
-    # nuke.delete(rotoNode)
-    nuke.delete(warpNode)
+    Args:
+        value (float): value to format
 
-    if nuke.selectedNode().Class() == "SplineWarp3":
-        return nuke.selectedNode()  # the resulting splinewarpnode
+    Returns:
+        str: script token
+    """
+    value = float(value)
+    if value == int(value):
+        return str(int(value))
+    return "x%08x" % struct.unpack(">I", struct.pack(">f", value))[0]
 
 
-def main():
+def bvfx_script_float(token):
+    """ Reads a curves script number token, see bvfx_script_value() """
+    if token.startswith("x"):
+        return struct.unpack(">f", struct.pack(">I", int(token[1:], 16)))[0]
+    return float(token)
+
+
+_SCRIPT_TOKENS = re.compile(r'[{}]|[^\s{}]+')
+_SCRIPT_BRACES = re.compile(r'[{}]')
+
+
+class CurvesGroup(object):
+    """ A {} group of a CurvesScript, ie: a layer, a shape, an attributes list or an edge
+
+        It only points at its span on the script text, the items are scanned the first
+        time they are read and the nested groups are not scanned until they are read.
+    """
+    __slots__ = ('script', 'start', 'end', '_items')
+
+    def __init__(self, script, start, end):
+        self.script = script
+        self.start = start  # index of the opening brace
+        self.end = end  # index of the closing brace
+        self._items = None
+
+    def items(self):
+        """ Returns: list: words (str) and nested groups (CurvesGroup) of the group, in order """
+        if self._items is None:
+            text = self.script.text
+            items = []
+            pos = self.start + 1
+            while True:
+                match = _SCRIPT_TOKENS.search(text, pos, self.end)
+                if match is None:
+                    break
+                if match.group() == "{":
+                    close = self.script._match(match.start())
+                    items.append(CurvesGroup(self.script, match.start(), close))
+                    pos = close + 1
+                else:
+                    items.append(match.group())
+                    pos = match.end()
+            self._items = items
+        return self._items
+
+    @property
+    def tag(self):
+        items = self.items()
+        return items[0] if items and not isinstance(items[0], CurvesGroup) else None
+
+    @property
+    def name(self):
+        items = self.items()
+        if len(items) < 2:
+            return None
+        return items[1].body if isinstance(items[1], CurvesGroup) else items[1]
+
+    @property
+    def text(self):
+        return self.script.text[self.start:self.end + 1]
+
+    @property
+    def body(self):
+        return self.script.text[self.start + 1:self.end]
+
+    def children(self, tag=None):
+        """ Nested groups, optionally only the ones starting with the given tag """
+        return [i for i in self.items() if isinstance(i, CurvesGroup) and (tag is None or i.tag == tag)]
+
+    def child(self, tag):
+        for i in self.items():
+            if isinstance(i, CurvesGroup) and i.tag == tag:
+                return i
+        return None
+
+
+class CurvesScript(object):
+    """ Structured view of a curves knob script (Roto, RotoPaint or SplineWarp3 'curves' toScript())
+
+        {{v x3f99999a}
+         {f 0}
+         {n
+          {layer Root {f 0} {t ...} {a ...}
+           {curvegroup Bezier1 512 bezier {...} {tx ...} {a ... ab 1 ...}}
+           {layer Layer1 ... }}}
+         {edge Bezier1 Bezier1_clone {cp ...} {a}}}
+
+        Only the parts being read are scanned. Edits (attributes, edges, inserted or replaced
+        groups) are kept as text spans and applied with a single join by toScript(), so the cost
+        follows the size of the edit rather than the size of the warp.
+
+    Args:
+        text (str): the curves knob toScript()
+    """
+    SHAPE_TAGS = ('curvegroup', 'cubiccurve')
+    EDGE_DATA = "{cp x41980000 x41980000 0 0 1 {{{{1 1}} {{1 1}}} {{{1 x40b80000}} {{1 x40b80000}}} {{{1 x41280001}} {{1 x41280001}}} {{{1 x41740001}} {{1 x41740001}}}}} {a}"
+
+    def __init__(self, text):
+        self.text = text
+        self._edits = []  # (start, end, order, text)
+        start = text.index("{")
+        self.root = CurvesGroup(self, start, self._match(start))
+
+    def _match(self, start):
+        depth = 0
+        for match in _SCRIPT_BRACES.finditer(self.text, start):
+            depth += 1 if match.group() == "{" else -1
+            if depth == 0:
+                return match.start()
+        raise ValueError("Unbalanced curves script")
+
+    # ===========================================================================
+    # reading
+    # ===========================================================================
+    def root_layer(self):
+        """ Returns: CurvesGroup: the {layer Root ...} group """
+        return self.root.child("n").child("layer")
+
+    def walk(self, layer=None, parent=None):
+        """ Generator over the (element group, parent layer group) of the hierarchy
+
+        Args:
+            layer (CurvesGroup, optional): layer to start from, the root layer when None
+        """
+        layer = layer or self.root_layer()
+        for group in layer.children():
+            if group.tag == "layer":
+                yield group, layer
+                for item in self.walk(group):
+                    yield item
+            elif group.tag in self.SHAPE_TAGS:
+                yield group, layer
+
+    def shapes(self):
+        """ Generator over the shape and stroke groups of the hierarchy """
+        for group, parent in self.walk():
+            if group.tag in self.SHAPE_TAGS:
+                yield group
+
+    def edges(self):
+        """ Returns: list: (A shape name, B shape name) of the edges, pending ones included """
+        edges = []
+        for group in self.root.children("edge"):
+            items = group.items()
+            edges.append((items[1], items[2]))
+        for start, end, order, text in self._edits:
+            if text.startswith("\n{edge "):
+                items = text.split()
+                edges.append((items[1], items[2]))
+        return edges
+
+    @staticmethod
+    def attributes(group):
+        """ Reads the {a name value ...} list of a shape or layer group
+
+        Returns:
+            dict: attribute name -> float, the animated ones ({curve} values) are left out
+        """
+        attributes = group.child("a")
+        if attributes is None:
+            return {}
+        items = attributes.items()
+        return dict((items[i], bvfx_script_float(items[i + 1])) for i in range(1, len(items) - 1, 2)
+                    if not isinstance(items[i + 1], CurvesGroup))
+
+    # ===========================================================================
+    # editing
+    # ===========================================================================
+    def _edit(self, start, end, text):
+        self._edits.append((start, end, len(self._edits), text))
+
+    def set_attributes(self, group, values):
+        """ Sets (or adds) attributes on a shape or layer group
+
+        Args:
+            group (CurvesGroup): shape or layer group
+            values (dict): attribute name -> float, the other attributes (animated ones included)
+                are kept as they are
+        """
+        attributes = group.child("a")
+        if attributes is None:
+            text = "{a%s}" % "".join(" %s %s" % (k, bvfx_script_value(v)) for k, v in sorted(values.items()))
+            self._edit(group.end, group.end, " " + text)
+            return
+        items = attributes.items()[1:]
+        pending = dict(values)
+        pairs = []
+        for i in range(0, len(items) - 1, 2):
+            key, value = items[i], items[i + 1]
+            if key in pending:
+                value = bvfx_script_value(pending.pop(key))
+            elif isinstance(value, CurvesGroup):
+                value = value.text
+            pairs.append((key, value))
+        pairs += [(k, bvfx_script_value(v)) for k, v in sorted(pending.items())]
+        self._edit(attributes.start, attributes.end + 1, "{a%s}" % "".join(" %s %s" % p for p in pairs))
+
+    def add_edge(self, a, b, data=None):
+        """ Joins a shape of the A side to a shape of the B side """
+        self._edit(self.root.end, self.root.end, "\n{edge %s %s %s}" % (a, b, data or self.EDGE_DATA))
+
+    def rename(self, group, name):
+        """ Renames a shape or layer group, ie: {curvegroup Bezier1 ...} """
+        tag = _SCRIPT_TOKENS.search(self.text, group.start + 1, group.end)
+        token = _SCRIPT_TOKENS.search(self.text, tag.end(), group.end)
+        end = self._match(token.start()) + 1 if token.group() == "{" else token.end()
+        self._edit(token.start(), end, name)
+
+    def copy(self, group, name, attributes=None):
+        """ Text of a copy of a shape group, to use with insert_after()
+
+        Args:
+            group (CurvesGroup): shape group to copy
+            name (str): name of the copy
+            attributes (dict, optional): attributes to change on the copy, ie: {"ab": 2.0}
+
+        Returns:
+            str: the group text
+        """
+        copy = CurvesScript(group.text)
+        copy.rename(copy.root, name)
+        if attributes:
+            copy.set_attributes(copy.root, attributes)
+        return copy.toScript()
+
+    def insert_after(self, group, text):
+        """ Inserts a new group (ie: a shape) right after an existing one, same parent """
+        self._edit(group.end + 1, group.end + 1, "\n" + text)
+
+    def replace(self, group, text):
+        """ Replaces a whole group, ie: a shape with new keys """
+        self._edit(group.start, group.end + 1, text)
+
+    def remove(self, group):
+        self._edit(group.start, group.end + 1, "")
+
+    def toScript(self):
+        """ Returns: str: the script with all the edits applied, edits must not overlap """
+        pieces = []
+        pos = 0
+        for start, end, order, text in sorted(self._edits):
+            if start < pos:
+                raise ValueError("Overlapping curves script edits")
+            pieces.append(self.text[pos:start])
+            pieces.append(text)
+            pos = end
+        pieces.append(self.text[pos:])
+        return "".join(pieces)
+
+
+def splinewarp_joinAB(warpNode):
+    """ Joins every A side shape or stroke that has no B side partner yet to a copy of itself
+        on the B side (<name>_clone), in a single read and write of the curves knob.
+        Shapes already joined are left alone, a B side <name>_clone left without its edge is
+        joined again instead of copied, so running it again on a joined warp changes nothing.
+
+    Args:
+        warpNode (node): splinewarp3 node
+
+    Returns:
+        dict: "paired" shapes already joined, "cloned" new B side shapes and "joined" new edges
+    """
+    stats = {"paired": 0, "cloned": 0, "joined": 0}
+    with bvfx_profiler.phase("ab_join", warpNode.name()):
+        script = CurvesScript(warpNode['curves'].toScript())
+        bvfx_profiler.count("toScript")
+        joined = set(a for a, b in script.edges())
+        groups = list(script.shapes())
+        names = set(group.name for group in groups)
+
+        with bvfx_profiler.phase("ab_clone", warpNode.name()):
+            for group in groups:
+                if script.attributes(group).get("ab") != 1.0:
+                    continue
+                name = group.name
+                base = name[:-len("_[F]")] if name.endswith("_[F]") else name  # frozen, see splinewarp_freezeCurves()
+                if name in joined or base in joined:
+                    stats["paired"] += 1
+                    continue
+                clone = base + "_clone"
+                if clone not in names:
+                    script.insert_after(group, script.copy(group, clone, {"ab": 2.0}))
+                    names.add(clone)
+                    stats["cloned"] += 1
+                script.add_edge(name, clone)
+                stats["joined"] += 1
+
+        if stats["joined"]:
+            warpNode['curves'].fromScript(script.toScript())
+            bvfx_profiler.count("fromScript")
+    log.info("%s: %s shapes joined (%s cloned), %s already joined" % (
+        warpNode.name(), stats["joined"], stats["cloned"], stats["paired"]))
+    return stats
+
+
+def splinewarp_checkAB(warpNode, index=None):
+    """ Given a splinewarp node check that every A side shape has a B side partner
+        Unpaired shapes are duplicated and joined, see splinewarp_joinAB()
+
+    Args:
+        warpNode (node): splinewarp3 node
+        index (CurvesIndex, optional): index of the node, built when None
+
+    Returns:
+        CurvesIndex: index of the node after the check, to reuse on the next stages
+    """
+    if splinewarp_joinAB(warpNode)["joined"] or index is None:
+        index = CurvesIndex(warpNode)
+    return index
+
+
+def _bvfx_freeze_copy(copier, frame):
+    """ A copy of a frozen warp (or of one of its variants) on the given freeze frame """
+    node = copier.copy()
+    if node['fframe'].value() != frame:
+        node['fframe'].setValue(frame)
+        if node.knob('fmode') is not None and node['fmode'].value() == 'static':
+            splinewarp_staticLock(node, frame)
+    return node
+
+
+def bvfx_freeze_setup(warpNode, fh=True, stb=False, ptns=False, copier=None, held=None):
+    """ Builds the FrameHold, stabilization and paint setups around a frozen splinewarp
+
+    Args:
+        warpNode (node): frozen splinewarp3 node
+        fh (bool, optional): create a FrameHold setup
+        stb (bool, optional): create a stabilization setup
+        ptns (bool, optional): create a paint setup
+        copier (NodeCopier, optional): serialization of the frozen warp to copy from, ie: shared
+            with the other freeze frame variants, made from warpNode when None
+        held (int, optional): frame of a cloned variant, the FrameHold holds it and feeds the warp
+            directly, the warp reads its freeze frame from there (see HELD_FRAME_EXPRESSION)
+
+    Returns:
+        list: the created nodes
+    """
+    nodes = []
+    frame = warpNode['fframe'].value() if held is None else held
+
+    # ===========================================================================
+    # framehold creation
+    # ===========================================================================
+
+    if fh or stb or ptns or held is not None:
+        framehold = nuke.nodes.FrameHold()
+
+        if held is None:
+            framehold["first_frame"].setExpression(warpNode.name() + ".fframe")
+        else:
+            framehold["first_frame"].setValue(held)
+        # =======================================================================
+        # some layout beautyfication
+        # =======================================================================
+        framehold["xpos"].setValue(warpNode["xpos"].getValue() - 100)
+        framehold["ypos"].setValue(warpNode["ypos"].getValue() - 80)
+        dot2 = nuke.nodes.Dot()
+        dot2["xpos"].setValue(warpNode["xpos"].getValue() - 150)
+        dot2["ypos"].setValue(warpNode["ypos"].getValue()+84)
+        sc = nuke.nodes.ShuffleCopy()
+
+        sc["xpos"].setValue(warpNode["xpos"].getValue())
+        sc["ypos"].setValue(warpNode["ypos"].getValue()+80)
+        premult = nuke.nodes.Premult()
+        premult["ypos"].setValue(sc["ypos"].getValue()+80)
+        if held is None:
+            dot = nuke.nodes.Dot()
+            dot["xpos"].setValue(warpNode["xpos"].getValue()+34)
+            dot["ypos"].setValue(framehold["ypos"].getValue()+7)
+            set_inputs(warpNode, dot)
+            set_inputs(dot, framehold)
+            nodes.append(dot)
+        else:
+            set_inputs(warpNode, framehold)
+        set_inputs(sc, warpNode, dot2)
+        set_inputs(premult, sc)
+
+        dot_main = framehold
+        # set_inputs(dot, framehold)
+        nodes += [dot2, sc, framehold, premult]
+        # nodeSelection.append(dot)
+
+    # =======================================================================
+    # stabilization setup
+    # =======================================================================
+    for _ in nuke.selectedNodes():
+        _.knob('selected').setValue(False)
+    copier = copier or NodeCopier(warpNode)
+
+    if stb:
+        try:
+            b_input = _bvfx_freeze_copy(copier, frame)
+            a_input = _bvfx_freeze_copy(copier, frame)
+            nuke.show(a_input)
+
+            b_input["mix"].setValue(1)
+            dot = nuke.nodes.Dot()
+            set_inputs(a_input, b_input)
+            set_inputs(b_input, dot)
+            nukescripts.swapAB(b_input)
+            dot["xpos"].setValue(warpNode["xpos"].getValue()+169)
+            dot["ypos"].setValue(warpNode["ypos"].getValue()+11)
+            b_input["xpos"].setValue(warpNode["xpos"].getValue()+135)
+            b_input["ypos"].setValue(dot["ypos"].getValue()+80)
+            a_input["xpos"].setValue(warpNode["xpos"].getValue()+135)
+            a_input["ypos"].setValue(dot["ypos"].getValue()+160)
+            # =======================================================================
+            # workaround.... if node is not show on properties tab the "root warp" attribute will not change!
+            # =======================================================================
+            nuke.show(b_input)
+            b_input["root_warp"].setValue(0)
+            a_input["fframe"].setExpression(b_input.name() + ".fframe")
+            
+            nodes += [dot, b_input, a_input]
+        except Exception:
+            raise Exception(
+                "Stabilization Setup Failed\nRun the script without Stabilize")
+
+    if ptns:
+        try:
+            b_input = _bvfx_freeze_copy(copier, frame)
+            b_input["mix"].setValue(1)
+            dot = nuke.nodes.Dot()
+            rpstb = nuke.createNode('RotoPaint')
+            set_inputs(b_input,dot)
+            set_inputs(rpstb, dot)
+            set_inputs(dot_main, rpstb)
+            rpstb.setInput(2, b_input)
+            nukescripts.swapAB(b_input)
+            dot["xpos"].setValue(dot_main["xpos"].getValue()+35)
+            dot["ypos"].setValue(dot_main["ypos"].getValue()+11-150)
+            rpstb["xpos"].setValue(dot_main["xpos"].getValue())
+            rpstb["ypos"].setValue(dot_main["ypos"].getValue()+80-150)
+            b_input["xpos"].setValue(dot_main["xpos"].getValue()+125)
+            b_input["ypos"].setValue(dot_main["ypos"].getValue()+55-150)
+            # =======================================================================
+            # workaround.... if node is not show on properties tab the "root warp" attribute will not change!
+            # =======================================================================
+            nuke.show(b_input)
+            b_input["root_warp"].setValue(0)
+            b_input["fframe"].setExpression(warpNode.name() + ".fframe")
+            nodes += [dot, b_input, rpstb]
+
+        except Exception:
+            raise Exception(
+                "Paint Setup Failed\nRun the script without Paint")
+
+    return nodes
+
+
+def freezewarp(nodeList, freezeFrame=None, fh=True, stb=False, ptns=False, static=False, layers=None):
+    """ Will take a SplineWarpNode and appply the freeze expressions on it
+        Shapes should be preferably baked and without Layer transforsms
+        Without a freezeFrame it asks for the options on a panel
+
+        Several freeze frames build one variant per extra frame with its own setups. The variants
+        are clones of the frozen warp sharing its curves, each one reads its freeze frame from
+        the FrameHold feeding it. Static variants bake their own frame, those are copies
+
+    Args:
+        nodeList (list): list of nodes
+        freezeFrame (int, optional): the frame to freeze the shapes positions, or a list of frames
+        fh (bool, optional): create a FrameHold setup
+        stb (bool, optional): create a stabilization setup
+        ptns (bool, optional): create a paint setup
+        static (bool, optional): bake the freeze frame positions instead of using expressions
+        layers (list, optional): layer names, only the shapes under them get frozen, kept on the node
+            "flayers" knob for the next refreshes
+
+    """
+    for _ in nodeList:
+        if _.Class() not in ('SplineWarp3'):
+            raise TypeError('Unsupported node type. Node must be SplineWarp')
+
+    if freezeFrame is None:
+        # ===========================================================================
+        # panel setup
+        # ===========================================================================
+        p = nukescripts.panels.PythonPanel("Freeze SplineWarp")
+        k = nuke.Int_Knob("freezeframe", "Freezeframe")
+        k.setFlag(nuke.STARTLINE)
+        k.setTooltip("Set the frame to freeze the shapes positions")
+        p.addKnob(k)
+        k.setValue(nuke.frame())
+        k = nuke.String_Knob("variants", "More Freezeframes")
+        k.setFlag(nuke.STARTLINE)
+        k.setTooltip("Optional frames, ie: 1050 1120, each one gets its own copy of the frozen SplineWarp and setups")
+        p.addKnob(k)
+        k = nuke.Boolean_Knob("fh", "Create FrameHold")
+        k.setFlag(nuke.STARTLINE)
+        k.setTooltip(
+            "This will create a Framehold Node and set it to the Freezeframe value, if you use expressions mode it will be linked")
+        p.addKnob(k)
+        k.setValue(True)
+        k = nuke.Boolean_Knob("stb", "Stabilize Setup")
+        k.setFlag(nuke.STARTLINE)
+        k.setTooltip("This will create a handy warp stabilization setup")
+        p.addKnob(k)
+        k = nuke.Boolean_Knob("ptns", "Paint Setup")
+        k.setFlag(nuke.STARTLINE)
+        k.setTooltip("This will create a handy paint setup")
+        p.addKnob(k)
+        k.setValue(False)
+        k = nuke.Boolean_Knob("static", "Static Freeze")
+        k.setFlag(nuke.STARTLINE)
+        k.setTooltip(
+            "Bakes the shapes on the Freezeframe instead of using expressions, much faster on heavy warps. Changing the Freeze Frame rebakes it")
+        p.addKnob(k)
+        k.setValue(False)
+        k = nuke.String_Knob("layers", "Freeze Layers")
+        k.setFlag(nuke.STARTLINE)
+        k.setTooltip("Optional layer names, ie: face hair, only the shapes under them get frozen. All of them when empty")
+        p.addKnob(k)
+        k.setValue(" ".join(splinewarp_freezeLayers(nodeList[0]) or []))
+        k = nuke.Text_Knob("estimate", "Estimate", "\n".join(
+            line for n in nodeList for line in bvfx_format_estimate(bvfx_analyze_warp(n))))
+        k.setFlag(nuke.STARTLINE)
+        p.addKnob(k)
+        # ===========================================================================
+
+        result = p.showModalDialog()
+
+        if result == 0:  # Cancelled
+            return
+
+        freezeFrame = p.knobs()["freezeframe"].value()
+        # dont put strings in there, nuke will crash
+        freezeFrame = freezeFrame if isinstance(freezeFrame, int) else nuke.frame()
+        try:
+            freezeFrame = [freezeFrame] + [int(f) for f in re.split(r'[\s,]+', p.knobs()["variants"].value()) if f]
+        except ValueError:
+            raise ValueError('More Freezeframes must be frame numbers, i.e.: 1050 1120')
+
+        fh = p.knobs()["fh"].value()
+        stb = p.knobs()["stb"].value()
+        ptns = p.knobs()["ptns"].value()
+        static = p.knobs()["static"].value()
+        layers = [_ for _ in re.split(r'[\s,]+', p.knobs()["layers"].value()) if _]
+
+    freezeFrames = [int(f) for f in freezeFrame] if isinstance(freezeFrame, (list, tuple)) else [freezeFrame]
+
+    # holds all nodes for selection at end of script
+    nodeSelection = nodeList[:]
+    # =======================================================================
+    # add freeze tab / expressions to freeze
+    # =======================================================================
+    for warpNode in nodeList:
+        index = splinewarp_checkAB(warpNode)
+        addTabtoNode(warpNode, 'FreezeFrame')
+        knob_names = [knob.name() for knob in warpNode.allKnobs()]
+        if 'fframe' not in knob_names:
+            ff = nuke.Int_Knob('fframe', "Freeze Frame")
+            warpNode.addKnob(ff)
+
+            pbutton = nuke.PyScript_Knob(
+                'pybutton', 'This Frame', 'nuke.thisNode()["fframe"].setValue(nuke.frame())')
+            warpNode.addKnob(pbutton)
+
+            pb2code = '''origmix = nuke.thisNode()["mix"].getValue()\nnuke.thisNode()["mix"].setValue(nuke.thisNode()["root_warp"].getValue())\nnuke.thisNode()["root_warp"].setValue(origmix)\na_input = nuke.thisNode().input(0)\nb_input = nuke.thisNode().input(1)\nnuke.thisNode().setInput(1,a_input)\nnuke.thisNode().setInput(0,b_input)'''
+            pbutton2 = nuke.PyScript_Knob(
+                'pybutton2', 'Swap mix/rootwarp', pb2code)
+            warpNode.addKnob(pbutton2)
+
+            bvfx_signature(
+                warpNode, "FreezeSplinewarp v%s created %s - updated %s" % (__version__, __creation__, __date__))
+            warpNode['fframe'].setValue(freezeFrames[0])
+
+        if 'fmode' not in knob_names:
+            fmode = nuke.Enumeration_Knob('fmode', "Freeze Mode", FREEZE_MODES)
+            fmode.setTooltip(
+                "expression: shapes follow the Freeze Frame with expressions\nstatic: shapes are baked on the Freeze Frame, faster to render")
+            warpNode.addKnob(fmode)
+            if FREEZE_CALLBACK not in warpNode['knobChanged'].value():
+                warpNode['knobChanged'].setValue(
+                    "\n".join([_ for _ in (warpNode['knobChanged'].value(), FREEZE_CALLBACK) if _]))
+        warpNode['fmode'].setValue(FREEZE_MODES[1] if static else FREEZE_MODES[0])
+        if layers and 'flayers' not in knob_names:
+            flayers = nuke.String_Knob('flayers', "Freeze Layers")
+            flayers.setTooltip("Only the shapes under these layers are frozen, all of them when empty")
+            warpNode.addKnob(flayers)
+        if warpNode.knob('flayers') is not None:
+            warpNode['flayers'].setValue(" ".join(layers or []))
+
+        if static:
+            splinewarp_staticLock(warpNode, index=index, layers=layers)
+        else:
+            splinewarp_expressionLock(warpNode, index, layers)
+
+        label = '''FreezeF: [value fframe]\n[if {[value mix]==0 && [value root_warp]==1} {return "matchmove"} {return "stabilization"}]'''
+        warpNode.knob('label').setValue(label)
+        warpNode.knob('filter').setValue(
+            'Mitchell')  # less smoother than cubic
+
+        source = warpNode.input(0)
+        copier = NodeCopier(warpNode)  # the setups and static variants share one serialization
+        cloned = len(freezeFrames) > 1 and not static
+        if cloned:
+            copier.script  # serialized first, the setups copies keep a plain freeze frame
+            warpNode['fframe'].setExpression(HELD_FRAME_EXPRESSION)
+            warpNode['pybutton'].setValue(HELD_FRAME_BUTTON)
+        nodeSelection += bvfx_freeze_setup(warpNode, fh, stb, ptns, copier, freezeFrames[0] if cloned else None)
+
+        # ===========================================================================
+        # freeze frame variants, clones of the frozen warp with their own setups
+        # ===========================================================================
+        for i, frame in enumerate(freezeFrames[1:], 1):
+            if cloned:
+                variant = nuke.clone(warpNode)
+            else:
+                variant = copier.copy()
+                variant['fframe'].setValue(frame)
+                splinewarp_staticLock(variant, frame, layers=layers)
+            variant["xpos"].setValue(warpNode["xpos"].getValue() + VARIANT_SPACING * i)
+            variant["ypos"].setValue(warpNode["ypos"].getValue())
+            set_inputs(variant, source)
+            nodeSelection += [variant] + bvfx_freeze_setup(variant, fh, stb, ptns, copier, frame if cloned else None)
+
+    for _ in nodeSelection:
+        _.knob('selected').setValue(True)
+
+
+def _bvfx_script_groups(text, count):
+    """ Returns the text of the first top level {} groups of a knob script
+
+    Args:
+        text (str): knob script
+        count (int): how many groups to read, scanning stops there
+
+    Returns:
+        list: groups text without the outer braces
+    """
+    groups = []
+    depth = 0
+    start = 0
+    for i, c in enumerate(text):
+        if c == "{":
+            if depth == 0:
+                start = i + 1
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                groups.append(text[start:i])
+                if len(groups) == count:
+                    break
+    return groups
+
+
+def bvfx_tracker4_schema(trackNode):
+    """ Finds the tracks count and the columns layout of a Tracker4 'tracks' knob in one call
+        the knob script starts with a "{ 1 columns tracks }" header followed by the columns definitions
+        ie: { 1 31 3 } { { 5 1 20 enable e 1 } { 3 1 75 name n 1 } { 2 1 58 track_x tx 1 } ...
+
+    Args:
+        trackNode (node): Tracker4 node
+
+    Returns:
+        dict: tracks, columns count and the enable, track_x and track_y column indexes
+    """
+    schema = {"tracks": 0, "columns": 31, "enable": 0, "track_x": 2, "track_y": 3}
+    groups = _bvfx_script_groups(trackNode['tracks'].toScript(), 2)
+    try:
+        header = groups[0].split()
+        schema["columns"] = int(header[1])
+        schema["tracks"] = int(header[2])
+    except (IndexError, ValueError):
+        # ===============================================================
+        # unknown script layout, probe the tracks one by one
+        numTracks = 0
+        for _ in range(1, 1000):
+            check = nuke.tcl(
+                "value {0}.tracks.{1}.track_x".format(trackNode.name(), _))
+            bvfx_profiler.count("nuke.tcl")
+            if check == '1':
+                numTracks = _ - 1
+                break
+        schema["tracks"] = numTracks
+        return schema
+
+    if len(groups) > 1:
+        names = [column.split()[3] for column in _bvfx_script_groups(groups[1], schema["columns"])
+                 if len(column.split()) > 3]
+        for key in ("enable", "track_x", "track_y"):
+            if key in names:
+                schema[key] = names.index(key)
+    return schema
+
+
+def bvfx_tracker_channels(trackNode):
+    """ Lists the enabled tracks of a Tracker3 or Tracker4 node
+
+    Args:
+        trackNode (node): Tracker3 or Tracker4 node
+
+    Returns:
+        list: (track number, knob, x index, y index) per enabled track
+    """
+    channels = []
+    if trackNode.Class() == "Tracker3":
+        for _ in range(1, 5):
+            if trackNode["enable"+str(_)].getValue():
+                channels.append((_, trackNode["track"+str(_)], 0, 1))
+
+    if trackNode.Class() == "Tracker4":
+        schema = bvfx_tracker4_schema(trackNode)
+        tracks = trackNode['tracks']
+        for _ in range(schema["tracks"]):
+            row = schema["columns"] * _
+            if tracks.getValue(row + schema["enable"]):
+                channels.append((_ + 1, tracks, row + schema["track_x"], row + schema["track_y"]))
+    return channels
+
+
+def bvfx_tracker_samples(trackNode, frames):
+    """ Extracts the positions of all the enabled tracks of a tracker over a frame range
+        keyed frames are read straight from the knob animations, the remaining
+        frames are evaluated on a frame by frame pass over all the tracks
+
+    Args:
+        trackNode (node): Tracker3 or Tracker4 node
+        frames (list): frames to extract
+
+    Returns:
+        tuple: (track numbers, buffer) where buffer is (tracks, frames, 2), a numpy array when available
+    """
+    channels = bvfx_tracker_channels(trackNode)
+    if numpy is not None:
+        buffer = numpy.zeros((len(channels), len(frames), 2))
+    else:
+        buffer = [[[0.0, 0.0] for f in frames] for c in channels]
+
+    pending = []  # (track, axis, knob, index) not covered by keyframes
+    for t, (number, knob, ix, iy) in enumerate(channels):
+        for axis, index in enumerate((ix, iy)):
+            anim = knob.animation(index)
+            if anim is None:
+                value = knob.getValue(index)
+                for i in range(len(frames)):
+                    buffer[t][i][axis] = value
+                continue
+            if not anim.noExpression():
+                pending.append((t, axis, knob, index))
+                continue
+            keyed = dict((k.x, k.y) for k in anim.keys())
+            for i, f in enumerate(frames):
+                value = keyed.get(f)
+                buffer[t][i][axis] = anim.evaluate(f) if value is None else value
+            if bvfx_profiler.enabled:
+                bvfx_profiler.count("evaluate", len([f for f in frames if f not in keyed]))
+
+    for i, f in enumerate(frames):
+        for t, axis, knob, index in pending:
+            buffer[t][i][axis] = knob.getValueAt(f, index)
+    bvfx_profiler.count("getValueAt", len(frames) * len(pending))
+
+    return [c[0] for c in channels], buffer
+
+
+def bvfx_tracker_keyframes(trackNode, frames):
+    """ The smart bake frames of every enabled track, its keys and the range endpoints, every
+        frame when it runs an expression, has keys other than smooth ones or keys across a range
+        endpoint, see bvfx_smart_frames()
+
+    Args:
+        trackNode (node): Tracker3 or Tracker4 node
+        frames (list): frames of the conversion range
+
+    Returns:
+        dict: track number -> sorted frames
+    """
+    frameset = set(frames)
+    keyframes = {}
+    for number, knob, ix, iy in bvfx_tracker_channels(trackNode):
+        times = set((frames[0], frames[-1]))
+        for index in (ix, iy):
+            anim = knob.animation(index)
+            if anim is None:
+                continue
+            keys = anim.keys() if anim.noExpression() else None
+            if keys is None or not bvfx_knob_keys_smooth(keys) or \
+                    bvfx_keys_straddle([k.x for k in keys], frames[0], frames[-1]):
+                times = frameset
+                break
+            for k in keys:
+                times.update((int(math.floor(k.x)), int(math.ceil(k.x))))
+        keyframes[number] = sorted(times & frameset)
+    return keyframes
+
+
+# ===============================================================================
+# baked samples, the conversions intermediate representation
+# ===============================================================================
+def bvfx_sample_array(values, typecode=None):
+    """ Packs samples into a typed array, see BVFX_SAMPLE_TYPECODE
+
+    Args:
+        values (TYPE): any sequence of numbers or a numpy array
+        typecode (str, optional): array typecode, BVFX_SAMPLE_TYPECODE when None
+
+    Returns:
+        array.array: the samples
+    """
+    typecode = typecode or BVFX_SAMPLE_TYPECODE
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        samples = array.array(typecode)
+        data = numpy.ascontiguousarray(values, dtype=samples.itemsize == 4 and numpy.float32 or numpy.float64)
+        _bvfx_array_frombytes(samples, data.tobytes())
+        return samples
+    return array.array(typecode, values)
+
+
+def _bvfx_array_frombytes(samples, data):
+    getattr(samples, 'frombytes', getattr(samples, 'fromstring', None))(data)
+    return samples
+
+
+def _bvfx_array_tobytes(samples):
+    return getattr(samples, 'tobytes', getattr(samples, 'tostring', None))()
+
+
+class BakedPin(object):
+    """ The samples of one control point, x and y per frame in typed arrays
+
+    Args:
+        frames (array.array): sampled frames, shared by all the pins of a shape
+        xs (array.array): x per frame
+        ys (array.array): y per frame
+    """
+    __slots__ = ('frames', 'xs', 'ys', 'keep')
+
+    def __init__(self, frames, xs, ys):
+        self.frames = frames
+        self.xs = xs
+        self.ys = ys
+        self.keep = None  # keyframes to write, see bvfx_reduce_keys(), every frame when None
+
+    @property
+    def nbytes(self):
+        """ int: memory held by the samples, frames excluded """
+        size = self.xs.itemsize * len(self.xs) + self.ys.itemsize * len(self.ys)
+        return size + (self.keep.itemsize * len(self.keep) if self.keep is not None else 0)
+
+
+class BakedShape(object):
+    """ A shape or track waiting to be committed into the SplineWarp, no Nuke object is
+        created for it before the commit
+
+    Args:
+        name (str): shape name on the SplineWarp
+        frames (array.array): sampled frames
+        source (TYPE, optional): the roto Shape the pins come from, None for tracks
+    """
+    __slots__ = ('name', 'frames', 'source', 'pins', 'matrices', 'dropped')
+
+    def __init__(self, name, frames, source=None):
+        self.name = name
+        self.frames = frames
+        self.source = source
+        self.pins = []
+        self.matrices = None  # per frame transforms of the pins, see TransformCache
+        self.dropped = set()  # pin indexes left out of the warp, see bvfx_decimate_pins()
+
+    def add(self, xs, ys):
+        """ Adds the samples of the next control point
+
+        Returns:
+            BakedPin: the new pin
+        """
+        pin = BakedPin(self.frames, bvfx_sample_array(xs), bvfx_sample_array(ys))
+        self.pins.append(pin)
+        return pin
+
+    def job(self, fullbake, tolerance):
+        """ Returns: tuple: the bvfx_bake_job() job of the shape """
+        return ([p.xs for p in self.pins], [p.ys for p in self.pins], self.matrices, self.frames,
+                fullbake, tolerance)
+
+    def update(self, result):
+        """ Stores a bvfx_bake_job() result back on the pins, the transforms are no longer needed """
+        for pin, xs, ys, keep in zip(self.pins, *result):
+            pin.xs, pin.ys, pin.keep = xs, ys, keep
+        self.matrices = None
+
+    @property
+    def nbytes(self):
+        """ int: memory held by the samples of all the pins """
+        return self.frames.itemsize * len(self.frames) + sum(p.nbytes for p in self.pins)
+
+
+# ===============================================================================
+# persistent sample cache
+# ===============================================================================
+class SampleCache(object):
+    """ On disk cache of baked samples, one file per shape or track named after the fingerprint
+        of its source (keys and transforms, see bvfx_roto_fingerprints()), so it is shared by
+        any conversion of the same source whatever the range or options.
+
+        Files are read through mmap, a conversion on part of the cached frames only reads the
+        pages of those frames. Once a conversion ends, if the directory grew over the limit the
+        least recently used files are removed (see evict()).
+
+        File layout, little endian:
+            header: magic, version, sample typecode, pins, frames, first frame, last frame, fingerprint
+            frames: int32 per frame
+            pins: x per frame then y per frame, for every pin
+
+    Args:
+        directory (str): cache directory, created on the first write
+        limit (float, optional): directory size limit in MB, BVFX_CACHE_LIMIT when None, 0 is unlimited
+    """
+    MAGIC = b'BVFXSC'
+    VERSION = 1
+    HEADER = struct.Struct('<6sBcIIii16s')
+
+    def __init__(self, directory, limit=None):
+        self.directory = directory
+        self.limit = BVFX_CACHE_LIMIT if limit is None else limit
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def for_script(cls, limit=None):
+        """ Returns: SampleCache: the cache next to the current script (<script>.bvfxcache), None when not saved yet """
+        name = nuke.root().name()
+        if not name or os.path.splitext(name)[1] != '.nk':
+            return None
+        return cls(os.path.splitext(name)[0] + '.bvfxcache', limit)
+
+    def path(self, fingerprint):
+        return os.path.join(self.directory, fingerprint + '.bin')
+
+    def get(self, fingerprint, frames):
+        """ Reads the samples of a shape or track on some frames
+
+        Args:
+            fingerprint (str): source fingerprint
+            frames (list): sorted frames needed, they must all be in the cached ones
+
+        Returns:
+            list: (xs, ys) typed arrays per pin, None when not cached
+        """
+        path = self.path(fingerprint) if fingerprint else None
+        if path is None or not os.path.exists(path):
+            self.misses += 1
+            return None
+        try:
+            with open(path, 'rb') as handle:
+                data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    pins = self._read(data, fingerprint, frames)
+                finally:
+                    data.close()
+        except (IOError, OSError, ValueError, struct.error) as e:  # truncated or removed meanwhile
+            log.warning("Sample cache: skipping %s, %s" % (path, e))
+            pins = None
+        if pins is None:
+            self.misses += 1
+            return None
+        os.utime(path, None)  # most recently used
+        self.hits += 1
+        return pins
+
+    def _read(self, data, fingerprint, frames):
+        header = self.HEADER
+        magic, version, typecode, pinCount, frameCount, first, last, stored = header.unpack_from(data, 0)
+        if magic != self.MAGIC or version != self.VERSION or stored.decode('ascii') != fingerprint:
+            return None
+        if not frames or frames[0] < first or frames[-1] > last:
+            return None
+        cached = _bvfx_array_frombytes(array.array('i'), data[header.size:header.size + 4 * frameCount])
+        start = bisect.bisect_left(cached, frames[0])
+        end = bisect.bisect_right(cached, frames[-1])
+        span = cached[start:end]
+        picks = None  # every frame of the span when None
+        if list(span) != list(frames):
+            position = dict((f, i) for i, f in enumerate(span))
+            if any(f not in position for f in frames):
+                return None
+            picks = [position[f] for f in frames]
+
+        typecode = typecode.decode('ascii')
+        itemsize = array.array(typecode).itemsize
+        offset = header.size + 4 * frameCount
+        pins = []
+        for pin in range(pinCount):
+            axes = []
+            for axis in range(2):
+                base = offset + ((2 * pin + axis) * frameCount + start) * itemsize
+                values = _bvfx_array_frombytes(array.array(typecode), data[base:base + (end - start) * itemsize])
+                if picks is not None:
+                    values = array.array(typecode, (values[i] for i in picks))
+                if typecode != BVFX_SAMPLE_TYPECODE:
+                    values = array.array(BVFX_SAMPLE_TYPECODE, values)
+                axes.append(values)
+            pins.append(tuple(axes))
+        return pins
+
+    def put(self, fingerprint, frames, pins):
+        """ Writes the samples of a shape or track
+
+        Args:
+            fingerprint (str): source fingerprint
+            frames (list): sorted sampled frames
+            pins (list): (xs, ys) per pin, one value per frame
+        """
+        if not fingerprint or not frames:
+            return
+        typecode = BVFX_SAMPLE_TYPECODE
+        path = self.path(fingerprint)
+        temp = path + '.%s.tmp' % os.getpid()
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            with open(temp, 'wb') as handle:
+                handle.write(self.HEADER.pack(self.MAGIC, self.VERSION, typecode.encode('ascii'), len(pins),
+                                              len(frames), frames[0], frames[-1], fingerprint.encode('ascii')))
+                handle.write(_bvfx_array_tobytes(array.array('i', frames)))
+                for xs, ys in pins:
+                    for values in (xs, ys):
+                        if getattr(values, 'typecode', None) != typecode:
+                            values = array.array(typecode, values)
+                        handle.write(_bvfx_array_tobytes(values))
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(temp, path)
+        except (IOError, OSError) as e:  # a cache never fails a conversion
+            log.warning("Sample cache: could not write %s, %s" % (path, e))
+
+    def evict(self):
+        """ Removes the least recently used files until the directory fits the limit
+            it lists the whole directory, so it runs once per conversion instead of on every put()
+        """
+        if not self.limit or not os.path.isdir(self.directory):
+            return
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.bin'):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(f[1] for f in files)
+        limit = self.limit * 1024 * 1024
+        for mtime, size, path in sorted(files):
+            if total <= limit:
+                break
+            os.remove(path)
+            total -= size
+
+
+def bvfx_sample_cache(cache):
+    """ Returns: SampleCache: from a convert_into_splinewarp() cache argument, None when disabled """
+    if not cache:
+        return None
+    if isinstance(cache, SampleCache):
+        return cache
+    if cache is True:
+        cache = SampleCache.for_script()
+        if cache is None:
+            log.warning("Sample cache disabled, save the script first")
+        return cache
+    return SampleCache(cache)
+
+
+# ===============================================================================
+# parallel bake kernel
+# ===============================================================================
+def bvfx_bake_job(job):
+    """ The pure numeric part of a conversion, applies the transforms and reduces the
+        keyframes of all the points of a shape or track. It never calls Nuke, so it is
+        safe to run on any thread or process.
+
+    Args:
+        job (tuple): (xs, ys, matrices, frames, fullbake, tolerance) where xs and ys are the
+            sampled positions per point and frame, matrices the per frame transforms
+            (see TransformCache) or None when the positions need no transform
+
+    Returns:
+        tuple: (xs, ys, keeps) the baked positions per point as typed arrays (see bvfx_sample_array())
+            and the keyframes to keep per point, see bvfx_reduce_keys(), None keeps every frame
+    """
+    xs, ys, matrices, frames, fullbake, tolerance = job
+    if matrices is not None and len(xs):
+        xs, ys = bvfx_TTM_batch(xs, ys, matrices)
+        xs = [bvfx_sample_array(pxs) for pxs in xs]
+        ys = [bvfx_sample_array(pys) for pys in ys]
+    keeps = [None if fullbake else array.array('i', bvfx_reduce_keys(frames, pxs, pys, tolerance))
+             for pxs, pys in zip(xs, ys)]
+    return xs, ys, keeps
+
+
+def bvfx_run_jobs(jobs, workers=None, pool=None):
+    """ Runs bvfx_bake_job() over a list of jobs, results come back in the jobs order
+        whatever the pool, so the conversions are deterministic
+
+    Args:
+        jobs (list): bvfx_bake_job() jobs
+        workers (int, optional): pool size, 0 uses all the cores and 1 runs on the calling thread,
+            BVFX_WORKERS when None
+        pool (str, optional): "thread" or "process", BVFX_POOL when None. Processes scale the
+            pure python fallback too but fork the interpreter, prefer threads inside the Nuke UI
+
+    Returns:
+        list: bvfx_bake_job() results
+    """
+    workers = BVFX_WORKERS if workers is None else workers
+    pool = pool or BVFX_POOL
+    if workers <= 0:
+        try:
+            workers = multiprocessing.cpu_count()
+        except NotImplementedError:
+            workers = 1
+    workers = min(workers, len(jobs))
+    if workers <= 1:
+        return [bvfx_bake_job(job) for job in jobs]
+
+    if pool == "process":
+        executor = multiprocessing.Pool(workers)
+    else:
+        executor = multiprocessing.pool.ThreadPool(workers)
+    try:
+        return executor.map(bvfx_bake_job, jobs, max(1, len(jobs) // (workers * 4)))
+    finally:
+        executor.close()
+        executor.join()
+
+
+# ===============================================================================
+# pin decimation
+# ===============================================================================
+def _bvfx_positions_at(frames, values, times):
+    """ Linear interpolation of samples at other frames, held outside the sampled ones """
+    if numpy is not None:
+        return numpy.interp(times, frames, values)
+    positions = []
+    last = len(frames) - 1
+    for t in times:
+        i = bisect.bisect_left(frames, t)
+        if i <= 0:
+            positions.append(values[0])
+        elif i > last:
+            positions.append(values[last])
+        elif frames[i] == t:
+            positions.append(values[i])
+        else:
+            u = float(t - frames[i - 1]) / (frames[i] - frames[i - 1])
+            positions.append(values[i - 1] + (values[i] - values[i - 1]) * u)
+    return positions
+
+
+def bvfx_pin_distance(a, b):
+    """ The farthest two pins get from each other over the range, positions are linear in
+        between the sampled frames when the pins were not sampled on the same ones
+
+    Args:
+        a (tuple): (frames, xs, ys) of a pin
+        b (tuple): (frames, xs, ys) of another pin
+
+    Returns:
+        float: the maximum distance in pixels
+    """
+    (fa, xa, ya), (fb, xb, yb) = a, b
+    if list(fa) != list(fb):
+        times = sorted(set(fa) | set(fb))
+        xa, ya = _bvfx_positions_at(fa, xa, times), _bvfx_positions_at(fa, ya, times)
+        xb, yb = _bvfx_positions_at(fb, xb, times), _bvfx_positions_at(fb, yb, times)
+    if numpy is not None:
+        dx = numpy.asarray(xa, dtype=numpy.float64) - numpy.asarray(xb, dtype=numpy.float64)
+        dy = numpy.asarray(ya, dtype=numpy.float64) - numpy.asarray(yb, dtype=numpy.float64)
+        return float(numpy.sqrt((dx * dx + dy * dy).max())) if len(dx) else 0.0
+    return max([math.hypot(x0 - x1, y0 - y1) for x0, y0, x1, y1 in zip(xa, ya, xb, yb)] or [0.0])
+
+
+def bvfx_decimate_pins(pins, distance):
+    """ Picks the pins worth keeping: a pin whose trajectory stays within `distance` pixels of an
+        already kept pin on every frame is dropped, the kept one warps the same area.
+
+        Pins are bucketed on a grid of `distance` sized cells by their position on the first frame,
+        two pins that never get farther than `distance` apart are in neighbouring cells there, so
+        only those are compared over the whole range. Earlier pins win.
+
+    Args:
+        pins (list): (frames, xs, ys) per pin
+        distance (float): pixels
+
+    Returns:
+        tuple: (kept pin indexes, {dropped pin index: (kept pin index, its error in pixels)})
+    """
+    kept = []
+    dropped = {}
+    grid = {}
+    for i, pin in enumerate(pins):
+        frames, xs, ys = pin
+        if not len(frames) or distance <= 0:
+            kept.append(i)
+            continue
+        cell = (int(math.floor(xs[0] / distance)), int(math.floor(ys[0] / distance)))
+        match = None
+        for cx in (cell[0] - 1, cell[0], cell[0] + 1):
+            for cy in (cell[1] - 1, cell[1], cell[1] + 1):
+                for k in grid.get((cx, cy), ()):
+                    error = bvfx_pin_distance(pins[k], pin)
+                    if error <= distance and (match is None or error < match[1]):
+                        match = (k, error)
+        if match is None:
+            kept.append(i)
+            grid.setdefault(cell, []).append(i)
+        else:
+            dropped[i] = match
+    return kept, dropped
+
+
+# ===============================================================================
+# fingerprints for incremental conversions
+# ===============================================================================
+FINGERPRINT_KNOB = 'bvfx_sources'
+CHECKPOINT_KNOB = 'bvfx_checkpoint'
+
+
+def _bvfx_curve_state(curve):
+    """ Everything that drives an animcurve: expression, constant value and keys """
+    keys = []
+    for i in range(curve.getNumberOfKeys()):
+        key = curve.getKey(i)
+        keys.append((key.time, key.value, getattr(key, 'interpolationType', None),
+                     getattr(key, 'leftSlope', None), getattr(key, 'rightSlope', None)))
+    return (curve.expressionString if curve.useExpression else None,
+            getattr(curve, 'constantValue', None), keys)
+
+
+def _bvfx_transform_state(transf):
+    """ The state of all the curves of an AnimCTransform """
+    return [_bvfx_curve_state(curve) for curve in bvfx_transform_curves(transf)]
+
+
+def bvfx_fingerprint(*state):
+    """ Returns: str: a short hash of any repr()-able state """
+    return hashlib.sha1(repr(state).encode('utf-8')).hexdigest()[:16]
+
+
+def bvfx_roto_fingerprints(rotoNode, settings):
+    """ Fingerprints every shape of a roto node from its points keys, its transform and the
+        transforms of its parent layers, ie: what the conversion bakes
+
+    Args:
+        rotoNode (node): Roto or RotoPaint node
+        settings (tuple): framerange and options of the conversion, part of every fingerprint
+
+    Returns:
+        dict: shape name -> fingerprint
+    """
+    index = CurvesIndex(rotoNode)
+    layers = {}
+    fingerprints = {}
+    for shape in index.shapes():
+        chain = []
+        for layer in index.chain(shape):
+            if layer.name not in layers:
+                layers[layer.name] = _bvfx_transform_state(layer.getTransform())
+            chain.append(layers[layer.name])
+        points = [(_bvfx_curve_state(p.center.getPositionAnimCurve(0)),
+                   _bvfx_curve_state(p.center.getPositionAnimCurve(1))) for p in shape]
+        fingerprints[shape.name] = bvfx_fingerprint(
+            settings, points, _bvfx_transform_state(shape.getTransform()), chain)
+    return fingerprints
+
+
+def bvfx_tracker_fingerprints(trackNode, settings):
+    """ Fingerprints every enabled track of a Tracker3 or Tracker4 node from its keys
+
+    Args:
+        trackNode (node): Tracker3 or Tracker4 node
+        settings (tuple): framerange and options of the conversion, part of every fingerprint
+
+    Returns:
+        dict: "track<number>" -> fingerprint
+    """
+    fingerprints = {}
+    for number, knob, ix, iy in bvfx_tracker_channels(trackNode):
+        state = []
+        for index in (ix, iy):
+            anim = knob.animation(index)
+            if anim is None:
+                state.append(knob.getValue(index))
+            elif not anim.noExpression():
+                state.append(anim.expression())
+            else:
+                state.append([(k.x, k.y) for k in anim.keys()])
+        fingerprints["track%s" % number] = bvfx_fingerprint(settings, state)
+    return fingerprints
+
+
+def bvfx_read_sources(warpNode):
+    """ Returns: dict: node name -> {element: [fingerprint, [warp shape names]]}, see convert_into_splinewarp() """
+    knob = warpNode.knob(FINGERPRINT_KNOB)
+    if knob is None or not knob.value():
+        return {}
+    try:
+        return json.loads(knob.value())
+    except ValueError:
+        log.warning("%s: unreadable %s knob, converting everything" % (warpNode.name(), FINGERPRINT_KNOB))
+        return {}
+
+
+def bvfx_write_sources(warpNode, sources):
+    """ Stores the sources fingerprints on a hidden knob of the warp node """
+    knob = warpNode.knob(FINGERPRINT_KNOB)
+    if knob is None:
+        knob = nuke.String_Knob(FINGERPRINT_KNOB, '')
+        knob.setFlag(nuke.INVISIBLE)
+        warpNode.addKnob(knob)
+    knob.setValue(json.dumps(sources, sort_keys=True))
+
+
+def bvfx_read_checkpoint(warpNode):
+    """ Returns: dict: the streamed conversion checkpoint of the warp node, empty when none, see bvfx_stream_conversions() """
+    knob = warpNode.knob(CHECKPOINT_KNOB)
+    if knob is None or not knob.value():
+        return {}
+    try:
+        return json.loads(knob.value())
+    except ValueError:
+        log.warning("%s: unreadable %s knob, converting from the start" % (warpNode.name(), CHECKPOINT_KNOB))
+        return {}
+
+
+def bvfx_write_checkpoint(warpNode, checkpoint):
+    """ Stores the streamed conversion checkpoint on a hidden knob of the warp node, None clears it """
+    knob = warpNode.knob(CHECKPOINT_KNOB)
+    if knob is None:
+        if not checkpoint:
+            return
+        knob = nuke.String_Knob(CHECKPOINT_KNOB, '')
+        knob.setFlag(nuke.INVISIBLE)
+        warpNode.addKnob(knob)
+    knob.setValue(json.dumps(checkpoint, sort_keys=True) if checkpoint else '')
+
+
+def bvfx_warp_names(names):
+    """ Returns: set: the given warp shape names along with the A side (<name>_[F]) and
+        B side (<name>_clone) shapes a freeze makes of them, see splinewarp_checkAB() """
+    return set(n for name in names for n in (name, name + "_[F]", name + "_clone"))
+
+
+def bvfx_remove_elements(warpNode, names):
+    """ Removes shapes (and the edges joining them) from a splinewarp node
+
+    Args:
+        warpNode (node): splinewarp3 node
+        names (set): shape names
+    """
+    if not names:
+        return
+    index = CurvesIndex(warpNode)
+    for name in names:
+        element = index.element(name)
+        if element is None:
+            continue
+        parent = index.parent(element)
+        for i, child in enumerate(parent):
+            if child.name == name:
+                parent.remove(i)
+                break
+
+    stored = bvfx_read_static(warpNode)
+    if set(stored) & names:
+        bvfx_write_static(warpNode, dict((k, v) for k, v in stored.items() if k not in names))
+
+    script = CurvesScript(warpNode['curves'].toScript())
+    edges = [e for e in script.root.children("edge") if set(e.items()[1:3]) & names]
+    if edges:
+        for edge in edges:
+            script.remove(edge)
+        warpNode['curves'].fromScript(script.toScript())
+
+
+# ===============================================================================
+# pre-flight analysis
+# ===============================================================================
+# seconds per unit of work inside Nuke, BVFX_COSTS=<json file> overrides them, see bvfx_calibrate_costs()
+BVFX_COSTS = {
+    "copy": 5e-4,  # per source shape, the node copy
+    "sample": 8e-6,  # per point and sampled frame, source curves and transforms
+    "bake": 1e-6,  # per point and sampled frame, transforms and key reduction
+    "keys": 2e-5,  # per key written
+    "insert": 1e-3,  # per shape or pin inserted, A/B clones included
+    "lock": 3e-5,  # per curve locked by the freeze
+    "decimate": 1e-6,  # per pin and sampled frame compared by the pin decimation
+    "curve": 3e-6,  # per animated curve, every frame the SplineWarp renders
+    "expression": 5e-5,  # per tcl expression, every frame the SplineWarp renders
+}
+# profiler phases spent on each cost
+COST_PHASES = {"copy": ("copy",), "sample": ("sample", "smart", "transforms", "cache_read"), "bake": ("bake",),
+               "keys": ("keys",), "insert": ("insert", "ab_clone", "ab_join"),
+               "lock": ("expression_lock", "static_lock"), "decimate": ("decimate",)}
+if os.environ.get("BVFX_COSTS"):
+    try:
+        with open(os.environ["BVFX_COSTS"]) as _handle:
+            BVFX_COSTS.update(json.load(_handle))
+    except (IOError, ValueError) as e:
+        log.warning("Could not read the BVFX_COSTS file: %s" % e)
+
+
+# bvfx_transform_curves() indexes of rotation, skews and the extra matrix terms mixing x and y
+MIXING_CURVES = (2, 7, 8, 9 + 1, 9 + 4, 9 + 12, 9 + 13)
+
+
+def bvfx_analyze_sources(node):
+    """ Reads what converting a Roto, RotoPaint or Tracker node involves, without baking anything
+
+    Args:
+        node (node): Roto, RotoPaint, Tracker3 or Tracker4 node
+
+    Returns:
+        dict: "node", "class", "depth" (deepest layer nesting) and "elements", per shape or track:
+            "name", "points", "keys" (source keys, both axes of every point), "times" (sorted key times),
+            "spans" (first and last keys of the animated transforms), "expression", "mixes" when a
+            static transform rotates or skews (see bvfx_smart_fallback()) and "smooth" when every key
+            of the points interpolates the default way (see bvfx_smart_frames())
+    """
+    elements = []
+    depth = 0
+    if node.Class() in ('Tracker3', 'Tracker4'):
+        for number, knob, ix, iy in bvfx_tracker_channels(node):
+            times, keys, expression, smooth = set(), 0, False, True
+            for index in (ix, iy):
+                anim = knob.animation(index)
+                if anim is None:
+                    continue
+                if not anim.noExpression():
+                    expression = True
+                    continue
+                animKeys = anim.keys()
+                keys += len(animKeys)
+                times.update(k.x for k in animKeys)
+                smooth = smooth and bvfx_knob_keys_smooth(animKeys)
+            elements.append({"name": "track%s" % number, "points": 1, "keys": keys, "times": sorted(times),
+                             "spans": [], "expression": expression, "mixes": False, "smooth": smooth})
+    else:
+        index = CurvesIndex(node)
+        for shape in index.shapes():
+            layers = list(index.chain(shape))
+            depth = max(depth, len(layers) - 1)  # the root layer is not nesting
+            times, keys, expression, spans, mixes, smooth = set(), 0, False, [], False, True
+            for curve in _bvfx_shape_curves(shape, index):
+                curveTimes = bvfx_curve_keytimes(curve)
+                if curveTimes is None:
+                    expression = True
+                    continue
+                keys += len(curveTimes)
+                times.update(curveTimes)
+                smooth = smooth and bvfx_curve_smooth(curve)
+            for transf in [shape.getTransform()] + [layer.getTransform() for layer in layers]:
+                for i, curve in enumerate(bvfx_transform_curves(transf)):
+                    curveTimes = bvfx_curve_keytimes(curve)
+                    if curveTimes is None:
+                        expression = True
+                    elif len(curveTimes) > 1:
+                        spans.append((curveTimes[0], curveTimes[-1]))
+                    elif i in MIXING_CURVES and curve.evaluate(0):
+                        mixes = True
+            elements.append({"name": shape.name, "points": len(shape), "keys": keys, "times": sorted(times),
+                             "spans": spans, "expression": expression, "mixes": mixes, "smooth": smooth})
+    return {"node": node.name(), "class": node.Class(), "depth": depth, "elements": elements}
+
+
+def _bvfx_estimate_element(element, frames, fullbake, tolerance, smart):
+    """ Predicts the sampled frames and the keys per point of a shape or track, see bvfx_estimate()
+
+    Returns:
+        tuple: (sampled frames, keys per point)
+    """
+    if element["expression"]:
+        return len(frames), len(frames)
+    first, last = frames[0], frames[-1]
+    if smart and (element["mixes"] or not element.get("smooth", True) or
+                  bvfx_keys_straddle(element["times"], first, last)):
+        sampled = len(frames)
+    elif smart:
+        sampled = set((first, last))
+        for t in element["times"]:
+            sampled.update((int(math.floor(t)), int(math.ceil(t))))
+        for start, end in element["spans"]:
+            sampled.update(range(int(math.floor(start)), int(math.ceil(end)) + 1))
+        sampled = len([f for f in sampled if first <= f <= last])
+    else:
+        sampled = len(frames)
+    if fullbake or sampled < len(frames):  # every smart key is kept
+        return sampled, sampled
+    # outside the keys the baked positions hold still and the reduction drops them
+    bounds = element["times"] + [t for span in element["spans"] for t in span]
+    if not bounds:
+        return sampled, min(2, sampled)
+    active = len([f for f in frames if min(bounds) <= f <= max(bounds)]) + 2
+    if tolerance > 0:
+        # a smooth curve between source keys takes a few keys within tolerance
+        perPoint = float(element["keys"]) / (2 * max(element["points"], 1))
+        active = min(active, int(2 + 3 * max(perPoint, 1) + 3 * len(element["spans"])))
+    return sampled, min(active, sampled)
+
+
+def bvfx_estimate(analyses, fRange, breakintopin=False, fullbake=False, tolerance=0.0, smart=False,
+                  freeze=False, costs=None, static=False, decimate=0.0):
+    """ Predicts what convert_into_splinewarp() (and freezewarp() after it) would produce and how
+        long it takes, from bvfx_analyze_sources() and the per unit costs of BVFX_COSTS
+
+        Keys are an estimate (the reduction depends on the baked motion), the static
+        rotation/skew fallback of the smart bake is not predicted
+
+    Args:
+        analyses (list): bvfx_analyze_sources() per node
+        fRange (TYPE): framerange to convert, nuke.FrameRange or "first-last" string
+        breakintopin (bool, optional): see convert_into_splinewarp()
+        fullbake (bool, optional): see convert_into_splinewarp()
+        tolerance (float, optional): see convert_into_splinewarp()
+        smart (bool, optional): see convert_into_splinewarp()
+        freeze (bool, optional): add the freeze of the result, A/B clones and expressions
+        costs (dict, optional): seconds per unit, BVFX_COSTS when None
+        static (bool, optional): the freeze bakes single keys instead of expressions, see freezewarp()
+        decimate (float, optional): see convert_into_splinewarp(), which pins it drops depends on the
+            baked motion, "pins" and "keys" count them all and "decimable" tells how many could go
+
+    Returns:
+        dict: source counts ("shapes", "tracks", "points", "depth", "source_keys", "frames"), predicted
+            output ("pins": warp shapes, "decimable", "keys", "expressions"), "units" and "seconds" per
+            cost, "total" seconds, "frame_seconds" the result takes to evaluate per frame and "heavy"
+    """
+    costs = dict(BVFX_COSTS, **(costs or {}))
+    if not isinstance(fRange, nuke.FrameRange):
+        fRange = nuke.FrameRange(str(fRange))
+    frames = list(fRange)
+    result = {"shapes": 0, "tracks": 0, "points": 0, "depth": 0, "source_keys": 0, "frames": len(frames),
+              "pins": 0, "decimable": 0, "keys": 0, "expressions": 0}
+    units = dict((k, 0) for k in COST_PHASES)
+    for analysis in analyses:
+        isTracker = analysis["class"] in ('Tracker3', 'Tracker4')
+        result["depth"] = max(result["depth"], analysis["depth"])
+        for element in analysis["elements"]:
+            points = element["points"]
+            sampled, keys = _bvfx_estimate_element(element, frames, fullbake, tolerance, smart)
+            result["tracks" if isTracker else "shapes"] += 1
+            result["points"] += points
+            result["source_keys"] += element["keys"]
+            result["pins"] += points if breakintopin and not isTracker else 1
+            if decimate > 0 and (isTracker or breakintopin):
+                result["decimable"] += points
+                units["decimate"] += points * sampled
+            result["keys"] += points * keys * 2  # both axes
+            units["copy"] += 0 if isTracker else 1
+            units["sample"] += points * sampled
+            units["bake"] += points * sampled
+            units["keys"] += points * keys
+    units["insert"] = result["pins"]
+    curves = 2 * result["points"]
+    if freeze:
+        units["insert"] += result["pins"]  # the B side clones
+        units["lock"] = curves
+        result["expressions"] = 0 if static else curves
+
+    result["units"] = units
+    result["seconds"] = dict((k, units[k] * costs[k]) for k in units)
+    result["total"] = sum(result["seconds"].values())
+    # a frozen warp evaluates the A side expressions and the B side clones curves
+    result["frame_seconds"] = (curves * costs["curve"] +
+                               result["expressions"] * costs["expression"])
+    result["heavy"] = bool(BVFX_HEAVY_SECONDS) and result["total"] > BVFX_HEAVY_SECONDS
+    return result
+
+
+def bvfx_analyze_warp(warpNode, costs=None):
+    """ Reports the evaluation load of a SplineWarp3 and what freezing it involves
+
+    Args:
+        warpNode (node): splinewarp3 node
+        costs (dict, optional): seconds per unit, BVFX_COSTS when None
+
+    Returns:
+        dict: "shapes", "strokes", "pins" (single point shapes), "points", "depth", "keys", "curves"
+            (animated), "expressions" (tcl), "constants" (static freeze), "frozen" and "a_side" shapes,
+            "frame_seconds" it takes to evaluate per frame, the freeze "units", "seconds", "total" and "heavy"
+    """
+    costs = dict(BVFX_COSTS, **(costs or {}))
+    index = CurvesIndex(warpNode)
+    result = {"node": warpNode.name(), "shapes": 0, "strokes": 0, "pins": 0, "points": 0, "depth": 0, "keys": 0,
+              "curves": 0, "expressions": 0, "constants": 0, "frozen": 0, "a_side": 0}
+    lockCurves = 0
+    for element in index.walk((CurvesIndex.SHAPE, CurvesIndex.STROKE)):
+        kind = index.kind(element)
+        result["shapes" if kind == CurvesIndex.SHAPE else "strokes"] += 1
+        result["pins"] += 1 if kind == CurvesIndex.SHAPE and len(element) == 1 else 0
+        result["points"] += len(element)
+        result["depth"] = max(result["depth"], index.depth(element) - 1)
+        frozen = bool(_bvfx_attribute(element, FREEZE_STATE))
+        static = _bvfx_attribute(element, FREEZE_STATE) == FREEZE_MODES.index('static') + 1
+        aSide = element.getAttributes().getValue(0, "ab") == 1.0
+        result["frozen"] += 1 if frozen else 0
+        result["a_side"] += 1 if aSide else 0
+        for curve in _bvfx_shape_curves(element, index):
+            if aSide and not frozen:
+                lockCurves += 1
+            if static and not curve.useExpression:
+                result["constants"] += 1
+                continue
+            if not curve.useExpression:
+                result["keys"] += curve.getNumberOfKeys()
+                result["curves"] += 1 if curve.getNumberOfKeys() > 1 else 0
+                continue
+            try:
+                float(curve.expressionString)
+                result["constants"] += 1
+            except ValueError:
+                result["expressions"] += 1
+    result["frame_seconds"] = result["curves"] * costs["curve"] + result["expressions"] * costs["expression"]
+    units = {"lock": lockCurves, "insert": result["a_side"] - result["frozen"]}  # upper bound, clones exist once
+    result["units"] = units
+    result["seconds"] = dict((k, units[k] * costs[k]) for k in units)
+    result["total"] = sum(result["seconds"].values())
+    result["heavy"] = bool(BVFX_HEAVY_SECONDS) and result["total"] > BVFX_HEAVY_SECONDS
+    return result
+
+
+def bvfx_calibrate_costs(report, estimate):
+    """ Measures the per unit costs of this machine and Nuke from a profiled conversion and
+        the estimate of that same conversion, ie: to save as the BVFX_COSTS json file
+
+        bvfx_profiler.start()
+        convert_into_splinewarp(nodes, "1-100")
+        costs = bvfx_calibrate_costs(bvfx_profiler.stop(),
+                                     bvfx_estimate([bvfx_analyze_sources(n) for n in nodes], "1-100"))
+
+    Args:
+        report (dict): Profiler.report()
+        estimate (dict): bvfx_estimate() or bvfx_analyze_warp() result
+
+    Returns:
+        dict: seconds per unit, only the costs the run measured
+    """
+    costs = {}
+    for name, phases in COST_PHASES.items():
+        units = estimate["units"].get(name, 0)
+        seconds = sum(report["phases"].get(phase, 0.0) for phase in phases)
+        if units and seconds:
+            costs[name] = seconds / units
+    return costs
+
+
+def bvfx_format_estimate(estimate):
+    """ Returns: list: readable lines of a bvfx_estimate() or bvfx_analyze_warp() result """
+    if "node" in estimate:  # a SplineWarp3
+        lines = ["%s: %s shapes (%s pins) %s strokes, %s points, %s layers deep" % (
+            estimate["node"], estimate["shapes"], estimate["pins"], estimate["strokes"], estimate["points"],
+            estimate["depth"]),
+            "  %s keys, %s animated curves, %s expressions, %s static, %s frozen shapes" % (
+            estimate["keys"], estimate["curves"], estimate["expressions"], estimate["constants"],
+            estimate["frozen"])]
+    else:
+        lines = ["%s shapes %s tracks, %s points, %s layers deep, %s keys over %s frames" % (
+            estimate["shapes"], estimate["tracks"], estimate["points"], estimate["depth"],
+            estimate["source_keys"], estimate["frames"]),
+            "  -> %s%s warp shapes, ~%s keys, %s expressions" % (
+            "up to " if estimate.get("decimable") else "", estimate["pins"], estimate["keys"],
+            estimate["expressions"])]
+        if estimate.get("decimable"):
+            lines.append("  %s pins compared by the decimation" % estimate["decimable"])
+    lines.append("  ~%.1fs to run, ~%.1fms per frame to evaluate%s" % (
+        estimate["total"], estimate["frame_seconds"] * 1000, ", HEAVY" if estimate["heavy"] else ""))
+    return lines
+
+
+class TrackerConversion(object):
+    """ Converts the tracks of a Tracker3 or Tracker4 node into pins (single point roto shapes)
+
+        collect() reads the tracks out of Nuke into BakedShape records, one bvfx_bake_job()
+        job each in `jobs`, commit() creates the pins and writes the baked results into the SplineWarp
+
+    Args:
+        trackNode (node): origin Tracker node
+        fRange (TYPE): framerange to convert
+        fullbake (bool, optional): keep a keyframe on every frame
+        tolerance (float, optional): pixel distance allowed when removing keyframes, see bvfx_reduce_keys()
+        smart (bool, optional): only sample the tracks keyframes, see bvfx_tracker_keyframes()
+        cache (SampleCache, optional): reuse and store the baked samples, see SampleCache
+        decimate (float, optional): drop the pins following another one within this pixel distance,
+            see bvfx_decimate_pins()
+    """
+    pinned = True  # every track is a pin
+
+    def __init__(self, trackNode, fRange, fullbake=False, tolerance=0.0, smart=False, cache=None, decimate=0.0):
+        self.node = trackNode
+        self.fRange = fRange
+        self.fullbake = fullbake
+        self.tolerance = tolerance
+        self.smart = smart
+        self.cache = cache
+        self.decimate = decimate
+        self.jobs = []
+        self.numbers = []
+        self.baked = []  # BakedShape per job
+        self.cacheKeys = []  # fingerprint to store in the cache per job, None when read from it
+        self.tempRotoNode = None
+        self.only = None  # element names to convert, all when None
+        self.created = {}  # element name -> warp shape names
+        self.frames = None  # frames of the current chunk, the whole range when None
+        self.append = False  # write the chunk keys into the pins of a previous chunk
+
+    def fingerprints(self):
+        """ Returns: dict: element name -> fingerprint, see bvfx_tracker_fingerprints() """
+        settings = (str(self.fRange), self.fullbake, self.tolerance, self.smart, self.decimate)
+        return bvfx_tracker_fingerprints(self.node, settings)
+
+    def planned(self):
+        """ Returns: dict: element name -> the warp shape names the conversion creates """
+        names = ["track%s" % c[0] for c in bvfx_tracker_channels(self.node)]
+        return dict((n, ["%s_%s" % (self.node.name(), n)]) for n in names if self.only is None or n in self.only)
+
+    def collect(self, task):
+        self.jobs, self.numbers, self.baked, self.cacheKeys = [], [], [], []
+        # NEED to create on a roto node, otherwise the AB attribute thing wont work
+        self.tempRotoNode = nuke.createNode('Roto')
+        task.advance(0, 'Reading tracks')
+        frames = list(self.fRange) if self.frames is None else list(self.frames)
+        rangeCount = len(frames)
+        keyframes = None
+        if self.smart:
+            keyframes = bvfx_tracker_keyframes(self.node, frames)
+            frames = sorted(set(f for k in keyframes.values() for f in k))
+        rangeFrames = array.array('i', frames)
+        numbers = [c[0] for c in bvfx_tracker_channels(self.node)]
+        numbers = [n for n in numbers if self.only is None or "track%s" % n in self.only]
+        task.total = max(len(numbers), 1)
+
+        def track_frames(number):
+            return rangeFrames if keyframes is None else array.array('i', keyframes[number])
+
+        cached = {}
+        cacheKeys = {}
+        if self.cache is not None:
+            with bvfx_profiler.phase("cache_read", self.node.name()):
+                cacheKeys = bvfx_tracker_fingerprints(self.node, None)
+                for number in numbers:
+                    pins = self.cache.get(cacheKeys["track%s" % number], track_frames(number))
+                    if pins:
+                        cached[number] = pins[0]
+
+        samples = {}
+        if len(cached) < len(numbers):
+            with bvfx_profiler.phase("sample", self.node.name()):
+                sampled, buffer = bvfx_tracker_samples(self.node, frames)
+            samples = dict(zip(sampled, buffer))
+        position = dict((f, i) for i, f in enumerate(frames))
+        for number in numbers:
+            trackFrames = track_frames(number)
+            baked = BakedShape("%s_track%s" % (self.node.name(), number), trackFrames)
+            if number in cached:
+                baked.pins.append(BakedPin(trackFrames, *cached[number]))
+                self.cacheKeys.append(None)
+            else:
+                track = samples[number]
+                baked.add([track[position[f]][0] for f in trackFrames], [track[position[f]][1] for f in trackFrames])
+                # a chunk never replaces the whole range samples
+                self.cacheKeys.append(cacheKeys.get("track%s" % number) if self.frames is None else None)
+            self.numbers.append(number)
+            self.baked.append(baked)
+            # the smart keys interpolate like the source ones, every one of them is kept
+            self.jobs.append(baked.job(self.fullbake or len(trackFrames) < rangeCount, self.tolerance))
+
+    def commit(self, warpNode, results, task):
+        task.total = max(len(self.baked), 1)
+        warpRoot = warpNode['curves'].rootLayer
+        rotoCurve = self.tempRotoNode['curves']
+        warpIndex = CurvesIndex(warpNode) if self.append else None
+        for number, baked, cacheKey, result in zip(self.numbers, self.baked, self.cacheKeys, results):
+            baked.update(result)
+            if cacheKey is not None:
+                with bvfx_profiler.phase("cache_write", self.node.name(), baked.name):
+                    self.cache.put(cacheKey, baked.frames, [(p.xs, p.ys) for p in baked.pins])
+            pin = baked.pins[0]
+            # ---------------------------------------------------------- #
+            if task.advance(1, 'Converting tracker ' + str(number)):
+                break
+            # ---------------------------------------------------------- #
+            if self.append:
+                # the pin is already on the warp, add the chunk keys
+                with bvfx_profiler.phase("keys", self.node.name(), baked.name):
+                    point = warpIndex.element(self.created["track%s" % number][0])[0]
+                    bvfx_commit_keys(point.center, pin.frames, pin.xs, pin.ys, pin.keep, span=True,
+                                     tolerance=self.tolerance)
+                continue
+            if baked.dropped:
+                self.created["track%s" % number] = []
+                continue
+            newPointShape = rp.Shape(rotoCurve, type="bspline")
+            newPoint = rp.ShapeControlPoint(0, 0)
+            newPointShape.name = baked.name
+
+            with bvfx_profiler.phase("keys", self.node.name(), newPointShape.name):
+                bvfx_commit_keys(newPoint.center, pin.frames, pin.xs, pin.ys, pin.keep,
+                                 tolerance=self.tolerance)
+
+            with bvfx_profiler.phase("insert", self.node.name(), newPointShape.name):
+                shapeattr = newPointShape.getAttributes()
+                shapeattr.add("ab", 1.0)
+                newPointShape.append(newPoint)
+                warpRoot.insert(0, newPointShape)
+                bvfx_profiler.count("insert")
+                self.created["track%s" % number] = [newPointShape.name]
+
+    def cleanup(self):
+        if self.tempRotoNode is not None:
+            nuke.delete(self.tempRotoNode)
+            self.tempRotoNode = None
+
+
+class RotoConversion(object):
+    """ Converts the shapes of a Roto or Rotopaint node, baking all their transforms
+        It will: ignore feather and bezier handles
+
+        collect() samples a copy of the node into BakedShape records, one bvfx_bake_job()
+        job each in `jobs`, commit() creates the pins (or moves the shapes) and writes
+        the baked results into the SplineWarp
+
+    Args:
+        rotoNode (node): origin Roto node
+        fRange (TYPE): framerange to convert
+        breakintopin (bool, optional): Will convert the shape into individual points
+        fullbake (bool, optional): keep a keyframe on every frame
+        tolerance (float, optional): pixel distance allowed when removing keyframes, see bvfx_reduce_keys()
+        smart (bool, optional): only sample where the shapes or their transforms change, see bvfx_smart_frames()
+        cache (SampleCache, optional): reuse and store the baked samples, see SampleCache
+        decimate (float, optional): with breakintopin, drop the pins following another one within this
+            pixel distance, see bvfx_decimate_pins()
+    """
+
+    def __init__(self, rotoNode, fRange, breakintopin=False, fullbake=False, tolerance=0.0, smart=False,
+                 cache=None, decimate=0.0):
+        self.node = rotoNode
+        self.fRange = fRange
+        self.breakintopin = breakintopin
+        self.pinned = breakintopin
+        self.fullbake = fullbake
+        self.tolerance = tolerance
+        self.smart = smart
+        self.cache = cache
+        self.decimate = decimate if breakintopin else 0.0
+        self.jobs = []
+        self.baked = []  # BakedShape per job
+        self.cacheKeys = []  # fingerprint to store in the cache per job, None when read from it
+        self.tempRotoNode = None
+        self.copier = None
+        self.only = None  # element names to convert, all when None
+        self.created = {}  # element name -> warp shape names
+        self.frames = None  # frames of the current chunk, the whole range when None
+        self.append = False  # write the chunk keys into the shapes of a previous chunk
+
+    def fingerprints(self):
+        """ Returns: dict: element name -> fingerprint, see bvfx_roto_fingerprints() """
+        settings = (str(self.fRange), self.breakintopin, self.fullbake, self.tolerance, self.smart, self.decimate)
+        return bvfx_roto_fingerprints(self.node, settings)
+
+    def planned(self):
+        """ Returns: dict: element name -> the warp shape names the conversion creates """
+        planned = {}
+        for shape in CurvesIndex(self.node).shapes():
+            if self.only is None or shape.name in self.only:
+                planned[shape.name] = (["%s_PIN[%s]" % (shape.name, pt) for pt in range(1, len(shape) + 1)]
+                                       if self.breakintopin else [shape.name])
+        return planned
+
+    def collect(self, task):
+        rotoNode = self.node
+        self.jobs, self.baked, self.cacheKeys = [], [], []
+        # since were are manipulating shapes in place, create a node copy
+        with bvfx_profiler.phase("copy", rotoNode.name()):
+            if self.copier is None:
+                self.copier = NodeCopier(rotoNode)
+            self.tempRotoNode = self.copier.copy()  # this is essential to the execution
+
+        cacheKeys = {}
+        if self.cache is not None:
+            with bvfx_profiler.phase("cache_read", rotoNode.name()):
+                cacheKeys = bvfx_roto_fingerprints(rotoNode, None)
+
+        index = CurvesIndex(self.tempRotoNode)
+        transformCache = TransformCache(index, self.fRange if self.frames is None else self.frames)
+        rangeFrames = array.array('i', transformCache.frames)
+        task.total = max(len(index), 1)
+
+        for shape in index.pairs((CurvesIndex.SHAPE, CurvesIndex.LAYER)):
+            if task.isCancelled():
+                break
+            if index.kind(shape[0]) == CurvesIndex.SHAPE and (self.only is None or shape[0].name in self.only):
+                pt = 1  # counter
+
+                # ---------------------------------------------------------- #
+                subtask = task.child('Converting ' + shape[0].name, len(shape[0]))
+                # ---------------------------------------------------------- #
+
+                baked = BakedShape(shape[0].name, rangeFrames, shape[0])
+                if self.smart:
+                    with bvfx_profiler.phase("smart", rotoNode.name(), shape[0].name):
+                        frames, baked.matrices = self.smart_frames(shape[0], index, transformCache)
+                        baked.frames = array.array('i', frames)
+                frames = baked.frames
+                # the smart keys interpolate like the source ones, every one of them is kept
+                fullbake = self.fullbake or len(frames) < len(rangeFrames)
+                cacheKey = cacheKeys.get(shape[0].name)
+                if cacheKey is not None:
+                    with bvfx_profiler.phase("cache_read", rotoNode.name(), shape[0].name):
+                        pins = self.cache.get(cacheKey, frames)
+                    if pins is not None and len(pins) == len(shape[0]):
+                        # already transformed, the bake job only reduces the keys
+                        baked.pins = [BakedPin(frames, xs, ys) for xs, ys in pins]
+                        baked.matrices = None
+                        self.baked.append(baked)
+                        self.cacheKeys.append(None)
+                        self.jobs.append(baked.job(fullbake, self.tolerance))
+                        task.advance(1)
+                        continue
+
+                with bvfx_profiler.phase("sample", rotoNode.name(), shape[0].name):
+                    for points in shape[0]:
+                        if subtask.advance(0, 'pt %s of %s' % (pt, len(shape[0]))):
+                            break
+                        # ===============================================================
+                        # sample the source curves once per frame
+                        # ===============================================================
+                        curvex = points.center.getPositionAnimCurve(0)
+                        curvey = points.center.getPositionAnimCurve(1)
+                        baked.add([curvex.evaluate(f) for f in frames], [curvey.evaluate(f) for f in frames])
+                        subtask.advance(1)
+                        pt += 1
+                    bvfx_profiler.count("evaluate", 2 * len(frames) * len(baked.pins))
+
+                # ===============================================================
+                # the shape and layers transforms, applied by the bake job
+                # ===============================================================
+                if baked.pins and baked.matrices is None:
+                    with bvfx_profiler.phase("transforms", rotoNode.name(), shape[0].name):
+                        baked.matrices = transformCache.shape_matrices(shape[0], shape[1])
+
+                self.baked.append(baked)
+                # only complete shapes over the whole range go into the cache
+                complete = self.frames is None and len(baked.pins) == len(shape[0])
+                self.cacheKeys.append(cacheKey if complete else None)
+                self.jobs.append(baked.job(fullbake, self.tolerance))
+
+            task.advance(1)
+
+    def smart_frames(self, shape, index, transformCache):
+        """ The frames a smart bake samples for a shape, see bvfx_smart_frames()
+
+        Returns:
+            tuple: (frames, matrices at those frames)
+        """
+        rangeFrames = transformCache.frames
+        curves = []
+        for point in shape:
+            curves += [point.center.getPositionAnimCurve(0), point.center.getPositionAnimCurve(1)]
+        animated = bvfx_transform_curves(shape.getTransform())
+        for layer in index.chain(shape):
+            animated += bvfx_transform_curves(layer.getTransform())
+        frames = bvfx_smart_frames(rangeFrames, curves, animated)
+        if len(frames) == len(rangeFrames):
+            return rangeFrames, transformCache.shape_matrices(shape, index.parent(shape))
+        matrices = transformCache.shape_matrices(shape, index.parent(shape), frames)
+        extra = bvfx_smart_fallback(rangeFrames, frames, matrices)
+        if extra:
+            frames = sorted(frames + extra)
+            matrices = transformCache.shape_matrices(shape, index.parent(shape), frames)
+        return frames, matrices
+
+    def commit(self, warpNode, results, task):
+        rotoNode = self.node
+        task.total = max(len(self.baked), 1)
+        warpRoot = warpNode['curves'].rootLayer
+        warpIndex = CurvesIndex(warpNode) if self.append else None
+        for baked, cacheKey, result in zip(self.baked, self.cacheKeys, results):
+            baked.update(result)
+            shape = baked.source
+            if cacheKey is not None:
+                with bvfx_profiler.phase("cache_write", rotoNode.name(), shape.name):
+                    self.cache.put(cacheKey, baked.frames, [(p.xs, p.ys) for p in baked.pins])
+            if self.append:
+                # the shapes are already on the warp, add the chunk keys
+                names = self.created[shape.name]
+                if self.breakintopin:
+                    points = [warpIndex.element(name)[0] for name in names]
+                else:
+                    points = list(warpIndex.element(names[0]))
+                with bvfx_profiler.phase("keys", rotoNode.name(), shape.name):
+                    for point, pin in zip(points, baked.pins):
+                        bvfx_commit_keys(point.center, pin.frames, pin.xs, pin.ys, pin.keep, span=True,
+                                         tolerance=self.tolerance)
+                if task.advance(1, 'Writing ' + shape.name):
+                    break
+                continue
+            # ===============================================================
+            # the Nuke points: new pins or the shape own points
+            # ===============================================================
+            if self.breakintopin:
+                newPoints = [None if i in baked.dropped else rp.ShapeControlPoint(0, 0)
+                             for i, pin in enumerate(baked.pins)]
+            else:
+                newPoints = [points for points, pin in zip(shape, baked.pins)]
+            # ===============================================================
+            # write the final keys, keys outside the range are dropped on the way
+            # ===============================================================
+            with bvfx_profiler.phase("keys", rotoNode.name(), shape.name):
+                for newPoint, pin in zip(newPoints, baked.pins):
+                    if newPoint is not None:
+                        bvfx_commit_keys(newPoint.center, pin.frames, pin.xs, pin.ys, pin.keep,
+                                         tolerance=self.tolerance)
+
+            with bvfx_profiler.phase("insert", rotoNode.name(), shape.name):
+                created = self.created.setdefault(shape.name, [])
+                if self.breakintopin:
+                    for pt, newPoint in enumerate(newPoints, 1):
+                        if newPoint is None:  # decimated
+                            continue
+                        newPointShape = rp.Shape(
+                            self.tempRotoNode['curves'], type="bspline")
+                        newPointShape.name = "%s_PIN[%s]" % (
+                            shape.name, str(pt))
+                        newPointShape.append(newPoint)
+                        shapeattr = newPointShape.getAttributes()
+                        shapeattr.add("ab", 1.0)
+                        warpRoot.insert(0, newPointShape)
+                        created.append(newPointShape.name)
+                    bvfx_profiler.count("insert", len(newPoints) - len(baked.dropped))
+                else:
+                    shape.getAttributes().add("ab", 1.0)
+                    # the points now hold the transforms baked in
+                    transf = shape.getTransform()
+                    transf.reset()
+                    # ===========================================================================
+                    # fix the curve Extramatrix for the range of the conversion
+                    # ===========================================================================
+                    identmatrix = [(0, 0, 1), (0, 1, 0), (0, 2, 0), (0, 3, 0), (1, 0, 0), (1, 1, 1), (1, 2, 0), (
+                        1, 3, 0), (2, 0, 0), (2, 1, 0), (2, 2, 1), (2, 3, 0), (3, 0, 0), (3, 1, 0), (3, 2, 0), (3, 3, 1)]
+                    for m in identmatrix:
+                        curve = transf.getExtraMatrixAnimCurve(m[0], m[1])
+                        curve.removeAllKeys()
+                        curve.addKey(self.fRange.first(), m[2])
+                        curve.removeAllKeys()
+                    # ===========================================================================
+                    # move shapes to new home
+                    # ===========================================================================
+                    warpRoot.insert(0, shape)
+                    bvfx_profiler.count("insert")
+                    created.append(shape.name)
+
+            if task.advance(1, 'Writing ' + shape.name):
+                break
+
+    def cleanup(self):
+        if self.tempRotoNode is not None:
+            nuke.delete(self.tempRotoNode)
+            self.tempRotoNode = None
+
+
+def bvfx_run_conversions(conversions, warpNode, progress=None, workers=None, pool=None):
+    """ Runs Roto/Tracker conversions into a SplineWarp node in three steps: everything is read
+        out of Nuke, the bake jobs of all the nodes run together on a pool (see bvfx_run_jobs())
+        and the results are written back on this thread, in the nodes and shapes order
+
+    Args:
+        conversions (list): RotoConversion and TrackerConversion
+        warpNode (node): destination SplineWarp node
+        progress (BvfxProgress, optional): progress to nest into, a new one when None
+        workers (int, optional): see bvfx_run_jobs()
+        pool (str, optional): see bvfx_run_jobs()
+
+    Returns:
+        dict: the pin decimation report, see bvfx_decimate_conversions(), None without decimation.
+            A cancel shows on the progress (BvfxProgress.cancelled), the nodes after it are not written
+    """
+    own = progress is None
+    report = None
+    if own:
+        progress = BvfxProgress('Converting to Splinewarp', len(conversions))
+    # every node is read before any is written, each one takes half a unit of the progress
+    # while it is read and the other half while it is written, created as they start
+    try:
+        for conversion in conversions:
+            conversion.collect(progress.child('Reading %s' % conversion.node.name(), weight=0.5))
+            if progress.advance(0.5):
+                return None  # cancelled, nothing baked or written
+
+        jobs = [job for conversion in conversions for job in conversion.jobs]
+        with bvfx_profiler.phase("bake"):
+            results = bvfx_run_jobs(jobs, workers, pool)
+        if any(c.pinned and c.decimate > 0 for c in conversions):
+            with bvfx_profiler.phase("decimate"):
+                report = bvfx_decimate_conversions(conversions, results)
+
+        start = 0
+        for conversion in conversions:
+            count = len(conversion.jobs)
+            conversion.commit(warpNode, results[start:start + count],
+                              progress.child('Converting %s to Splinewarp' % conversion.node.name(), weight=0.5))
+            start += count
+            if progress.advance(0.5):
+                break  # cancelled, the rest of the nodes is not written
+    finally:
+        for conversion in conversions:
+            conversion.cleanup()
+        if own:
+            progress.finish()
+    return report
+
+
+def bvfx_decimate_conversions(conversions, results):
+    """ Decimates the baked pins of the tracker and break into pins conversions together, so a
+        track sitting on a roto point is dropped too (see bvfx_decimate_pins()), before the commit
+
+    Args:
+        conversions (list): RotoConversion and TrackerConversion, collected
+        results (list): bvfx_bake_job() results of all their jobs, in order
+
+    Returns:
+        dict: "pins" compared, "kept", "dropped" and the "max_error" in pixels the dropped ones introduce
+    """
+    distance = max(c.decimate for c in conversions if c.pinned)
+    pins = []  # (baked, pin index)
+    trajectories = []
+    start = 0
+    for conversion in conversions:
+        count = len(conversion.jobs)
+        if conversion.pinned and conversion.decimate > 0:
+            for baked, (xs, ys, keeps) in zip(conversion.baked, results[start:start + count]):
+                for i, (pxs, pys) in enumerate(zip(xs, ys)):
+                    pins.append((baked, i))
+                    trajectories.append((baked.frames, pxs, pys))
+        start += count
+
+    kept, dropped = bvfx_decimate_pins(trajectories, distance)
+    for i in dropped:
+        baked, index = pins[i]
+        baked.dropped.add(index)
+    maxError = max([error for k, error in dropped.values()] or [0.0])
+    log.info("Pin decimation: kept %s of %s pins, max error %.3f px" % (len(kept), len(pins), maxError))
+    return {"pins": len(pins), "kept": len(kept), "dropped": len(dropped), "max_error": maxError}
+
+
+def bvfx_frame_chunks(frames, size):
+    """ Splits frames into consecutive chunks of `size` frames, every frame is in exactly one chunk
+
+    Returns:
+        list: lists of frames
+    """
+    frames = list(frames)
+    return [frames[i:i + size] for i in range(0, len(frames), size)] if size > 0 else [frames]
+
+
+def bvfx_stream_conversions(conversions, warpNode, chunk, workers=None, key=None, resume=None):
+    """ Runs conversions over consecutive chunks of frames, each chunk goes through the whole
+        sample, transform, reduce and commit pipeline (see bvfx_run_conversions()) before the next
+        one is read, so the memory held is bound by the chunk size and not the range.
+
+        The first chunk creates the shapes, the next ones add their keys to them. Every finished
+        chunk is checkpointed on the warp node, a cancelled or crashed (then autosaved) conversion
+        resumes from the last finished chunk. Each chunk is baked from the last frame of the
+        previous one, which is always a key, so the reduction carries over the edge without
+        forcing two keys there. A chunk only replaces the keys inside its own frames, the edge
+        key is rewritten with the same value, so redoing one never leaves duplicated keys.
+
+    Args:
+        conversions (list): RotoConversion and TrackerConversion sharing the same framerange
+        warpNode (node): destination SplineWarp node
+        chunk (int): frames per chunk
+        workers (int, optional): see bvfx_run_jobs()
+        key (str, optional): identifies the conversion, a checkpoint with another key is not resumed
+        resume (dict, optional): the checkpoint to resume from, see bvfx_read_checkpoint()
+
+    Returns:
+        bool: True once every chunk is committed, False when cancelled
+    """
+    chunks = bvfx_frame_chunks(conversions[0].fRange, chunk)
+    done = None
+    if resume:
+        done = resume.get("done")
+        created = resume.get("created", {})
+        if done is None:  # interrupted on the first chunk, start over
+            bvfx_remove_elements(warpNode, bvfx_warp_names(n for c in created.values() for e in c.values() for n in e))
+        else:
+            for conversion in conversions:
+                conversion.created = dict(created.get(conversion.node.name(), {}))
+            log.info("%s: resuming after frame %s" % (warpNode.name(), done))
+
+    progress = BvfxProgress('Converting to Splinewarp', len(chunks))
+    try:
+        for frames in chunks:
+            if done is not None and frames[-1] <= done:
+                progress.advance(1)
+                continue
+            if done is None:
+                # the names go first, so an interrupted first chunk can be cleaned up
+                planned = dict((c.node.name(), c.planned()) for c in conversions)
+                bvfx_write_checkpoint(warpNode, {"key": key, "done": None, "created": planned})
+            for conversion in conversions:
+                conversion.frames = frames if done is None else [done] + frames
+                conversion.append = done is not None
+            step = progress.child('Frames %s-%s' % (frames[0], frames[-1]), len(conversions))
+            with bvfx_profiler.phase("chunk"):
+                bvfx_run_conversions(conversions, warpNode, step, workers)
+            if progress.cancelled:
+                return False
+            done = frames[-1]
+            bvfx_write_checkpoint(warpNode, {"key": key, "done": done,
+                                             "created": dict((c.node.name(), c.created) for c in conversions)})
+            progress.advance(1)
+    finally:
+        for conversion in conversions:
+            conversion.frames = None
+            conversion.append = False
+        progress.finish()
+    return True
+
+
+def convert_trackernodes(trackNode, warpNode, fRange, fullbake=False, tolerance=0.0, progress=None,
+                         workers=None, smart=False, decimate=0.0):
+    """ Convert Trackers into Pins (single point roto points) into a a Splinewarp node
+        works with both Tracker3 or Track4 classes
+    Args:
+        trackNode (TYPE): origin Tracker node
+        warpNode (TYPE): destination SplineWarp node
+        fRange (TYPE): framerange to convert
+        fullbake (bool, optional): keep a keyframe on every frame
+        tolerance (float, optional): pixel distance allowed when removing keyframes, see bvfx_reduce_keys()
+        progress (BvfxProgress, optional): progress to nest into, a new one when None
+        workers (int, optional): bake pool size, see bvfx_run_jobs()
+        smart (bool, optional): only sample the tracks keyframes, see bvfx_tracker_keyframes()
+        decimate (float, optional): drop the tracks following another one within this pixel distance
+
+    Returns:
+        dict: the decimation report, see bvfx_decimate_conversions()
+    """
+    return bvfx_run_conversions([TrackerConversion(trackNode, fRange, fullbake, tolerance, smart, decimate=decimate)],
+                                warpNode, progress, workers)
+
+
+def convert_rotonodes(rotoNode, warpNode, fRange, breakintopin=False, fullbake=False, tolerance=0.0,
+                      progress=None, workers=None, smart=False, decimate=0.0):
+    """Convert a Roto or Rotopaint node into a Splinewarp node
+        It will: bake all the transforms on the rotoshapes
+        It will: ignore feather and bezier handles
+
+    Args:
+        rotoNode (TYPE): origin Roto node
+        warpNode (TYPE): destination SplineWarp node
+        fRange (TYPE): framerange to convert
+        breakintopin (bool, optional): Will convert the shape into individual points
+        fullbake (bool, optional): keep a keyframe on every frame
+        tolerance (float, optional): pixel distance allowed when removing keyframes, see bvfx_reduce_keys()
+        progress (BvfxProgress, optional): progress to nest into, a new one when None
+        workers (int, optional): bake pool size, see bvfx_run_jobs()
+        smart (bool, optional): only sample where the shapes change, see bvfx_smart_frames()
+        decimate (float, optional): with breakintopin, drop the pins following another one within
+            this pixel distance
+
+    Returns:
+        dict: the decimation report, see bvfx_decimate_conversions()
+    """
+    return bvfx_run_conversions([RotoConversion(rotoNode, fRange, breakintopin, fullbake, tolerance, smart,
+                                                decimate=decimate)], warpNode, progress, workers)
+
+
+def bvfx_sync_conversions(conversions, warpNode, workers=None, chunk=0):
+    """ Runs conversions into a splinewarp node that already holds a previous conversion of
+        the same sources: only new or changed shapes/tracks are baked and swapped in, the ones
+        gone from the sources are removed, everything else is left untouched.
+        Sources that were not converted again keep their shapes too.
+
+        With a chunk size the range is streamed (see bvfx_stream_conversions()), an interrupted
+        streamed conversion of the same sources and options resumes where it stopped.
+
+    Args:
+        conversions (list): RotoConversion and TrackerConversion
+        warpNode (node): splinewarp3 node, see bvfx_read_sources()
+        workers (int, optional): see bvfx_run_jobs()
+        chunk (int, optional): frames per chunk, 0 converts the whole range at once
+
+    Returns:
+        dict: "converted", "removed" and "unchanged" element counts, "complete" is False
+            when a streamed conversion was cancelled, "decimation" see bvfx_decimate_conversions()
+    """
+    sources = bvfx_read_sources(warpNode)
+    checkpoint = bvfx_read_checkpoint(warpNode)
+    stale = set()
+    fingerprints = []
+    stats = {"converted": 0, "removed": 0, "unchanged": 0, "complete": True, "decimation": None}
+    for conversion in conversions:
+        current = conversion.fingerprints()
+        stored = sources.get(conversion.node.name(), {})
+        conversion.only = set(k for k, v in current.items() if k not in stored or stored[k][0] != v)
+        # the shapes of an interrupted streamed conversion are incomplete whatever their source
+        conversion.only.update(set(checkpoint.get("created", {}).get(conversion.node.name(), {})) & set(current))
+        gone = set(stored) - set(current)
+        for name in conversion.only | gone:
+            stale.update(bvfx_warp_names(stored.get(name, [None, []])[1]))
+        stats["converted"] += len(conversion.only)
+        stats["removed"] += len(gone)
+        stats["unchanged"] += len(current) - len(conversion.only)
+        fingerprints.append(current)
+
+    pending = [c for c in conversions if c.only]
+    streamed = pending and chunk > 0 and len(bvfx_frame_chunks(pending[0].fRange, chunk)) > 1
+    if streamed and any(c.pinned and c.decimate > 0 for c in pending):
+        log.warning("Pin decimation compares the whole range trajectories, converting without chunks")
+        streamed = False
+    key = None
+    if streamed:
+        key = bvfx_fingerprint(chunk, [(c.node.name(), sorted(c.only), sorted(current.items()))
+                                       for c, current in zip(conversions, fingerprints)])
+    resume = checkpoint if checkpoint and checkpoint.get("key") == key else None
+    if resume is not None and resume.get("done") is not None:
+        # the shapes to carry on must still be there under their names, a freeze renames them
+        index = CurvesIndex(warpNode)
+        if any(index.element(n) is None for c in resume.get("created", {}).values() for e in c.values() for n in e):
+            log.info("%s: shapes renamed since the interrupted conversion, converting from the start" % warpNode.name())
+            resume = None
+    if resume is None:
+        # another conversion was interrupted on this warp, drop what it left behind
+        stale.update(bvfx_warp_names(n for c in checkpoint.get("created", {}).values() for e in c.values() for n in e))
+        bvfx_remove_elements(warpNode, stale)
+    # else: the interrupted run already removed the stale shapes, the ones left are being streamed
+
+    if streamed:
+        if not bvfx_stream_conversions(pending, warpNode, chunk, workers, key, resume):
+            stats["complete"] = False
+            return stats
+    else:
+        progress = BvfxProgress('Converting to Splinewarp', len(pending))
+        try:
+            stats["decimation"] = bvfx_run_conversions(pending, warpNode, progress, workers)
+        finally:
+            progress.finish()
+        if progress.cancelled:
+            stats["complete"] = False
+            return stats
+    bvfx_write_checkpoint(warpNode, None)
+
+    for conversion, current in zip(conversions, fingerprints):
+        stored = sources.get(conversion.node.name(), {})
+        entry = {}
+        for name, fingerprint in current.items():
+            if name in conversion.created:
+                entry[name] = [fingerprint, conversion.created[name]]
+            elif name not in conversion.only:
+                entry[name] = stored[name]
+        sources[conversion.node.name()] = entry
+    bvfx_write_sources(warpNode, sources)
+    return stats
+
+
+def convert_into_splinewarp(nodeList, fRange=None, breakintopin=False, fullbake=False, tolerance=0.0,
+                            workers=None, warpNode=None, smart=False, cache=None, chunk=None, decimate=0.0):
+    """ Convert Roto, RotoPaint and Tracker nodes into a new SplineWarp3 node
+        Without a framerange it asks for the options on a panel, otherwise it runs without
+        any dialog, ie: from batch conversions
+
+        Every shape and track is fingerprinted on the resulting node, passing that node back
+        as `warpNode` only rebakes what changed on the sources since (see bvfx_sync_conversions())
+
+    Args:
+        nodeList (list): Roto, RotoPaint, Tracker3 or Tracker4 nodes
+        fRange (TYPE, optional): framerange to convert, nuke.FrameRange or "first-last" string
+        breakintopin (bool, optional): Will convert the shapes into individual points
+        fullbake (bool, optional): keep a keyframe on every frame
+        tolerance (float, optional): pixel distance allowed when removing keyframes, see bvfx_reduce_keys()
+        workers (int, optional): bake pool size, see bvfx_run_jobs()
+        warpNode (node, optional): a SplineWarp3 from a previous conversion to update in place
+        smart (bool, optional): only sample the frames where the sources change, see bvfx_smart_frames()
+        cache (TYPE, optional): reuse baked samples across conversions, True for the cache next to the
+            script, a directory path or a SampleCache, see bvfx_sample_cache()
+        chunk (int, optional): stream the range in chunks of frames, BVFX_CHUNK when None, 0 converts
+            the whole range at once, see bvfx_stream_conversions()
+        decimate (float, optional): drop the pins (tracks and broken into pins shapes) following another
+            pin within this pixel distance over the whole range, see bvfx_decimate_pins()
+
+    Returns:
+        node: the resulting SplineWarp3 node, None when cancelled (the panel or the conversion,
+            a cancelled conversion leaves its partial node to resume from)
+    """
+    if fRange is None:
+        # ===========================================================================
+        # panel setup
+        # ===========================================================================
+        p = nukescripts.panels.PythonPanel("Convert to Splinewarp")
+        k = nuke.String_Knob("framerange", "FrameRange")
+        k.setFlag(nuke.STARTLINE)
+        k.setTooltip(
+            "Set the framerange to convert, by default its the project start-end. Example: 10-20")
+        p.addKnob(k)
+        k.setValue("%s-%s" % (nuke.root().firstFrame(), nuke.root().lastFrame()))
+        k = nuke.Boolean_Knob("pin", "Break into Pin Points")
+        k.setFlag(nuke.STARTLINE)
+        k.setTooltip("This will break all the shapes into single points")
+        p.addKnob(k)
+        k = nuke.Double_Knob("decimate", "Pin Decimation")
+        k.setFlag(nuke.STARTLINE)
+        k.setTooltip("Pixel distance: pins (tracks or broken into pins shapes) that stay this close to another "
+                     "pin on every frame are left out. 0 keeps them all")
+        p.addKnob(k)
+        k = nuke.Boolean_Knob("fullbake", "Full bake")
+        k.setFlag(nuke.STARTLINE)
+        k.setTooltip("Adds keyframes on all frames inside the range")
+        p.addKnob(k)
+        k = nuke.Double_Knob("tolerance", "Key Tolerance")
+        k.setFlag(nuke.STARTLINE)
+        k.setTooltip(
+            "Pixel distance allowed when removing baked keyframes, 0 only removes repeated keyframes. Ignored on Full bake")
+        p.addKnob(k)
+        k = nuke.Boolean_Knob("smart", "Smart bake")
+        k.setFlag(nuke.STARTLINE)
+        k.setTooltip("Only samples the source keyframes and the range ends, every frame where the shapes "
+                     "transforms or layers animate or an expression drives them")
+        p.addKnob(k)
+        k = nuke.Boolean_Knob("cache", "Sample cache")
+        k.setFlag(nuke.STARTLINE)
+        k.setTooltip("Keeps the baked samples in a <script>.bvfxcache folder next to the saved script, "
+                     "converting the same shapes/tracks again reads them back instead of sampling")
+        p.addKnob(k)
+        k = nuke.Int_Knob("chunk", "Chunk Frames")
+        k.setFlag(nuke.STARTLINE)
+        k.setValue(BVFX_CHUNK)
+        k.setTooltip("Converts the range in chunks of this many frames, a cancelled conversion resumes from "
+                     "the last finished chunk when run again with the resulting Splinewarp. 0 converts all at once")
+        p.addKnob(k)
+        k = nuke.Text_Knob("estimate", "Estimate", "")
+        k.setFlag(nuke.STARTLINE)
+        p.addKnob(k)
+        analyses = [bvfx_analyze_sources(_) for _ in nodeList
+                    if _.Class() in ('Roto', 'RotoPaint', 'Tracker3', 'Tracker4')]
+
+        # main() freezes a new warp next, an updated one only gets its new shapes frozen when it was
+        freeze = warpNode is None or warpNode.knob('fframe') is not None
+        static = warpNode is not None and warpNode.knob('fmode') is not None and warpNode['fmode'].value() == 'static'
+
+        def estimate(knob=None):
+            knobs = p.knobs()
+            try:
+                result = bvfx_estimate(analyses, knobs["framerange"].getText(), knobs["pin"].value(),
+                                       knobs["fullbake"].value(), knobs["tolerance"].value(), knobs["smart"].value(),
+                                       freeze=freeze, static=static, decimate=knobs["decimate"].value())
+            except Exception:  # the framerange is being typed
+                return
+            knobs["estimate"].setValue("\n".join(bvfx_format_estimate(result)))
+        p.knobChanged = estimate
+        estimate()
+        result = p.showModalDialog()
+        # ===========================================================================
+
+        if result == 0:
+            return  # Canceled
+        try:
+            fRange = nuke.FrameRange(p.knobs()["framerange"].getText())
+        except:
+            raise ValueError(
+                'Framerange format is not correct, use startframe-endframe i.e.: 0-200')
+
+        breakintopin = p.knobs()["pin"].value()
+        fullbake = p.knobs()["fullbake"].value()
+        tolerance = p.knobs()["tolerance"].value()
+        smart = p.knobs()["smart"].value()
+        cache = p.knobs()["cache"].value()
+        chunk = int(p.knobs()["chunk"].value())
+        decimate = p.knobs()["decimate"].value()
+
+    elif not isinstance(fRange, nuke.FrameRange):
+        fRange = nuke.FrameRange(str(fRange))
+
+    cache = bvfx_sample_cache(cache)
+    chunk = BVFX_CHUNK if chunk is None else chunk
+    conversions = []
+    for _ in nodeList:
+        if _.Class() in ('Roto', 'RotoPaint'):
+            conversions.append(RotoConversion(_, fRange, breakintopin, fullbake, tolerance, smart, cache, decimate))
+
+        if _.Class() in ('Tracker3', 'Tracker4'):
+            conversions.append(TrackerConversion(_, fRange, fullbake, tolerance, smart, cache, decimate))
+
+    if warpNode is not None:
+        # ===========================================================================
+        # incremental update of a previous conversion
+        # ===========================================================================
+        stats = bvfx_sync_conversions(conversions, warpNode, workers, chunk)
+        log.info("%s updated: %s converted, %s removed, %s unchanged" % (
+            warpNode.name(), stats["converted"], stats["removed"], stats["unchanged"]))
+        if cache is not None:
+            log.info("Sample cache: %s hits, %s misses" % (cache.hits, cache.misses))
+            cache.evict()
+        if not stats["complete"]:
+            log.warning("%s: conversion cancelled, run it again on this node to resume" % warpNode.name())
+            return None
+        if warpNode.knob('fframe') is not None:  # it was frozen, freeze the new shapes
+            splinewarp_checkAB(warpNode)
+            splinewarp_freezeRefresh(warpNode)
+        warpNode['curves'].changed()
+        return warpNode
+
+    # main warpnode creation
+    warpNode = nuke.createNode('SplineWarp3')
+    warpNode.knob("selected").setValue(False)
+    stats = bvfx_sync_conversions(conversions, warpNode, workers, chunk)
+    if cache is not None:
+        log.info("Sample cache: %s hits, %s misses" % (cache.hits, cache.misses))
+        cache.evict()
+    if not stats["complete"]:
+        if not bvfx_read_checkpoint(warpNode):  # nothing to resume from
+            log.warning("%s: conversion cancelled" % warpNode.name())
+            nuke.delete(warpNode)
+            return None
+        # the partial node stays in the script, selected along with its sources it resumes
+        log.warning("%s: conversion cancelled, run it again on this node to resume" % warpNode.name())
+        warpNode.knob("selected").setValue(True)
+        return None
+
+    warpNode['curves'].changed()
+    warpNode.knob('toolbar_output_ab').setValue(1)
+    warpNode.knob('boundary_bbox').setValue(0)
+
+    if not nuke.GUI:  # no UI to refresh on batch runs
+        return warpNode
+
+    # =======================================================================
+    # theres a bug on Nuke 8 where the splinewarpnode UI do not update correctly with python created curves
+    # this is a workaround
+    # =======================================================================
+    with bvfx_profiler.phase("ui_refresh", warpNode.name()):
+        newNode = NodeCopier(warpNode).copy()
+    nuke.show(newNode)
+    # =======================================================================
+    # end of workaround -
+    # =======================================================================
+    nuke.delete(warpNode)
+    newNode.knob("selected").setValue(True)
+    return newNode  # the resulting splinewarpnode
+
+
+def main():
     """ This script has 2 main purposes:
 
         01. Convert selected roto and trackers nodes (baking all transforms) into Splinewarps
@@ -856,6 +3950,13 @@ def main():
     if len(rotoNodes) == 0 and len(trackerNodes) == 0 and len(splinewarpNodes) == 0:
         raise TypeError("No Roto or Tracker or Splinewarp node selected")
 
+    # Roto/Trackers with the SplineWarp they were converted into: update it
+    updateNode = None
+    if (len(rotoNodes) > 0 or len(trackerNodes) > 0) and len(splinewarpNodes) == 1 \
+            and (splinewarpNodes[0].knob(FINGERPRINT_KNOB) is not None
+                 or splinewarpNodes[0].knob(CHECKPOINT_KNOB) is not None):
+        updateNode = splinewarpNodes.pop()
+
     if (len(rotoNodes) > 0 or len(trackerNodes) > 0) and len(splinewarpNodes) > 0:
         raise TypeError(
             "Either select Roto/Trackers nodes OR Splinewarp nodes")
@@ -863,11 +3964,25 @@ def main():
     nuke.Undo.name("Freeze Splinewarp")
     nuke.Undo.new()
 
-    if len(rotoNodes) > 0 or len(trackerNodes) > 0:
-        splinewarpNodes.append(convert_into_splinewarp(rotoNodes+trackerNodes))
+    # BVFX_PROFILE=1 logs a timing report, any other value is a json lines file to write it to
+    profile = os.environ.get("BVFX_PROFILE")
+    if profile:
+        bvfx_profiler.start(None if profile == "1" else profile)
 
-    if len(splinewarpNodes) > 0:
-        freezewarp(splinewarpNodes)
+    try:
+        if updateNode is not None:
+            convert_into_splinewarp(rotoNodes+trackerNodes, warpNode=updateNode)
+
+        elif len(rotoNodes) > 0 or len(trackerNodes) > 0:
+            warpNode = convert_into_splinewarp(rotoNodes+trackerNodes)
+            if warpNode is not None:  # nothing to freeze when cancelled
+                splinewarpNodes.append(warpNode)
+
+        if len(splinewarpNodes) > 0:
+            freezewarp(splinewarpNodes)
+    finally:
+        if profile:
+            bvfx_profiler.stop()
 
     nuke.Undo.end()
 
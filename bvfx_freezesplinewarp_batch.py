@@ -0,0 +1,304 @@
+""" Headless batch conversion for bvfx_freezesplinewarp
+
+    Converts (and optionally freezes) Roto/Tracker nodes on a list of .nk scripts
+    without dialogs or node selection. Every script runs in its own Nuke process
+    (`nuke -t`), a pool of threads keeps a bounded number of them alive at once.
+
+    Usage:
+        nuke -t bvfx_freezesplinewarp_batch.py --nodes Roto1,Tracker1 --range 1001-1100 \\
+            --freeze-frame 1050 --workers 4 shot010.nk shot020.nk
+
+    Pass --stub <dir> to run the workers with the current python interpreter and
+    a stand-in `nuke` module found on <dir>, ie: to test on a box without Nuke.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import traceback
+from multiprocessing.pool import ThreadPool
+
+RESULT_TAG = "BVFX_RESULT "
+
+
+def convert_script(script, nodes, frameRange=None, pin=False, fullbake=False, tolerance=0.0,
+                   freezeFrame=None, fh=True, stb=False, ptns=False, static=False, output=None,
+                   profile=False, smart=False, cache=None, chunk=None, analyze=False, decimate=0.0, layers=None):
+    """ Opens a script, converts the given nodes into a SplineWarp3, optionally freezes it and saves
+        Must run inside a Nuke (or stand-in) python session
+
+    Args:
+        script (str): .nk script path
+        nodes (list): names of the Roto/RotoPaint/Tracker nodes to convert, or SplineWarp3 nodes to freeze
+        frameRange (str, optional): "first-last", the script range when None
+        pin (bool, optional): break the shapes into pin points
+        fullbake (bool, optional): keep a keyframe on every frame
+        tolerance (float, optional): pixel distance allowed when removing keyframes
+        freezeFrame (int, optional): freeze the resulting SplineWarp on this frame, or a list of frames
+            to also build a variant per extra frame
+        fh (bool, optional): create the FrameHold setup when freezing
+        stb (bool, optional): create the stabilization setup when freezing
+        ptns (bool, optional): create the paint setup when freezing
+        static (bool, optional): bake the freeze frame instead of using expressions
+        layers (list, optional): only freeze the shapes under these layer names
+        output (str, optional): where to save the result, overwrites the script when None
+        profile (bool, optional): add the per phase timing report, see bvfx_freezesplinewarp.Profiler
+        smart (bool, optional): only sample the frames where the sources change
+        cache (str, optional): sample cache directory, True for the one next to each script
+        chunk (int, optional): convert the range in chunks of frames, see bvfx_stream_conversions()
+        decimate (float, optional): drop the pins following another one within this pixel distance
+        analyze (bool, optional): only predict the conversion (and freeze) cost, nothing is converted or saved,
+            see bvfx_freezesplinewarp.bvfx_estimate()
+
+    Returns:
+        dict: the script, output, resulting SplineWarp3 names, conversion time and profile,
+            or the "analysis" and "heavy" flag when analyzing
+    """
+    import nuke
+    import bvfx_freezesplinewarp as bvfx
+
+    start = time.time()
+    if profile:
+        bvfx.bvfx_profiler.start()
+    nuke.scriptOpen(script)
+    nodeList = []
+    for name in nodes:
+        node = nuke.toNode(name)
+        if node is None:
+            raise ValueError("Node %s not found in %s" % (name, script))
+        nodeList.append(node)
+
+    sources = [n for n in nodeList if n.Class() in ('Roto', 'RotoPaint', 'Tracker3', 'Tracker4')]
+    warpNodes = [n for n in nodeList if n.Class() == 'SplineWarp3']
+    if sources and warpNodes:
+        raise TypeError("Either pass Roto/Trackers nodes OR Splinewarp nodes")
+    if len(sources) + len(warpNodes) != len(nodeList):
+        raise TypeError("Unsupported node type, use Roto, RotoPaint, Tracker3, Tracker4 or SplineWarp3")
+
+    if sources and frameRange is None:
+        frameRange = "%s-%s" % (nuke.root().firstFrame(), nuke.root().lastFrame())
+
+    if analyze:
+        if sources:
+            analysis = [bvfx.bvfx_estimate([bvfx.bvfx_analyze_sources(n) for n in sources], frameRange, pin,
+                                           fullbake, tolerance, smart, freeze=freezeFrame is not None,
+                                           static=static, decimate=decimate)]
+        else:
+            analysis = [bvfx.bvfx_analyze_warp(n) for n in warpNodes]
+        return {"script": script, "analysis": analysis, "heavy": any(a["heavy"] for a in analysis),
+                "summary": [line for a in analysis for line in bvfx.bvfx_format_estimate(a)]}
+
+    if sources:
+        warpNode = bvfx.convert_into_splinewarp(sources, frameRange, pin, fullbake, tolerance, smart=smart,
+                                                cache=cache, chunk=chunk, decimate=decimate)
+        if warpNode is None:
+            raise RuntimeError("Conversion cancelled, %s was not saved" % script)
+        warpNodes = [warpNode]
+
+    if freezeFrame is not None:
+        if isinstance(freezeFrame, (list, tuple)):
+            freezeFrame = [int(f) for f in freezeFrame]
+        else:
+            freezeFrame = int(freezeFrame)
+        bvfx.freezewarp(warpNodes, freezeFrame, fh, stb, ptns, static, layers)
+
+    output = output or script
+    nuke.scriptSaveAs(output, 1)
+    result = {"script": script, "output": output, "warps": [n.name() for n in warpNodes],
+              "convert_seconds": time.time() - start}
+    if profile:
+        result["profile"] = bvfx.bvfx_profiler.stop()
+    return result
+
+
+def worker_command(script, options, executable=None, stub=None):
+    """ Builds the command line that converts one script in its own process
+
+    Args:
+        script (str): .nk script path
+        options (dict): convert_script() keyword arguments
+        executable (str, optional): Nuke executable, the running one when None
+        stub (str, optional): directory holding a stand-in nuke module, runs on plain python
+
+    Returns:
+        tuple: (command list, environment dict)
+    """
+    env = dict(os.environ)
+    if stub:
+        command = [sys.executable]
+        env["PYTHONPATH"] = os.pathsep.join(
+            [os.path.abspath(stub), os.path.dirname(os.path.abspath(__file__))] +
+            ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else []))
+    else:
+        command = [executable or sys.executable, "-t"]
+    command += [os.path.abspath(__file__), "--worker", json.dumps(options), script]
+    return command, env
+
+
+def run_batch(scripts, options, workers=None, executable=None, stub=None, timeout=None):
+    """ Converts a list of scripts, each on its own process, at most `workers` at once
+
+    Args:
+        scripts (list): .nk script paths
+        options (dict): convert_script() keyword arguments shared by all scripts,
+            "output_suffix" saves to <script><suffix>.nk instead of overwriting
+        workers (int, optional): concurrent processes, cpu count when None
+        executable (str, optional): Nuke executable, see worker_command()
+        stub (str, optional): stand-in nuke module directory, see worker_command()
+        timeout (float, optional): seconds before a script is killed
+
+    Returns:
+        list: one dict per script, in the given order, with status, seconds, output and error
+    """
+    options = dict(options)
+    suffix = options.pop("output_suffix", None)
+
+    def run(script):
+        scriptOptions = dict(options)
+        if suffix:
+            root, ext = os.path.splitext(script)
+            scriptOptions["output"] = root + suffix + (ext or ".nk")
+        command, env = worker_command(script, scriptOptions, executable, stub)
+        result = {"script": script, "status": "failed", "seconds": 0.0, "error": None}
+        start = time.time()
+        try:
+            process = subprocess.Popen(command, env=env, stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT, universal_newlines=True)
+        except OSError as e:
+            result["error"] = "Could not start %s: %s" % (command[0], e)
+            return result
+        if timeout:
+            timer = _Killer(process, timeout)
+        out = process.communicate()[0]
+        result["seconds"] = time.time() - start
+        result["returncode"] = process.returncode
+        if timeout and timer.fired:
+            result["status"] = "timeout"
+        for line in out.splitlines():
+            if line.startswith(RESULT_TAG):
+                result.update(json.loads(line[len(RESULT_TAG):]))
+        if result["status"] != "ok" and not result["error"]:
+            result["error"] = out[-2000:]
+        return result
+
+    pool = ThreadPool(max(1, workers or _cpu_count()))
+    try:
+        return pool.map(run, scripts, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+class _Killer(object):
+    """ Kills a process once the timeout is over """
+
+    def __init__(self, process, timeout):
+        import threading
+        self.fired = False
+        self._process = process
+        self._timer = threading.Timer(timeout, self._kill)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _kill(self):
+        if self._process.poll() is None:
+            self.fired = True
+            self._process.kill()
+
+
+def _cpu_count():
+    try:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+def _worker(options, script):
+    """ Runs on the worker process, reports back a tagged json line """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    try:
+        result = convert_script(script, **options)
+        result["status"] = "ok"
+    except Exception:
+        result = {"status": "failed", "error": traceback.format_exc()}
+    print(RESULT_TAG + json.dumps(result))
+    sys.stdout.flush()
+    return 0 if result["status"] == "ok" else 1
+
+
+def _frames(text):
+    frames = [int(f) for f in text.split(",") if f.strip()]
+    return frames[0] if len(frames) == 1 else frames
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Convert Roto/Tracker nodes into (frozen) SplineWarps on many scripts")
+    parser.add_argument("scripts", nargs="+", help=".nk scripts to convert")
+    parser.add_argument("--nodes", required=True, help="comma separated node names")
+    parser.add_argument("--range", dest="frameRange", help="framerange, ie: 1001-1100, script range by default")
+    parser.add_argument("--pin", action="store_true", help="break the shapes into pin points")
+    parser.add_argument("--fullbake", action="store_true", help="keep a keyframe on every frame")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="keyframe reduction tolerance in pixels")
+    parser.add_argument("--decimate", type=float, default=0.0,
+                        help="drop the pins that stay within this pixel distance of another pin")
+    parser.add_argument("--smart", action="store_true", help="only sample the frames where the sources change")
+    parser.add_argument("--cache", nargs="?", const=True,
+                        help="reuse baked samples, kept next to each script or in the given directory")
+    parser.add_argument("--chunk", type=int, help="convert the range in chunks of this many frames")
+    parser.add_argument("--freeze-frame", dest="freezeFrame", type=_frames,
+                        help="freeze the result on this frame, more comma separated frames add variants")
+    parser.add_argument("--no-framehold", dest="fh", action="store_false", help="skip the FrameHold setup")
+    parser.add_argument("--stabilize", dest="stb", action="store_true", help="create the stabilization setup")
+    parser.add_argument("--paint", dest="ptns", action="store_true", help="create the paint setup")
+    parser.add_argument("--static", action="store_true", help="bake the freeze frame instead of using expressions")
+    parser.add_argument("--layers", help="comma separated layer names, only the shapes under them get frozen")
+    parser.add_argument("--profile", action="store_true", help="add per phase timings and api calls to the results")
+    parser.add_argument("--analyze", action="store_true",
+                        help="only predict the conversion cost and flag the heavy scripts, nothing is saved")
+    parser.add_argument("--output-suffix", dest="output_suffix", default="_freezewarp",
+                        help="save as <script><suffix>.nk, empty string overwrites the scripts")
+    parser.add_argument("--workers", type=int, help="concurrent Nuke processes, cpu count by default")
+    parser.add_argument("--timeout", type=float, help="seconds before a script is killed")
+    parser.add_argument("--nuke", dest="executable", help="Nuke executable, the running one by default")
+    parser.add_argument("--stub", help="directory with a stand-in nuke module, runs on plain python")
+    parser.add_argument("--json", dest="jsonPath", help="write the per script results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["--worker"]:
+        return _worker(json.loads(argv[1]), argv[2])
+
+    args = parse_args(argv)
+    options = {"nodes": [n.strip() for n in args.nodes.split(",") if n.strip()],
+               "frameRange": args.frameRange, "pin": args.pin, "fullbake": args.fullbake,
+               "tolerance": args.tolerance, "decimate": args.decimate, "smart": args.smart, "cache": args.cache, "chunk": args.chunk,
+               "freezeFrame": args.freezeFrame,
+               "fh": args.fh, "stb": args.stb, "ptns": args.ptns,
+               "static": args.static, "layers": [n.strip() for n in (args.layers or "").split(",") if n.strip()] or None,
+               "profile": args.profile, "analyze": args.analyze, "output_suffix": args.output_suffix}
+    results = run_batch(args.scripts, options, args.workers, args.executable, args.stub, args.timeout)
+
+    for r in results:
+        status = "heavy" if r["status"] == "ok" and r.get("heavy") else r["status"]
+        print("%-8s %8.2fs  %s%s" % (status, r["seconds"], r["script"],
+                                     "" if r["status"] == "ok" else "\n" + str(r["error"])))
+        for line in r.get("summary", []):
+            print("    " + line)
+    if args.jsonPath:
+        with open(args.jsonPath, "w") as handle:
+            json.dump(results, handle, indent=2)
+    if not all(r["status"] == "ok" for r in results):
+        return 1
+    return 2 if any(r.get("heavy") for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,410 @@
+""" Scaling benchmarks for bvfx_freezesplinewarp
+
+    Builds synthetic Roto hierarchies and Tracker3/Tracker4 nodes of a given size,
+    times every stage of the conversion and freeze paths and counts the Nuke API calls
+    each stage makes. Runs on plain python against the stand-in nuke module shipped in
+    bvfx_nukestub/, so no Nuke licence is needed and the call counts are available.
+
+    Usage:
+        python bvfx_freezesplinewarp_benchmark.py --shapes 20 --points 8 --frames 100 \\
+            --scale shapes=10,20,40,80 --json results.json
+
+        # fails (exit code 1) when a stage is 25% slower than on the stored results
+        python bvfx_freezesplinewarp_benchmark.py --scale frames=50,100,200 \\
+            --baseline results.json --threshold 0.25
+
+        # what menu.py and the tool import add to a fresh interpreter
+        python bvfx_freezesplinewarp_benchmark.py --startup --repeat 10
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+STUB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bvfx_nukestub")
+sys.path.insert(0, STUB_DIR)
+
+import nuke  # noqa: E402
+import nuke.rotopaint as rp  # noqa: E402
+import bvfx_freezesplinewarp as bvfx  # noqa: E402
+
+STAGES = ("convert_rotonodes", "convert_trackernodes_tracker3", "convert_trackernodes_tracker4",
+          "splinewarp_checkAB", "splinewarp_expressionLock", "splinewarp_staticLock")
+MENU_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "menu.py")
+STARTUP_SNIPPETS = (
+    ("nuke", "import nuke"),
+    ("menu", "import nuke; nuke.GUI = True; exec(compile(open(%r).read(), %r, 'exec'), {'__name__': 'menu'})"
+     % (MENU_PATH, MENU_PATH)),
+    ("tool", "import nuke; import bvfx_freezesplinewarp"),
+)
+SIZES = ("shapes", "points", "depth", "tracks", "frames")
+DEFAULTS = {"shapes": 20, "points": 8, "depth": 2, "tracks": 16, "frames": 100}
+
+
+# ===============================================================================
+# synthetic scenes
+# ===============================================================================
+def build_roto(shapes, points, depth, frames, seed=0):
+    """ RotoPaint node with `depth` nested animated layers and the shapes spread over them
+
+    Args:
+        shapes (int): number of shapes
+        points (int): control points per shape
+        depth (int): nested layers under the root
+        frames (int): length of the animation, starting at frame 1
+        seed (int, optional): random seed
+
+    Returns:
+        node: the RotoPaint node
+    """
+    rnd = random.Random(seed)
+    rotoNode = nuke.nodes.RotoPaint()
+    curves = rotoNode['curves']
+    layer = curves.rootLayer
+    layers = [layer]
+    for d in range(depth):
+        child = rp.Layer(curves)
+        child.name = "Layer%d" % (d + 1)
+        transf = child.getTransform()
+        transf.getRotationAnimCurve(2).addKey(1, 0)
+        transf.getRotationAnimCurve(2).addKey(frames, 5 * (d + 1))
+        transf.getTranslationAnimCurve(0).addKey(1, 0)
+        transf.getTranslationAnimCurve(0).addKey(frames, 10 * (d + 1))
+        layer.append(child)
+        layer = child
+        layers.append(child)
+
+    step = max(1, frames // 8)
+    for s in range(shapes):
+        shape = rp.Shape(curves)
+        shape.name = "Bezier%d" % (s + 1)
+        shape.getTransform().getTranslationAnimCurve(1).addKey(1, 0)
+        shape.getTransform().getTranslationAnimCurve(1).addKey(frames, rnd.uniform(-20, 20))
+        for p in range(points):
+            point = rp.ShapeControlPoint(0, 0)
+            for f in range(1, frames + 1, step):
+                point.center.addPositionKey(f, (rnd.uniform(0, 1920), rnd.uniform(0, 1080)))
+            shape.append(point)
+        layers[s % len(layers)].append(shape)
+    return rotoNode
+
+
+def build_tracker3(tracks, frames, seed=0):
+    """ Tracker3 nodes (4 tracks each) holding `tracks` tracks keyed on every frame
+
+    Returns:
+        list: the Tracker3 nodes
+    """
+    rnd = random.Random(seed)
+    nodes = []
+    for n in range(0, tracks, 4):
+        trackNode = nuke.nodes.Tracker3()
+        for i in range(1, min(4, tracks - n) + 1):
+            trackNode['enable%d' % i].setValue(True)
+            x, y = rnd.uniform(0, 1920), rnd.uniform(0, 1080)
+            for f in range(1, frames + 1):
+                x += rnd.uniform(-2, 2)
+                y += rnd.uniform(-2, 2)
+                trackNode['track%d' % i].setValueAt(x, f, 0)
+                trackNode['track%d' % i].setValueAt(y, f, 1)
+        nodes.append(trackNode)
+    return nodes
+
+
+def build_tracker4(tracks, frames, seed=0):
+    """ Tracker4 node holding `tracks` tracks keyed on every frame
+
+    Returns:
+        node: the Tracker4 node
+    """
+    rnd = random.Random(seed)
+    trackNode = nuke.nodes.Tracker4()
+    for i in range(tracks):
+        row = trackNode['tracks'].addTrack("track %d" % (i + 1))
+        x, y = rnd.uniform(0, 1920), rnd.uniform(0, 1080)
+        for f in range(1, frames + 1):
+            x += rnd.uniform(-2, 2)
+            y += rnd.uniform(-2, 2)
+            row[2].addKey(f, x)
+            row[3].addKey(f, y)
+    return trackNode
+
+
+# ===============================================================================
+# timing
+# ===============================================================================
+class Stage(object):
+    """ Times a block and counts the API calls made inside it """
+
+    def __init__(self, results, name):
+        self.results = results
+        self.name = name
+
+    def __enter__(self):
+        self.calls = dict(nuke.API_CALLS)
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.time() - self.start
+        calls = dict((k, v - self.calls.get(k, 0)) for k, v in nuke.API_CALLS.items()
+                     if v != self.calls.get(k, 0))
+        self.results[self.name] = {"seconds": seconds, "calls": calls}
+        return False
+
+
+def run_case(size, pin=False, tolerance=0.0, seed=0):
+    """ Builds a scene of the given size and runs every stage once on it
+
+    Args:
+        size (dict): shapes, points, depth, tracks and frames
+        pin (bool, optional): break the roto shapes into pins
+        tolerance (float, optional): keyframe reduction tolerance
+        seed (int, optional): random seed
+
+    Returns:
+        dict: stage name -> {"seconds", "calls"}
+    """
+    nuke.scriptClear()
+    nuke.reset_calls()
+    fRange = nuke.FrameRange(1, size["frames"])
+    rotoNode = build_roto(size["shapes"], size["points"], size["depth"], size["frames"], seed)
+    tracker3 = build_tracker3(size["tracks"], size["frames"], seed)
+    tracker4 = build_tracker4(size["tracks"], size["frames"], seed)
+
+    stages = {}
+    warpNode = nuke.nodes.SplineWarp3()
+    with Stage(stages, "convert_rotonodes"):
+        bvfx.convert_rotonodes(rotoNode, warpNode, fRange, pin, False, tolerance)
+
+    trackWarp = nuke.nodes.SplineWarp3()
+    with Stage(stages, "convert_trackernodes_tracker3"):
+        for trackNode in tracker3:
+            bvfx.convert_trackernodes(trackNode, trackWarp, fRange, False, tolerance)
+    with Stage(stages, "convert_trackernodes_tracker4"):
+        bvfx.convert_trackernodes(tracker4, trackWarp, fRange, False, tolerance)
+
+    warpNode.addKnob(nuke.Int_Knob('fframe', "Freeze Frame"))
+    warpNode['fframe'].setValue(1 + size["frames"] // 2)
+    with Stage(stages, "splinewarp_checkAB"):
+        bvfx.splinewarp_checkAB(warpNode)
+    with Stage(stages, "splinewarp_expressionLock"):
+        bvfx.splinewarp_expressionLock(warpNode)
+    with Stage(stages, "splinewarp_staticLock"):
+        bvfx.splinewarp_staticLock(warpNode)
+    return stages
+
+
+def case_key(size):
+    return ",".join("%s=%s" % (k, size[k]) for k in SIZES)
+
+
+def scaling_slope(points):
+    """ Least squares slope on log/log axes, ~1 is linear scaling, ~2 quadratic
+
+    Args:
+        points (list): (size, seconds) pairs
+
+    Returns:
+        float: the slope, None with less than 2 usable points
+    """
+    points = [(math.log(x), math.log(y)) for x, y in points if x > 0 and y > 0]
+    if len(points) < 2:
+        return None
+    mx = sum(p[0] for p in points) / len(points)
+    my = sum(p[1] for p in points) / len(points)
+    den = sum((p[0] - mx) ** 2 for p in points)
+    if not den:
+        return None
+    return sum((p[0] - mx) * (p[1] - my) for p in points) / den
+
+
+def run_benchmark(base, scale=None, repeat=1, pin=False, tolerance=0.0, log=None):
+    """ Runs the base case and the scaled ones, keeping the fastest of `repeat` runs per stage
+
+    Args:
+        base (dict): default sizes, see DEFAULTS
+        scale (tuple, optional): (size name, list of values) to build the scaling curves
+        repeat (int, optional): runs per case
+        pin (bool, optional): break the roto shapes into pins
+        tolerance (float, optional): keyframe reduction tolerance
+        log (callable, optional): receives a line per finished case
+
+    Returns:
+        dict: machine readable results, "cases" and "curves"
+    """
+    sizes = [dict(base)]
+    if scale:
+        sizes = [dict(base, **{scale[0]: v}) for v in scale[1]]
+
+    cases = {}
+    for size in sizes:
+        best = None
+        for _ in range(max(1, repeat)):
+            stages = run_case(size, pin, tolerance)
+            if best is None:
+                best = stages
+            else:
+                for name, stage in stages.items():
+                    if stage["seconds"] < best[name]["seconds"]:
+                        best[name] = stage
+        cases[case_key(size)] = {"size": size, "stages": best}
+        if log:
+            log("%s  %s" % (case_key(size), "  ".join(
+                "%s %.3fs" % (name, best[name]["seconds"]) for name in STAGES)))
+
+    curves = {}
+    if scale:
+        for name in STAGES:
+            points = [(c["size"][scale[0]], c["stages"][name]["seconds"]) for c in cases.values()]
+            points.sort()
+            calls = [(c["size"][scale[0]], sum(c["stages"][name]["calls"].values())) for c in cases.values()]
+            calls.sort()
+            curves[name] = {"parameter": scale[0], "seconds": points, "calls": calls,
+                            "slope": scaling_slope(points), "calls_slope": scaling_slope(calls)}
+
+    return {"python": platform.python_version(), "pin": pin, "tolerance": tolerance, "repeat": repeat,
+            "cases": cases, "curves": curves}
+
+
+def startup_run(snippet):
+    """ Times a fresh interpreter running the snippet
+
+    Args:
+        snippet (str): python code, run with -c
+
+    Returns:
+        tuple: (seconds, bool the tool module got imported)
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (STUB_DIR, os.path.dirname(MENU_PATH),
+                                                    env.get("PYTHONPATH")) if p)
+    code = snippet + "; import sys; sys.stdout.write(str(int('bvfx_freezesplinewarp' in sys.modules)))"
+    start = time.time()
+    output = subprocess.check_output([sys.executable, "-c", code], env=env)
+    return time.time() - start, output.strip().endswith(b"1")
+
+
+def run_startup(repeat=5):
+    """ Measures what registering the menu and importing the tool add to the interpreter start
+
+    Args:
+        repeat (int, optional): fresh interpreters per snippet, the median is kept
+
+    Returns:
+        dict: milliseconds per snippet, "menu_ms"/"tool_ms" over the bare nuke import
+              and "menu_imports_tool"
+    """
+    results = {"python": platform.python_version(), "repeat": repeat}
+    importsTool = False
+    for name, snippet in STARTUP_SNIPPETS:
+        runs = []
+        for _ in range(max(1, repeat)):
+            seconds, imported = startup_run(snippet)
+            runs.append(seconds)
+            if name == "menu":
+                importsTool = importsTool or imported
+        runs.sort()
+        results[name] = runs[len(runs) // 2] * 1000.0
+    results["menu_ms"] = results["menu"] - results["nuke"]
+    results["tool_ms"] = results["tool"] - results["nuke"]
+    results["menu_imports_tool"] = importsTool
+    return results
+
+
+def compare(results, baseline, threshold=0.25, minSeconds=0.01):
+    """ Finds the stages slower than on the baseline results
+
+    Args:
+        results (dict): run_benchmark() results
+        baseline (dict): stored run_benchmark() results
+        threshold (float, optional): allowed slowdown, 0.25 is 25% slower
+        minSeconds (float, optional): stages faster than this on both runs are ignored as noise
+
+    Returns:
+        list: (case, stage, baseline seconds, seconds, ratio) of every regression
+    """
+    regressions = []
+    for key, case in results["cases"].items():
+        base = baseline.get("cases", {}).get(key)
+        if base is None:
+            continue
+        for name, stage in case["stages"].items():
+            before = base["stages"].get(name, {}).get("seconds")
+            if before is None or max(before, stage["seconds"]) < minSeconds:
+                continue
+            ratio = stage["seconds"] / max(before, 1e-9)
+            if ratio > 1.0 + threshold:
+                regressions.append((key, name, before, stage["seconds"], ratio))
+    return regressions
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Scaling benchmarks for the conversion and freeze stages")
+    for name in SIZES:
+        parser.add_argument("--" + name, type=int, default=DEFAULTS[name], help="default %s" % DEFAULTS[name])
+    parser.add_argument("--scale", help="size to scale and its values, ie: shapes=10,20,40")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case, the fastest one is kept")
+    parser.add_argument("--pin", action="store_true", help="break the roto shapes into pins")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="keyframe reduction tolerance")
+    parser.add_argument("--startup", action="store_true",
+                        help="only measure what menu.py and the tool import add to the interpreter start")
+    parser.add_argument("--json", dest="jsonPath", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file to compare with, fails on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, default 0.25 (25%%)")
+    parser.add_argument("--min-seconds", dest="minSeconds", type=float, default=0.01,
+                        help="ignore stages faster than this, default 0.01")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.startup:
+        results = run_startup(args.repeat if args.repeat > 1 else 5)
+        print("interpreter + nuke %.1fms, menu.py +%.1fms, tool import +%.1fms" % (
+            results["nuke"], results["menu_ms"], results["tool_ms"]))
+        if args.jsonPath:
+            with open(args.jsonPath, "w") as handle:
+                json.dump(results, handle, indent=2, sort_keys=True)
+        if results["menu_imports_tool"]:
+            print("REGRESSION menu.py imports bvfx_freezesplinewarp at startup")
+            return 1
+        return 0
+
+    base = dict((name, getattr(args, name)) for name in SIZES)
+    scale = None
+    if args.scale:
+        name, values = args.scale.split("=", 1)
+        if name not in SIZES:
+            raise SystemExit("--scale must be one of %s" % ", ".join(SIZES))
+        scale = (name, [int(v) for v in values.split(",") if v.strip()])
+
+    results = run_benchmark(base, scale, args.repeat, args.pin, args.tolerance, log=print)
+    for name, curve in sorted(results["curves"].items()):
+        print("%-32s time slope %s  calls slope %s" % (
+            name, "%.2f" % curve["slope"] if curve["slope"] is not None else "-",
+            "%.2f" % curve["calls_slope"] if curve["calls_slope"] is not None else "-"))
+
+    if args.jsonPath:
+        with open(args.jsonPath, "w") as handle:
+            json.dump(results, handle, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare(results, json.load(handle), args.threshold, args.minSeconds)
+        for key, name, before, after, ratio in regressions:
+            print("REGRESSION %s %s: %.3fs -> %.3fs (x%.2f)" % (key, name, before, after, ratio))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
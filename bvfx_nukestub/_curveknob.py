@@ -0,0 +1,698 @@
+""" In-memory stand-in for Nuke's _curveknob / _curvelib modules
+
+    Only the small part of the curve API used by bvfx_freezesplinewarp is modelled:
+    animation curves, control points, transforms, shapes, strokes, layers and the
+    curves knob with a toScript()/fromScript() round trip.
+    Keys carry an interpolation type, smooth (the default) interpolates linearly unless
+    SMOOTH_CUBIC is set, which is enough for timing and correctness checks.
+"""
+import bisect
+import math
+import struct
+from collections import defaultdict
+
+
+API_CALLS = defaultdict(int)
+
+kConstantInterpolation = 0
+kLinearInterpolation = 1
+kSmoothInterpolation = 2
+kCatmullRomInterpolation = 3
+kCubicInterpolation = 4
+kHorizontalInterpolation = 5
+kBreakInterpolation = 6
+kUserInterpolation = 7
+
+# smooth keys as a cubic with catmull-rom slopes, flat on the end keys and the extremes
+SMOOTH_CUBIC = False
+
+
+def _count(name):
+    API_CALLS[name] += 1
+
+
+def reset_calls():
+    API_CALLS.clear()
+
+
+# ===============================================================================
+# value encoding shared with the curves script
+# ===============================================================================
+def encode_value(value):
+    value = float(value)
+    if value == int(value) and abs(value) < 1e9:
+        return str(int(value))
+    return "x%08x" % struct.unpack(">I", struct.pack(">f", value))[0]
+
+
+def decode_value(token):
+    if token.startswith("x"):
+        return struct.unpack(">f", struct.pack(">I", int(token[1:], 16)))[0]
+    return float(token)
+
+
+def tokenize(text):
+    """ Parse a brace script into nested lists of string tokens """
+    stack = [[]]
+    i = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == "{":
+            stack.append([])
+            i += 1
+        elif c == "}":
+            if len(stack) == 1:  # Nuke ignores stray closing braces
+                i += 1
+                continue
+            group = stack.pop()
+            stack[-1].append(group)
+            i += 1
+        elif c.isspace():
+            i += 1
+        elif c == '"':
+            j = text.index('"', i + 1)
+            stack[-1].append(text[i + 1:j])
+            i = j + 1
+        else:
+            j = i
+            while j < n and not text[j].isspace() and text[j] not in "{}":
+                j += 1
+            stack[-1].append(text[i:j])
+            i = j
+    return stack[0]
+
+
+def _quote(text):
+    return "{" + text + "}" if (not text or any(c.isspace() for c in text)) else text
+
+
+# ===============================================================================
+# curves
+# ===============================================================================
+class AnimCtrlPoint(object):
+    """ A key, setting its interpolationType, slopes or extrapolationType changes the curve it was read from """
+
+    def __init__(self, time, value, interpolationType=kSmoothInterpolation, curve=None):
+        self.time = time
+        self.value = value
+        self._interpolation = interpolationType
+        self._curve = curve
+
+    def _index(self):
+        if self._curve is None:
+            return None
+        i = bisect.bisect_left(self._curve._times, self.time)
+        return i if i < len(self._curve._times) and self._curve._times[i] == self.time else None
+
+    def _slopes(self):
+        i = self._index()
+        if i is None:
+            return [0.0, 0.0]
+        return list(self._curve._slopes.get(self.time, [self._curve._slope(i)] * 2))
+
+    @property
+    def leftSlope(self):
+        return self._slopes()[0]
+
+    @leftSlope.setter
+    def leftSlope(self, value):
+        if self._index() is not None:
+            self._curve._slopes[self.time] = [float(value), self._slopes()[1]]
+
+    @property
+    def rightSlope(self):
+        return self._slopes()[1]
+
+    @rightSlope.setter
+    def rightSlope(self, value):
+        if self._index() is not None:
+            self._curve._slopes[self.time] = [self._slopes()[0], float(value)]
+
+    @property
+    def extrapolationType(self):
+        return self._curve._extrapolations.get(self.time, kSmoothInterpolation) if self._curve else kSmoothInterpolation
+
+    @extrapolationType.setter
+    def extrapolationType(self, value):
+        if self._index() is not None:
+            self._curve._extrapolations[self.time] = value
+            if value == kSmoothInterpolation:
+                del self._curve._extrapolations[self.time]
+
+    @property
+    def interpolationType(self):
+        return self._interpolation
+
+    @interpolationType.setter
+    def interpolationType(self, value):
+        self._interpolation = value
+        if self._curve is not None:
+            i = bisect.bisect_left(self._curve._times, self.time)
+            if i < len(self._curve._times) and self._curve._times[i] == self.time:
+                self._curve._interpolations[i] = value
+
+
+class AnimCurve(object):
+    def __init__(self, value=0.0):
+        self._times = []
+        self._values = []
+        self._interpolations = []
+        self._slopes = {}  # time -> [left, right] set by hand, automatic slopes otherwise
+        self._extrapolations = {}  # time -> extrapolation type, when not the default
+        self.constantValue = float(value)
+        self.useExpression = False
+        self.expressionString = ""
+
+    def evaluate(self, t):
+        _count("evaluate")
+        times = self._times
+        if not times:
+            return self.constantValue
+        if t <= times[0]:
+            return self._values[0]
+        if t >= times[-1]:
+            return self._values[-1]
+        i = bisect.bisect_right(times, t)
+        t0, t1 = times[i - 1], times[i]
+        v0, v1 = self._values[i - 1], self._values[i]
+        interpolation = self._interpolations[i - 1]
+        if interpolation == kConstantInterpolation:
+            return v0
+        u = (t - t0) / (t1 - t0)
+        if interpolation == kUserInterpolation or (interpolation == kSmoothInterpolation and SMOOTH_CUBIC):
+            m0 = self._slopes.get(t0, [self._slope(i - 1)] * 2)[1] * (t1 - t0)
+            m1 = self._slopes.get(t1, [self._slope(i)] * 2)[0] * (t1 - t0)
+            return ((2 * u ** 3 - 3 * u ** 2 + 1) * v0 + (u ** 3 - 2 * u ** 2 + u) * m0 +
+                    (-2 * u ** 3 + 3 * u ** 2) * v1 + (u ** 3 - u ** 2) * m1)
+        return v0 + (v1 - v0) * u
+
+    def _slope(self, i):
+        if i == 0 or i == len(self._times) - 1:
+            return 0.0
+        v = self._values
+        if (v[i] - v[i - 1]) * (v[i + 1] - v[i]) <= 0:
+            return 0.0
+        return (v[i + 1] - v[i - 1]) / (self._times[i + 1] - self._times[i - 1])
+
+    def addKey(self, t, v):
+        _count("addKey")
+        t = float(t)
+        i = bisect.bisect_left(self._times, t)
+        if i < len(self._times) and self._times[i] == t:
+            self._values[i] = float(v)
+        else:
+            self._times.insert(i, t)
+            self._values.insert(i, float(v))
+            self._interpolations.insert(i, kSmoothInterpolation)
+
+    def removeKey(self, t):
+        _count("removeKey")
+        t = float(t)
+        i = bisect.bisect_left(self._times, t)
+        if i < len(self._times) and self._times[i] == t:
+            del self._times[i]
+            del self._values[i]
+            del self._interpolations[i]
+            self._slopes.pop(t, None)
+            self._extrapolations.pop(t, None)
+
+    def removeAllKeys(self):
+        self._times = []
+        self._values = []
+        self._interpolations = []
+        self._slopes = {}
+        self._extrapolations = {}
+
+    def getNumberOfKeys(self):
+        return len(self._times)
+
+    def getKey(self, index):
+        return AnimCtrlPoint(self._times[index], self._values[index], self._interpolations[index], self)
+
+    def _script(self):
+        body = []
+        if self.useExpression:
+            body.append("e {%s}" % self.expressionString)
+        else:
+            body.append("k")
+        body.append(encode_value(self.constantValue))
+        for t, v, i in zip(self._times, self._values, self._interpolations):
+            if i != kSmoothInterpolation:
+                body.append("~%d" % i)
+            if t in self._slopes:
+                body.append("^%s,%s" % tuple(encode_value(slope) for slope in self._slopes[t]))
+            if t in self._extrapolations:
+                body.append("@%d" % self._extrapolations[t])
+            body.append("%s %s" % (encode_value(t), encode_value(v)))
+        return "{" + " ".join(body) + "}"
+
+    @classmethod
+    def _from_tokens(cls, tokens):
+        curve = cls()
+        i = 0
+        if tokens[0] == "e":
+            curve.useExpression = True
+            expr = tokens[1]
+            curve.expressionString = " ".join(_flatten(expr)) if isinstance(expr, list) else expr
+            i = 2
+        else:
+            i = 1
+        curve.constantValue = decode_value(tokens[i])
+        rest = tokens[i + 1:]
+        j = 0
+        while j < len(rest):
+            interpolation = kSmoothInterpolation
+            slopes = extrapolation = None
+            while rest[j][0] in "~^@":
+                if rest[j].startswith("~"):
+                    interpolation = int(rest[j][1:])
+                elif rest[j].startswith("^"):
+                    slopes = [decode_value(slope) for slope in rest[j][1:].split(",")]
+                else:
+                    extrapolation = int(rest[j][1:])
+                j += 1
+            t = decode_value(rest[j])
+            if slopes is not None:
+                curve._slopes[t] = slopes
+            if extrapolation is not None:
+                curve._extrapolations[t] = extrapolation
+            curve._times.append(decode_value(rest[j]))
+            curve._values.append(decode_value(rest[j + 1]))
+            curve._interpolations.append(interpolation)
+            j += 2
+        return curve
+
+
+def _flatten(tokens):
+    out = []
+    for t in tokens:
+        if isinstance(t, list):
+            out.append("[" + " ".join(_flatten(t)) + "]")
+        else:
+            out.append(t)
+    return out
+
+
+class CVec2(object):
+    def __init__(self, x=0.0, y=0.0):
+        self.x = x
+        self.y = y
+
+    def __getitem__(self, i):
+        return (self.x, self.y)[i]
+
+
+class AnimControlPoint(object):
+    def __init__(self, x=0.0, y=0.0):
+        self._curves = [AnimCurve(x), AnimCurve(y)]
+
+    def getPositionAnimCurve(self, index):
+        return self._curves[index]
+
+    def addPositionKey(self, t, pos):
+        _count("addPositionKey")
+        self._curves[0].addKey(t, pos[0])
+        self._curves[1].addKey(t, pos[1])
+
+    def removePositionKey(self, t):
+        _count("removePositionKey")
+        self._curves[0].removeKey(t)
+        self._curves[1].removeKey(t)
+
+    def getControlPointKeyTimes(self):
+        return sorted(set(self._curves[0]._times) | set(self._curves[1]._times))
+
+    def getPosition(self, t):
+        return CVec2(self._curves[0].evaluate(t), self._curves[1].evaluate(t))
+
+    def _script(self):
+        return "{c %s %s}" % (self._curves[0]._script(), self._curves[1]._script())
+
+    @classmethod
+    def _from_tokens(cls, tokens):
+        point = cls()
+        point._curves = [AnimCurve._from_tokens(tokens[1]), AnimCurve._from_tokens(tokens[2])]
+        return point
+
+
+class ShapeControlPoint(object):
+    def __init__(self, x=0.0, y=0.0):
+        self.center = AnimControlPoint(x, y)
+        self.leftTangent = AnimControlPoint()
+        self.rightTangent = AnimControlPoint()
+        self.featherCenter = AnimControlPoint()
+
+    def _script(self):
+        return "{p %s}" % self.center._script()
+
+    @classmethod
+    def _from_tokens(cls, tokens):
+        point = cls()
+        point.center = AnimControlPoint._from_tokens(tokens[1])
+        return point
+
+
+# ===============================================================================
+# transforms
+# ===============================================================================
+class Matrix4(object):
+    def __init__(self, values=None):
+        values = values if values is not None else [
+            1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+        self._m = [struct.unpack("f", struct.pack("f", v))[0] for v in values]  # single precision
+
+    def __getitem__(self, i):
+        return self._m[i]
+
+    def __len__(self):
+        return 16
+
+
+def _mult(a, b):
+    return [sum(a[r * 4 + k] * b[k * 4 + c] for k in range(4)) for r in range(4) for c in range(4)]
+
+
+class CTransform(object):
+    def __init__(self, matrix):
+        self._matrix = matrix
+
+    def getMatrix(self):
+        _count("getMatrix")
+        return Matrix4(self._matrix)
+
+
+class AnimCTransform(object):
+    _NAMES = ("tx", "ty", "rot", "sx", "sy", "cx", "cy", "skx", "sky")
+    _DEFAULTS = (0.0, 0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 0.0, 0.0)
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._curves = [AnimCurve(v) for v in self._DEFAULTS]
+        self._extra = [AnimCurve(1.0 if r == c else 0.0) for r in range(4) for c in range(4)]
+
+    def _all_curves(self):
+        return self._curves + self._extra
+
+    def getTranslationAnimCurve(self, index):
+        return self._curves[index]
+
+    def getRotationAnimCurve(self, index):
+        return self._curves[2]
+
+    def getScaleAnimCurve(self, index):
+        return self._curves[3 + index]
+
+    def getPivotPointAnimCurve(self, index):
+        return self._curves[5 + index]
+
+    def getSkewXAnimCurve(self):
+        return self._curves[7]
+
+    def getSkewYAnimCurve(self):
+        return self._curves[8]
+
+    def getExtraMatrixAnimCurve(self, row, col):
+        return self._extra[row * 4 + col]
+
+    def addTransformKey(self, t):
+        _count("addTransformKey")
+        for curve in self._all_curves():
+            curve.addKey(t, curve.evaluate(t))
+
+    def removeTransformKey(self, t):
+        _count("removeTransformKey")
+        for curve in self._all_curves():
+            curve.removeKey(t)
+
+    def getTransformKeyTimes(self):
+        times = set()
+        for curve in self._all_curves():
+            times.update(curve._times)
+        return sorted(times)
+
+    def evaluate(self, t):
+        _count("transform.evaluate")
+        tx, ty, rot, sx, sy, cx, cy, skx, sky = [c.evaluate(t) for c in self._curves]
+        cs = math.cos(math.radians(rot))
+        sn = math.sin(math.radians(rot))
+        a, b = cs * sx, -sn * sy
+        c, d = sn * sx, cs * sy
+        e = tx + cx - (a * cx + b * cy)
+        f = ty + cy - (c * cx + d * cy)
+        base = [a, b, 0.0, e, c, d, 0.0, f, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+        extra = [curve.evaluate(t) for curve in self._extra]
+        return CTransform(_mult(base, extra))
+
+    def _script(self):
+        return "{tx %s}" % " ".join(c._script() for c in self._all_curves())
+
+    @classmethod
+    def _from_tokens(cls, tokens):
+        transf = cls()
+        curves = [AnimCurve._from_tokens(t) for t in tokens[1:]]
+        transf._curves = curves[:9]
+        transf._extra = curves[9:]
+        return transf
+
+
+# ===============================================================================
+# elements
+# ===============================================================================
+class AnimAttributes(object):
+    """ Shape/layer attributes, set(time, name, value) animates one (an AnimCurve in the script) """
+
+    def __init__(self):
+        self._values = []
+
+    def add(self, name, value):
+        self.set(name, value)
+
+    def set(self, *args):
+        time, name, value = args if len(args) == 3 else (None, args[0], args[1])
+        for item in self._values:
+            if item[0] == name:
+                break
+        else:
+            item = [name, 0.0]
+            self._values.append(item)
+        if time is None:
+            item[1] = float(value)
+            return
+        if not isinstance(item[1], AnimCurve):
+            item[1] = AnimCurve()
+        item[1].addKey(time, value)
+
+    def getValue(self, t, name):
+        for item in self._values:
+            if item[0] == name:
+                return item[1].evaluate(t) if isinstance(item[1], AnimCurve) else item[1]
+        return 0.0
+
+    def remove(self, name):
+        self._values = [item for item in self._values if item[0] != name]
+
+    def _script(self):
+        return "{a%s}" % "".join(" %s %s" % (k, v._script() if isinstance(v, AnimCurve) else encode_value(v))
+                                 for k, v in self._values)
+
+    @classmethod
+    def _from_tokens(cls, tokens):
+        attrs = cls()
+        for i in range(1, len(tokens) - 1, 2):
+            value = tokens[i + 1]
+            attrs._values.append([tokens[i], AnimCurve._from_tokens(value) if isinstance(value, list)
+                                  else decode_value(value)])
+        return attrs
+
+
+class Element(object):
+    def __init__(self, curvesKnob=None, name=None):
+        self.name = name or self.__class__.__name__
+        self.parent = None
+        self._attrs = AnimAttributes()
+        self._transform = AnimCTransform()
+
+    def getAttributes(self):
+        return self._attrs
+
+    def getTransform(self):
+        return self._transform
+
+    def __eq__(self, other):
+        return self is other
+
+    def __ne__(self, other):
+        return self is not other
+
+    def __hash__(self):
+        return id(self)
+
+
+class Shape(Element):
+    _TAG = "curvegroup"
+
+    def __init__(self, curvesKnob=None, type="bezier", name=None):
+        Element.__init__(self, curvesKnob, name or "Bezier")
+        self.type = type
+        self._points = []
+
+    def append(self, point):
+        self._points.append(point)
+
+    def __iter__(self):
+        return iter(list(self._points))
+
+    def __len__(self):
+        return len(self._points)
+
+    def __getitem__(self, index):
+        return self._points[index]
+
+    def clone(self):
+        new = self.__class__._from_tokens(tokenize(self._script())[0])
+        if self.parent is not None:
+            self.parent.insert(self.parent._children.index(self) + 1, new)
+        return new
+
+    def _script(self):
+        return "{%s %s 512 %s {cc %s} %s %s}" % (
+            self._TAG, _quote(self.name), self.type,
+            " ".join(p._script() for p in self._points),
+            self._transform._script(), self._attrs._script())
+
+    @classmethod
+    def _from_tokens(cls, tokens):
+        shape = cls(type=tokens[3], name=tokens[1])
+        shape._points = [ShapeControlPoint._from_tokens(p) for p in tokens[4][1:]]
+        shape._transform = AnimCTransform._from_tokens(tokens[5])
+        shape._attrs = AnimAttributes._from_tokens(tokens[6])
+        return shape
+
+
+class Stroke(Shape):
+    _TAG = "cubiccurve"
+
+    def __init__(self, curvesKnob=None, type="catmullrom", name=None):
+        Shape.__init__(self, curvesKnob, type, name or "Brush")
+
+    @classmethod
+    def _from_tokens(cls, tokens):
+        stroke = Shape._from_tokens.__func__(cls, tokens)
+        stroke._points = [AnimControlPoint._from_tokens(p[1]) for p in tokens[4][1:]]
+        return stroke
+
+    def _script(self):
+        return "{%s %s 512 %s {cc %s} %s %s}" % (
+            self._TAG, _quote(self.name), self.type,
+            " ".join("{p %s}" % p._script() for p in self._points),
+            self._transform._script(), self._attrs._script())
+
+
+class Layer(Element):
+    def __init__(self, curvesKnob=None, name=None):
+        Element.__init__(self, curvesKnob, name or "Layer")
+        self._children = []
+
+    def append(self, element):
+        self.insert(len(self._children), element)
+
+    def insert(self, index, element):
+        _count("insert")
+        if element.parent is not None:
+            element.parent._children.remove(element)
+        element.parent = self
+        self._children.insert(index, element)
+
+    def remove(self, index):
+        element = self._children.pop(index)
+        element.parent = None
+
+    def __iter__(self):
+        return iter(list(self._children))
+
+    def __len__(self):
+        return len(self._children)
+
+    def __getitem__(self, index):
+        return self._children[index]
+
+    def _script(self):
+        children = "".join("\n " + c._script() for c in self._children)
+        return "{layer %s {f 0} %s %s%s}" % (
+            _quote(self.name), self._transform._script(), self._attrs._script(), children)
+
+    @classmethod
+    def _from_tokens(cls, tokens):
+        layer = cls(name=tokens[1])
+        layer._transform = AnimCTransform._from_tokens(tokens[3])
+        layer._attrs = AnimAttributes._from_tokens(tokens[4])
+        for child in tokens[5:]:
+            layer.append(_element_from_tokens(child))
+        return layer
+
+
+def _element_from_tokens(tokens):
+    tag = tokens[0]
+    if tag == "layer":
+        return Layer._from_tokens(tokens)
+    if tag == "cubiccurve":
+        return Stroke._from_tokens(tokens)
+    return _SHAPE_CLASS[0]._from_tokens(tokens)
+
+
+_SHAPE_CLASS = [Shape]
+
+
+class CurveKnob(object):
+    """ The 'curves' knob of Roto, RotoPaint and SplineWarp3 nodes """
+
+    def __init__(self, name="curves"):
+        self._name = name
+        self.user = False
+        self._expression = None
+        self.rootLayer = Layer(name="Root")
+        self.edges = []
+
+    def name(self):
+        return self._name
+
+    def Class(self):
+        return "CurveKnob"
+
+    def changed(self):
+        _count("changed")
+
+    def getSelected(self):
+        return []
+
+    def toScript(self):
+        _count("toScript")
+        edges = "".join("\n {edge %s %s {cp x41980000 x41980000 0 0 1} {a}}" % (_quote(a), _quote(b))
+                        for a, b in self.edges)
+        return "{{v x3f99999a}\n {f 0}\n {n\n %s}%s}" % (self.rootLayer._script(), edges)
+
+    def fromScript(self, text):
+        _count("fromScript")
+        tokens = tokenize(text)[0]
+        self.edges = []
+        for group in tokens:
+            if group[0] == "n":
+                self.rootLayer = Layer._from_tokens(group[1])
+            elif group[0] == "edge":
+                self.edges.append((group[1], group[2]))
+
+    def walk(self, layer=None):
+        for element in (self.rootLayer if layer is None else layer):
+            yield element
+            if isinstance(element, Layer):
+                for child in self.walk(element):
+                    yield child
+
+    def toElement(self, name):
+        for element in self.walk():
+            if element.name == name:
+                return element
+        return None
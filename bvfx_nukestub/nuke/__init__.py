@@ -0,0 +1,659 @@
+""" In-memory stand-in for the `nuke` module
+
+    Put the parent directory on sys.path (before anything else) to run
+    bvfx_freezesplinewarp without a Nuke licence, as the benchmark suite and the
+    batch command line do.  Nodes, knobs and curves live in plain Python objects
+    and every heavy API entry point is counted in _curveknob.API_CALLS.
+"""
+from __future__ import absolute_import
+
+import json
+import re
+
+import _curveknob
+from _curveknob import API_CALLS, CurveKnob, AnimCurve, _count, reset_calls  # noqa: F401
+from . import math  # noqa: F401
+from . import rotopaint  # noqa: F401
+from . import splinewarp  # noqa: F401
+
+GUI = False
+NUKE_VERSION_MAJOR = 13
+NUKE_VERSION_STRING = "13.0v0-stub"
+env = {"indie": False, "nc": False, "gui": False}
+
+STARTLINE = 0x1000
+INVISIBLE = 0x400
+NO_ANIMATION = 0x100
+TO_SCRIPT = 0x01
+TO_VALUE = 0x02
+WRITE_NON_DEFAULT_ONLY = 0x04
+WRITE_USER_KNOB_DEFS = 0x08
+INPUTS = 0x01
+HIDDEN_INPUTS = 0x02
+EXPRESSIONS = 0x04
+
+_NODES = []
+_COUNTERS = {}
+_ROOT_RANGE = [1, 100]
+_FRAME = [1]
+
+
+class FrameRange(object):
+    def __init__(self, first=None, last=None):
+        if last is None:
+            match = re.match(r"^\s*(-?\d+)\s*-\s*(-?\d+)\s*$", str(first))
+            if match is None:
+                raise ValueError("bad frame range %r" % first)
+            first, last = int(match.group(1)), int(match.group(2))
+        self._first = int(first)
+        self._last = int(last)
+
+    def first(self):
+        return self._first
+
+    def last(self):
+        return self._last
+
+    def frames(self):
+        return self._last - self._first + 1
+
+    def isInRange(self, f):
+        return self._first <= f <= self._last
+
+    def __iter__(self):
+        return iter(range(self._first, self._last + 1))
+
+    def __str__(self):
+        return "%s-%s" % (self._first, self._last)
+
+
+# ===============================================================================
+# knobs
+# ===============================================================================
+class Knob(object):
+    def __init__(self, name, label=None, value=None):
+        self._name = name
+        self._label = label
+        self._value = value
+        self._expression = None
+        self._flags = 0
+        self._visible = True
+        self.user = False
+
+    def name(self):
+        return self._name
+
+    def label(self):
+        return self._label
+
+    def Class(self):
+        return self.__class__.__name__
+
+    def value(self):
+        return self._value
+
+    getValue = value
+
+    def getText(self):
+        return str(self._value)
+
+    def setValue(self, value):
+        self._value = value
+        return True
+
+    def setExpression(self, expression):
+        self._expression = expression
+
+    def hasExpression(self):
+        return self._expression is not None
+
+    def setFlag(self, flag):
+        self._flags |= flag
+
+    def clearFlag(self, flag):
+        self._flags &= ~flag
+
+    def setTooltip(self, text):
+        pass
+
+    def setVisible(self, visible):
+        self._visible = visible
+
+    def setEnabled(self, enabled):
+        pass
+
+    def toScript(self):
+        return json.dumps(self._value)
+
+    def fromScript(self, text):
+        self._value = json.loads(text)
+
+
+class String_Knob(Knob):
+    def __init__(self, name, label=None, value=""):
+        Knob.__init__(self, name, label, value)
+
+
+class Multiline_Eval_String_Knob(String_Knob):
+    pass
+
+
+class Int_Knob(Knob):
+    def __init__(self, name, label=None, value=0):
+        Knob.__init__(self, name, label, value)
+
+
+class Double_Knob(Knob):
+    def __init__(self, name, label=None, value=0.0):
+        Knob.__init__(self, name, label, value)
+
+
+class Boolean_Knob(Knob):
+    def __init__(self, name, label=None, value=False):
+        Knob.__init__(self, name, label, value)
+
+
+class Enumeration_Knob(Knob):
+    def __init__(self, name, label=None, values=()):
+        Knob.__init__(self, name, label, values[0] if values else "")
+        self._values = list(values)
+
+    def values(self):
+        return self._values
+
+
+class Tab_Knob(Knob):
+    pass
+
+
+class Text_Knob(Knob):
+    def __init__(self, name, label=None, value=""):
+        Knob.__init__(self, name, label, value)
+
+
+class PyScript_Knob(Knob):
+    def __init__(self, name, label=None, command=""):
+        Knob.__init__(self, name, label, command)
+
+    def execute(self):
+        exec(self._value, {"nuke": _module()})
+
+
+class XY_Knob(Knob):
+    """ Animated 2d knob (Tracker3 trackN) """
+
+    def __init__(self, name, label=None):
+        Knob.__init__(self, name, label, None)
+        self._curves = [AnimCurve(), AnimCurve()]
+
+    def animation(self, index):
+        curve = self._curves[index]
+        return AnimationCurve(curve) if curve.getNumberOfKeys() else None
+
+    def getValueAt(self, f, index=None):
+        _count("getValueAt")
+        if index is None:
+            return [self._curves[0].evaluate(f), self._curves[1].evaluate(f)]
+        return self._curves[index].evaluate(f)
+
+    def getValue(self, index=None):
+        return self.getValueAt(_FRAME[0], index)
+
+    def setValueAt(self, value, f, index):
+        self._curves[index].addKey(f, value)
+
+    def toScript(self):
+        return " ".join(c._script() for c in self._curves)
+
+    def fromScript(self, text):
+        self._curves = [AnimCurve._from_tokens(t) for t in _curveknob.tokenize(text)]
+
+
+# knob key interpolations, the _curveknob ones underneath
+SMOOTH = _curveknob.kSmoothInterpolation
+CONSTANT = _curveknob.kConstantInterpolation
+LINEAR = _curveknob.kLinearInterpolation
+CATMULL_ROM = _curveknob.kCatmullRomInterpolation
+CUBIC = _curveknob.kCubicInterpolation
+HORIZONTAL = _curveknob.kHorizontalInterpolation
+BREAK = _curveknob.kBreakInterpolation
+USER_SET_SLOPE = _curveknob.kUserInterpolation
+
+
+class AnimationKey(object):
+    def __init__(self, x, y, interpolation=SMOOTH):
+        self.x = x
+        self.y = y
+        self.interpolation = interpolation
+
+
+class AnimationCurve(object):
+    """ nuke.AnimationCurve view over a stub curve """
+
+    def __init__(self, curve):
+        self._curve = curve
+
+    def keys(self):
+        _count("animation.keys")
+        return [AnimationKey(t, v, i) for t, v, i in
+                zip(self._curve._times, self._curve._values, self._curve._interpolations)]
+
+    def changeInterpolation(self, keys, interpolation):
+        for key in keys:
+            for i in range(self._curve.getNumberOfKeys()):
+                if self._curve._times[i] == key.x:
+                    self._curve._interpolations[i] = interpolation
+
+    def evaluate(self, f):
+        return self._curve.evaluate(f)
+
+    def noExpression(self):
+        return True
+
+    def constant(self):
+        return self._curve.getNumberOfKeys() <= 1
+
+
+TRACKER4_COLUMNS = (
+    ("enable", "e", 5), ("name", "n", 3), ("track_x", "tx", 2), ("track_y", "ty", 2),
+    ("offset_x", "ox", 2), ("offset_y", "oy", 2), ("T", "T", 4), ("R", "R", 4), ("S", "S", 4),
+    ("error", "err", 2), ("error_min", "emn", 1), ("error_max", "emx", 1),
+    ("pattern_x", "pox", 1), ("pattern_y", "poy", 1), ("pattern_r", "por", 1), ("pattern_t", "pot", 1),
+    ("search_x", "sx", 1), ("search_y", "sy", 1), ("search_r", "sr", 1), ("search_t", "st", 1),
+    ("key_track", "kt", 2), ("key_search_x", "ksx", 2), ("key_search_y", "ksy", 2),
+    ("key_search_r", "ksr", 2), ("key_search_t", "kst", 2), ("key_track_x", "ktx", 2),
+    ("key_track_y", "kty", 2), ("key_track_r", "ktr", 2), ("key_track_t", "ktt", 2),
+    ("key_centre_offset_x", "kcox", 2), ("key_centre_offset_y", "kcoy", 2))
+
+
+class Table_Knob(Knob):
+    """ Tracker4 'tracks' knob, a table of len(TRACKER4_COLUMNS) columns per track """
+
+    def __init__(self, name, label=None):
+        Knob.__init__(self, name, label, None)
+        self._rows = []
+
+    def addTrack(self, name):
+        row = [AnimCurve(0.0) for _ in TRACKER4_COLUMNS]
+        row[0].constantValue = 1.0
+        self._rows.append((name, row))
+        return row
+
+    def _curve(self, index):
+        cols = len(TRACKER4_COLUMNS)
+        return self._rows[index // cols][1][index % cols]
+
+    def getValueAt(self, f, index):
+        _count("getValueAt")
+        return self._curve(index).evaluate(f)
+
+    def getValue(self, index=0):
+        return self.getValueAt(_FRAME[0], index)
+
+    def animation(self, index):
+        curve = self._curve(index)
+        return AnimationCurve(curve) if curve.getNumberOfKeys() else None
+
+    def toScript(self):
+        _count("toScript")
+        header = "{ 1 %d %d } \n" % (len(TRACKER4_COLUMNS), len(self._rows))
+        columns = "{ %s } \n" % " ".join(
+            "{ %d 1 58 %s %s 1 }" % (kind, name, short) for name, short, kind in TRACKER4_COLUMNS)
+        rows = "{ %s }" % " ".join(
+            "{ %s }" % " ".join(["{%s}" % name] + [c._script() for c in row]) for name, row in self._rows)
+        return header + columns + rows
+
+    def fromScript(self, text):
+        body = _curveknob.tokenize(text)[2]
+        self._rows = []
+        for row in body:
+            self._rows.append((row[0][0], [AnimCurve._from_tokens(t) for t in row[1:]]))
+
+
+# ===============================================================================
+# nodes
+# ===============================================================================
+_CLASS_KNOBS = {
+    "Roto": lambda: [CurveKnob()],
+    "RotoPaint": lambda: [CurveKnob()],
+    "SplineWarp3": lambda: [CurveKnob(), Int_Knob("toolbar_output_ab"), Boolean_Knob("boundary_bbox", value=True),
+                            Double_Knob("mix", value=0.0), Boolean_Knob("root_warp", value=True),
+                            String_Knob("filter", value="Cubic")],
+    "Tracker3": lambda: sum([[XY_Knob("track%d" % i), Boolean_Knob("enable%d" % i, value=i == 1)]
+                             for i in range(1, 5)], []),
+    "Tracker4": lambda: [Table_Knob("tracks")],
+    "FrameHold": lambda: [Int_Knob("first_frame")],
+}
+
+
+class Node(object):
+    def __init__(self, cls, **knobs):
+        self._class = cls
+        _COUNTERS[cls] = _COUNTERS.get(cls, 0) + 1
+        self._knobs = []
+        for knob in [String_Knob("name", value="%s%d" % (cls, _COUNTERS[cls])), Int_Knob("xpos"), Int_Knob("ypos"),
+                     Boolean_Knob("selected"), String_Knob("label"), String_Knob("knobChanged")]:
+            self._knobs.append(knob)
+        self._knobs.extend(_CLASS_KNOBS.get(cls, lambda: [])())
+        self._inputs = {}
+        for key, value in knobs.items():
+            self[key].setValue(value)
+        _NODES.append(self)
+
+    def Class(self):
+        return self._class
+
+    def name(self):
+        return self["name"].value()
+
+    def setName(self, name):
+        self["name"].setValue(name)
+
+    def fullName(self):
+        return self.name()
+
+    def __getitem__(self, name):
+        for knob in self._knobs:
+            if knob.name() == name:
+                return knob
+        raise NameError("%s has no knob %s" % (self.name(), name))
+
+    def knob(self, name):
+        for knob in self._knobs:
+            if knob.name() == name:
+                return knob
+        return None
+
+    def knobs(self):
+        return dict((k.name(), k) for k in self._knobs)
+
+    def clones(self):
+        """ How many other nodes share this node knobs, see clone() """
+        shared = self["label"]
+        return sum(1 for n in _NODES if n is not self and n.knob("label") is shared)
+
+    def allKnobs(self):
+        return list(self._knobs)
+
+    def addKnob(self, knob):
+        knob.user = True
+        self._knobs.append(knob)
+
+    def removeKnob(self, knob):
+        self._knobs.remove(knob)
+
+    def setInput(self, index, node):
+        self._inputs[index] = node
+        return True
+
+    def input(self, index):
+        return self._inputs.get(index)
+
+    def inputs(self):
+        return len(self._inputs)
+
+    def setSelected(self, selected):
+        self["selected"].setValue(selected)
+
+    def dependent(self, what=0x07, forceEvaluate=True):
+        prefix = self.name() + "."
+        return [n for n in _NODES if n is not self and
+                any(k._expression and prefix in k._expression for k in n._knobs)]
+
+    def isSelected(self):
+        return bool(self["selected"].value())
+
+    def writeKnobs(self, flags=0):
+        _count("writeKnobs")
+        lines = []
+        for knob in self._knobs:
+            if knob.user and flags & WRITE_USER_KNOB_DEFS:
+                lines.append("addUserKnob %s" % json.dumps([knob.Class(), knob.name(), knob.label()]))
+            lines.append("%s %s" % (knob.name(), json.dumps(knob.toScript())))
+            if knob._expression is not None:
+                lines.append("%s.expression %s" % (knob.name(), json.dumps(knob._expression)))
+        return "\n".join(lines)
+
+    def readKnobs(self, text):
+        _count("readKnobs")
+        module = _module()
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            key, value = line.split(" ", 1)
+            value = json.loads(value)
+            if key == "addUserKnob":
+                if self.knob(value[1]) is None:
+                    self.addKnob(getattr(module, value[0])(value[1], value[2]))
+            elif key.endswith(".expression"):
+                self[key[:-len(".expression")]].setExpression(value)
+            else:
+                self[key].fromScript(value)
+
+
+def _module():
+    import nuke
+    return nuke
+
+
+class _NodeFactory(object):
+    def __getattr__(self, cls):
+        return lambda **knobs: Node(cls, **knobs)
+
+
+nodes = _NodeFactory()
+
+
+def createNode(cls, knobs="", inpanel=True):
+    _count("createNode")
+    selected = selectedNodes()
+    node = Node(cls)
+    if knobs:
+        node.readKnobs(knobs)
+    for other in allNodes():
+        other["selected"].setValue(False)
+    if selected:
+        node.setInput(0, selected[0])
+    node["selected"].setValue(True)
+    return node
+
+
+def delete(node):
+    if node in _NODES:
+        _NODES.remove(node)
+
+
+def allNodes(filter=None):
+    return [n for n in _NODES if filter is None or n.Class() == filter]
+
+
+def toNode(name):
+    for node in _NODES:
+        if node.name() == name:
+            return node
+    return None
+
+
+def selectedNodes():
+    return [n for n in _NODES if n["selected"].value()]
+
+
+def selectedNode():
+    selected = selectedNodes()
+    if not selected:
+        raise ValueError("no node selected")
+    return selected[-1]
+
+
+def clone(node):
+    _count("clone")
+    new = Node(node.Class())
+    new._knobs = [k for k in node._knobs if k.name() not in ("name", "xpos", "ypos", "selected")] + \
+        [k for k in new._knobs if k.name() in ("name", "xpos", "ypos", "selected")]
+    new._clone_of = node
+    return new
+
+
+def show(node, forceFloat=False):
+    pass
+
+
+def frame(f=None):
+    if f is not None:
+        _FRAME[0] = f
+    return _FRAME[0]
+
+
+def tcl(command, *args):
+    _count("tcl")
+    match = re.match(r"value (\S+)\.tracks\.(\d+)\.track_x", command)
+    if match:
+        node = toNode(match.group(1))
+        return "0" if int(match.group(2)) <= len(node["tracks"]._rows) else "1"
+    return ""
+
+
+def message(text):
+    print(text)
+
+
+class _Root(Node):
+    def __init__(self):
+        self._class = "Root"
+        self._knobs = [String_Knob("name", value="Root")]  # the script path once opened or saved
+        self._inputs = {}
+
+    def firstFrame(self):
+        return _ROOT_RANGE[0]
+
+    def lastFrame(self):
+        return _ROOT_RANGE[1]
+
+
+_ROOT = _Root()
+
+
+def root():
+    return _ROOT
+
+
+# ===============================================================================
+# menus
+# ===============================================================================
+class Menu(object):
+    def __init__(self, name):
+        self._name = name
+        self.items = {}  # name -> Menu or (command, shortcut)
+
+    def name(self):
+        return self._name
+
+    def addMenu(self, name, icon=None):
+        return self.items.setdefault(name, Menu(name))
+
+    def addCommand(self, name, command=None, shortcut=None, icon=None):
+        self.items[name] = (command, shortcut)
+
+    def findItem(self, name):
+        return self.items.get(name)
+
+
+_MENUS = {}
+
+
+def menu(name):
+    return _MENUS.setdefault(name, Menu(name))
+
+
+class ProgressTask(object):
+    def __init__(self, title):
+        _count("ProgressTask")
+
+    def setMessage(self, text):
+        _count("ProgressTask.setMessage")
+
+    def setProgress(self, value):
+        _count("ProgressTask.setProgress")
+
+    def isCancelled(self):
+        _count("ProgressTask.isCancelled")
+        return False
+
+
+class Undo(object):
+    @staticmethod
+    def name(text):
+        pass
+
+    @staticmethod
+    def new():
+        pass
+
+    @staticmethod
+    def end():
+        pass
+
+    @staticmethod
+    def disable():
+        pass
+
+    @staticmethod
+    def enable():
+        pass
+
+
+def thisNode():
+    return _THIS[0]
+
+
+_THIS = [None]
+
+
+# ===============================================================================
+# scripts
+# ===============================================================================
+def scriptClear():
+    del _NODES[:]
+    _COUNTERS.clear()
+    _ROOT["name"].setValue("Root")
+
+
+def scriptOpen(path):
+    """ Stub scripts are JSON: a list of {"class", "name", "knobs": {knob: script}} """
+    scriptClear()
+    with open(path) as handle:
+        data = json.load(handle)
+    _ROOT_RANGE[:] = data.get("range", _ROOT_RANGE)
+    _ROOT["name"].setValue(path)
+    for item in data["nodes"]:
+        node = clone(toNode(item["clone"])) if "clone" in item else Node(item["class"])
+        node.setName(item["name"])
+        for key, value in item.get("knobs", {}).items():
+            if node.knob(key) is None:  # user knobs, ie: bvfx_sources
+                node.addKnob(String_Knob(key))
+            node[key].fromScript(value)
+
+
+def _script_item(node):
+    """ Clones are saved the way Nuke does it, their shared knobs are written once on the original """
+    item = {"class": node.Class(), "name": node.name()}
+    original = getattr(node, "_clone_of", None)
+    while original is not None and original not in _NODES:
+        original = getattr(original, "_clone_of", None)
+    if original is not None and node.clones():
+        item["clone"] = original.name()
+        item["knobs"] = dict((k, node[k].toScript()) for k in ("xpos", "ypos", "selected"))
+    else:
+        item["knobs"] = dict((k.name(), k.toScript()) for k in node.allKnobs() if k.name() != "name")
+    return item
+
+
+def scriptSaveAs(path, overwrite=1):
+    data = {"range": _ROOT_RANGE, "nodes": [_script_item(n) for n in _NODES]}
+    with open(path, "w") as handle:
+        json.dump(data, handle)
+    _ROOT["name"].setValue(path)
+
+
+def scriptSave(path=None):
+    scriptSaveAs(path)
@@ -0,0 +1,27 @@
+""" Stand-in for nuke.math """
+import struct
+
+from _curveknob import Matrix4  # noqa: F401
+
+
+def _f32(value):
+    return struct.unpack("f", struct.pack("f", value))[0]
+
+
+class Vector4(object):
+    def __init__(self, x=0.0, y=0.0, z=0.0, w=0.0):
+        self._v = [_f32(x), _f32(y), _f32(z), _f32(w)]
+
+    def __getitem__(self, i):
+        return self._v[i]
+
+    def __truediv__(self, s):
+        s = _f32(s)
+        return Vector4(*[v / s for v in self._v])
+
+    __div__ = __truediv__
+
+    x = property(lambda self: self._v[0])
+    y = property(lambda self: self._v[1])
+    z = property(lambda self: self._v[2])
+    w = property(lambda self: self._v[3])
@@ -0,0 +1,3 @@
+""" Stand-in for nuke.rotopaint """
+from _curveknob import (AnimCurve, AnimControlPoint, AnimCTransform, AnimAttributes,  # noqa: F401
+                        CVec2, Layer, Shape, ShapeControlPoint, Stroke)
@@ -0,0 +1,2 @@
+""" Stand-in for nuke.splinewarp, SplineWarp3 curves share the rotopaint element classes """
+from _curveknob import Layer, Shape, ShapeControlPoint, Stroke  # noqa: F401
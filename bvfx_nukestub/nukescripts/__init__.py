@@ -0,0 +1,24 @@
+""" Stand-in for nukescripts """
+import nuke
+from nuke import _count
+from . import panels  # noqa: F401
+
+
+def node_copypaste():
+    """ Copy/paste the selected node, the paste becomes the only selected node """
+    _count("node_copypaste")
+    node = nuke.selectedNode()
+    new = nuke.Node(node.Class())
+    new.readKnobs("\n".join(line for line in node.writeKnobs(
+        nuke.WRITE_USER_KNOB_DEFS | nuke.TO_SCRIPT).splitlines() if not line.startswith(("name ", "selected "))))
+    for other in nuke.allNodes():
+        other["selected"].setValue(False)
+    new.setInput(0, node)
+    new["selected"].setValue(True)
+    return new
+
+
+def swapAB(node):
+    a, b = node.input(0), node.input(1)
+    node.setInput(0, b)
+    node.setInput(1, a)
@@ -0,0 +1,24 @@
+""" Stand-in for nukescripts.panels, dialogs answer OK with the values in PANEL_VALUES """
+PANEL_VALUES = {}
+PANEL_RESULT = [True]
+
+
+class PythonPanel(object):
+    def __init__(self, title="", id=""):
+        self._knobs = []
+
+    def addKnob(self, knob):
+        self._knobs.append(knob)
+
+    def knobs(self):
+        return dict((k.name(), k) for k in self._knobs)
+
+    def knobChanged(self, knob):
+        pass
+
+    def showModalDialog(self):
+        for knob in self._knobs:
+            if knob.name() in PANEL_VALUES:
+                knob.setValue(PANEL_VALUES[knob.name()])
+                self.knobChanged(knob)
+        return PANEL_RESULT[0]
@@ -1,12 +1,11 @@
 import nuke
-try:
-    import bvfx_freezesplinewarp
-except:
-    pass
 
 #===============================================================================
 # BVFX ToolBar Menu definitions
+# the tool itself is imported on the first use, not on every Nuke startup,
+# see bvfx_freezesplinewarp_benchmark.py --startup
 #===============================================================================
-toolbar = nuke.menu("Nodes")
-bvfxt = toolbar.addMenu("BoundaryVFX Tools", "BoundaryVFX.png")
-bvfxt.addCommand('Freeze Splinewarp', 'bvfx_freezesplinewarp.main()','F8')
+if nuke.GUI:
+    toolbar = nuke.menu("Nodes")
+    bvfxt = toolbar.addMenu("BoundaryVFX Tools", "BoundaryVFX.png")
+    bvfxt.addCommand('Freeze Splinewarp', 'import bvfx_freezesplinewarp; bvfx_freezesplinewarp.main()', 'F8')
@@ -0,0 +1,214 @@
+""" Conversion and freeze checks against the stand-in nuke module (bvfx_nukestub),
+    run with: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'bvfx_nukestub'))
+sys.path.insert(0, ROOT)
+
+import _curveknob  # noqa: E402
+import nuke  # noqa: E402
+import nuke.rotopaint as rp  # noqa: E402
+import bvfx_freezesplinewarp as bvfx  # noqa: E402
+
+
+def positions(warpNode, frames):
+    """ Returns: dict: shape name -> (x, y) per point and frame """
+    result = {}
+    for element in warpNode['curves'].walk():
+        if isinstance(element, rp.Layer):
+            continue
+        result[element.name] = [[(point.center.getPositionAnimCurve(0).evaluate(f),
+                                  point.center.getPositionAnimCurve(1).evaluate(f)) for f in frames]
+                                for point in element]
+    return result
+
+
+class SmartBakeTest(unittest.TestCase):
+
+    def setUp(self):
+        _curveknob.SMOOTH_CUBIC = True
+
+    def tearDown(self):
+        _curveknob.SMOOTH_CUBIC = False
+
+    def build(self):
+        nuke.scriptClear()
+        roto = nuke.nodes.RotoPaint()
+        curves = roto['curves']
+        shape = rp.Shape(curves)
+        shape.name = 'Bezier1'
+        point = rp.ShapeControlPoint(0, 0)
+        for frame, x, y in ((10, 0, 5), (20, 40, 10), (30, 10, 60), (60, 90, 20)):
+            point.center.addPositionKey(frame, (x, y))
+        shape.append(point)
+        curves.rootLayer.append(shape)
+        tracker = nuke.nodes.Tracker3()
+        for frame, x in ((10, 0), (20, 40), (30, 10), (60, 90)):
+            tracker['track1'].setValueAt(x, frame, 0)
+            tracker['track1'].setValueAt(x / 2.0, frame, 1)
+        return roto, tracker
+
+    def assertSameBake(self, fRange):
+        first, last = [int(f) for f in fRange.split('-')]
+        frames = range(first, last + 1)
+        full = positions(bvfx.convert_into_splinewarp(list(self.build()), fRange, fullbake=True), frames)
+        smart = positions(bvfx.convert_into_splinewarp(list(self.build()), fRange, smart=True), frames)
+        self.assertEqual(sorted(full), sorted(smart))
+        for name in full:
+            for fullPoint, smartPoint in zip(full[name], smart[name]):
+                for (fx, fy), (sx, sy) in zip(fullPoint, smartPoint):
+                    self.assertAlmostEqual(fx, sx, 3)
+                    self.assertAlmostEqual(fy, sy, 3)
+
+    def test_whole_keys_range(self):
+        self.assertSameBake('1-70')
+
+    def test_partial_range(self):
+        self.assertSameBake('15-40')
+        self.assertSameBake('20-40')
+        self.assertSameBake('25-70')
+
+
+class ReduceKeysTest(unittest.TestCase):
+
+    def setUp(self):
+        _curveknob.SMOOTH_CUBIC = True
+
+    def tearDown(self):
+        _curveknob.SMOOTH_CUBIC = False
+
+    def build(self):
+        nuke.scriptClear()
+        roto = nuke.nodes.RotoPaint()
+        shape = rp.Shape(roto['curves'])
+        shape.name = 'Bezier1'
+        point = rp.ShapeControlPoint(0, 0)
+        for frame, x, y in ((1, 0, 0), (10, 30, 10), (20, 30, 10), (30, 80, 40)):  # held from 10 to 20
+            point.center.addPositionKey(frame, (x, y))
+        shape.append(point)
+        roto['curves'].rootLayer.append(shape)
+        return roto
+
+    def test_lossless_keeps_interpolation(self):
+        frames = range(1, 31)
+        full = positions(bvfx.convert_into_splinewarp([self.build()], '1-30', fullbake=True), frames)
+        warpNode = bvfx.convert_into_splinewarp([self.build()], '1-30')
+        curve = bvfx.CurvesIndex(warpNode).element('Bezier1')[0].center.getPositionAnimCurve(0)
+        self.assertLess(curve.getNumberOfKeys(), 30)
+        for i in range(curve.getNumberOfKeys()):
+            self.assertNotEqual(curve.getKey(i).interpolationType, _curveknob.kLinearInterpolation)
+        for (fx, fy), (x, y) in zip(full['Bezier1'][0], positions(warpNode, frames)['Bezier1'][0]):
+            self.assertAlmostEqual(fx, x, 3)
+            self.assertAlmostEqual(fy, y, 3)
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def test_nested_phases(self):
+        nuke.scriptClear()
+        roto = nuke.nodes.RotoPaint()
+        shape = rp.Shape(roto['curves'])
+        shape.name = 'Bezier1'
+        point = rp.ShapeControlPoint(0, 0)
+        point.center.addPositionKey(1, (0, 0))
+        point.center.addPositionKey(60, (90, 20))
+        shape.append(point)
+        roto['curves'].rootLayer.append(shape)
+        bvfx.bvfx_profiler.start()
+        try:
+            bvfx.convert_into_splinewarp([roto], '1-60', smart=True, chunk=20)
+        finally:
+            report = bvfx.bvfx_profiler.stop()
+        self.assertIn('chunk', report['phases'])
+        self.assertGreater(report['inclusive']['chunk'], report['phases']['chunk'])
+        self.assertLessEqual(sum(report['phases'].values()), report['seconds'])
+
+
+class FreezeTest(unittest.TestCase):
+
+    def build(self):
+        nuke.scriptClear()
+        roto = nuke.nodes.RotoPaint()
+        curves = roto['curves']
+        for name in ('Bezier1', 'Bezier2'):
+            shape = rp.Shape(curves)
+            shape.name = name
+            for offset in (0, 10):
+                point = rp.ShapeControlPoint(0, 0)
+                point.center.addPositionKey(1, (offset, 0))
+                point.center.addPositionKey(30, (offset + 20, 5))
+                shape.append(point)
+            curves.rootLayer.append(shape)
+        return bvfx.convert_into_splinewarp([roto], '1-30')
+
+    def test_animated_attribute(self):
+        warpNode = self.build()
+        for element in warpNode['curves'].walk():
+            if not isinstance(element, rp.Layer):
+                element.getAttributes().set(1, 'opc', 0.0)
+                element.getAttributes().set(21, 'opc', 1.0)
+        script = bvfx.CurvesScript(warpNode['curves'].toScript())
+        group = next(script.shapes())
+        self.assertNotIn('opc', script.attributes(group))
+
+        bvfx.freezewarp([warpNode], 10, False)
+        shapes = dict((e.name, e) for e in warpNode['curves'].walk() if not isinstance(e, rp.Layer))
+        self.assertEqual(sorted(shapes), ['Bezier1_[F]', 'Bezier1_clone', 'Bezier2_[F]', 'Bezier2_clone'])
+        for name, shape in shapes.items():
+            attributes = shape.getAttributes()
+            self.assertEqual(attributes.getValue(0, 'ab'), 1.0 if name.endswith('_[F]') else 2.0)
+            self.assertAlmostEqual(attributes.getValue(11, 'opc'), 0.5)
+
+    def test_layers(self):
+        warpNode = self.build()
+        curves = warpNode['curves']
+        layer = rp.Layer(curves)
+        layer.name = 'face'
+        curves.rootLayer.append(layer)
+        layer.append(bvfx.CurvesIndex(warpNode).element('Bezier1'))
+
+        def frozen():
+            return sorted(e.name for e in curves.walk() if bvfx._bvfx_attribute(e, bvfx.FREEZE_STATE))
+
+        bvfx.freezewarp([warpNode], 10, False, layers=['face'])
+        self.assertEqual(frozen(), ['Bezier1_[F]'])
+        warpNode['fframe'].setValue(12)
+        bvfx.splinewarp_freezeRefresh(warpNode)
+        self.assertEqual(frozen(), ['Bezier1_[F]'])
+
+    def test_static_unfreeze_restores_slopes(self):
+        warpNode = self.build()
+        index = bvfx.CurvesIndex(warpNode)
+        shape = index.element('Bezier1')
+        curve = shape[0].center.getPositionAnimCurve(0)
+        for i, slope in enumerate((0.5, -2.0)):
+            key = curve.getKey(i)
+            key.interpolationType = _curveknob.kUserInterpolation
+            key.leftSlope = slope
+            key.rightSlope = slope * 3
+            key.extrapolationType = _curveknob.kLinearInterpolation
+        before = curve._script()
+        values = [curve.evaluate(f) for f in range(1, 31)]
+
+        bvfx.freezewarp([warpNode], 10, False, static=True)
+        frozen = bvfx.CurvesIndex(warpNode).element('Bezier1_[F]')
+        self.assertEqual(frozen[0].center.getPositionAnimCurve(0).getNumberOfKeys(), 1)
+
+        bvfx.splinewarp_unlock(warpNode)
+        curve = bvfx.CurvesIndex(warpNode).element('Bezier1')[0].center.getPositionAnimCurve(0)
+        self.assertEqual(curve._script(), before)
+        for i, slope in enumerate((0.5, -2.0)):
+            key = curve.getKey(i)
+            self.assertEqual(key.interpolationType, _curveknob.kUserInterpolation)
+            self.assertEqual((key.leftSlope, key.rightSlope), (slope, slope * 3))
+            self.assertEqual(key.extrapolationType, _curveknob.kLinearInterpolation)
+        for f, value in zip(range(1, 31), values):
+            self.assertAlmostEqual(curve.evaluate(f), value, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()